@@ -0,0 +1,141 @@
+import struct
+
+from hexviewer.asset_registry_ue5.reader_type import ArchiveType
+from hexviewer.asset_registry_ue5.readers.binary_writer import BinaryWriter
+from hexviewer.asset_registry_ue5.registry_versions import RegistryVersions
+from hexviewer.asset_registry_ue5.types.registry import AssetData, AssetRegistryHeader, Bundle
+from hexviewer.asset_registry_ue5.unreal_types import FName, TagMapHandle, pack_tag_map_handle
+
+
+class AssetRecordEncoder:
+    """
+    Encodes entries of the asset section into a buffer, in the layout the asset section is read with.
+    The fixed part of an entry is packed with one precompiled struct where possible, otherwise from cached FName encodings,
+    so that an entry costs a few buffer appends instead of a write call per field.
+    """
+    def __init__(self, writer: BinaryWriter, header: AssetRegistryHeader, reader_type: ArchiveType):
+        if reader_type != ArchiveType.ASSET_REGISTRY:
+            raise ValueError(f"Encoding assets is only supported for {ArchiveType.ASSET_REGISTRY.name} archives")
+
+        ver = header.version.version_num
+        self.writer = writer
+        self.has_old_object_path = ver < RegistryVersions.REMOVE_ASSET_PATH_FNAMES
+        self.has_class_path = ver >= RegistryVersions.CLASS_PATHS
+        self.has_outer_path = ver >= RegistryVersions.REMOVE_ASSET_PATH_FNAMES and not header.filter_editor_only
+
+        self.byte_order = "<" if writer.file_byte_order == "little" else ">"
+        self.uint32 = struct.Struct(f"{self.byte_order}I")
+        self.numbered_fname = struct.Struct(f"{self.byte_order}II")
+        self.uint64 = struct.Struct(f"{self.byte_order}Q")
+        self.int32 = struct.Struct(f"{self.byte_order}i")
+
+        self.fnames: dict[tuple[int, int], bytes] = {}
+        # chunk id count, chunk ids and package flags, by number of chunk ids
+        self.tails: dict[int, struct.Struct] = {}
+
+    def encode_fname(self, name: FName) -> bytes:
+        key = (name.name_idx, name.number)
+        if (encoded := self.fnames.get(key)) is None:
+            if name.number == FName.NO_NUMBER:
+                encoded = self.uint32.pack(name.name_idx)
+            else:
+                encoded = self.numbered_fname.pack(name.name_idx | FName.IS_NUMBERED_BIT, name.number)
+            self.fnames[key] = encoded
+        return encoded
+
+    def encode_tag_map_handle(self, handle: TagMapHandle) -> bytes:
+        return self.uint64.pack(pack_tag_map_handle(handle))
+
+    def encode_bundles(self, bundles: list[Bundle], out: bytearray):
+        encode_fname = self.encode_fname
+        out += self.int32.pack(len(bundles))
+
+        for bundle in bundles:
+            out += encode_fname(bundle.bundle_name)
+            out += self.int32.pack(len(bundle.asset_paths))
+            for path in bundle.asset_paths:
+                out += encode_fname(path.asset_path.package)
+                out += encode_fname(path.asset_path.asset)
+                out += self.writer.fstring_bytes(path.sub_path)
+
+    def encode_tail(self, chunk_ids: list[int], package_flags: int) -> bytes:
+        num_chunk_ids = len(chunk_ids)
+        if (tail := self.tails.get(num_chunk_ids)) is None:
+            tail = self.tails[num_chunk_ids] = struct.Struct(f"{self.byte_order}{num_chunk_ids + 1}iI")
+        return tail.pack(num_chunk_ids, *chunk_ids, package_flags)
+
+    def encode_asset(self, asset: AssetData, out: bytearray):
+        """Any asset, the names in the order and number of the header version"""
+        encode_fname = self.encode_fname
+
+        if self.has_old_object_path:
+            out += encode_fname(asset.oldObjectPath)
+
+        out += encode_fname(asset.packagePath)
+
+        if self.has_class_path:
+            out += encode_fname(asset.assetClass.package)
+            out += encode_fname(asset.assetClass.asset)
+        else:
+            out += encode_fname(asset.assetClass)
+
+        out += encode_fname(asset.packageName)
+        out += encode_fname(asset.assetName)
+
+        if self.has_outer_path:
+            out += encode_fname(asset.optionalOuterPath)
+
+        out += self.encode_tag_map_handle(asset.tags)
+
+        if asset.bundles:
+            self.encode_bundles(asset.bundles, out)
+        else:
+            out += self.int32.pack(0)
+
+        out += self.encode_tail(asset.chunk_ids, asset.package_flags)
+
+    def encode_assets(self, assets: list[AssetData]) -> bytes:
+        out = bytearray()
+        if not (self.has_class_path and self.has_outer_path and not self.has_old_object_path):
+            for asset in assets:
+                self.encode_asset(asset, out)
+            return bytes(out)
+
+        # the six names and the tag map handle of an asset without numbered names (FName.NO_NUMBER being 0)
+        # are packed with one call
+        head = struct.Struct(f"{self.byte_order}6IQ")
+        pack_head = head.pack
+        encode_bundles = self.encode_bundles
+        encode_tail = self.encode_tail
+        no_bundles = self.int32.pack(0)
+
+        for asset in assets:
+            package_path = asset.packagePath
+            class_path = asset.assetClass
+            class_package = class_path.package
+            class_asset = class_path.asset
+            package_name = asset.packageName
+            asset_name = asset.assetName
+            outer_path = asset.optionalOuterPath
+
+            if outer_path is None or (
+                package_path.number or class_package.number or class_asset.number
+                or package_name.number or asset_name.number or outer_path.number
+            ):
+                self.encode_asset(asset, out)
+                continue
+
+            out += pack_head(
+                package_path.name_idx, class_package.name_idx, class_asset.name_idx,
+                package_name.name_idx, asset_name.name_idx, outer_path.name_idx,
+                pack_tag_map_handle(asset.tags)
+            )
+
+            if asset.bundles:
+                encode_bundles(asset.bundles, out)
+            else:
+                out += no_bundles
+
+            out += encode_tail(asset.chunk_ids, asset.package_flags)
+
+        return bytes(out)
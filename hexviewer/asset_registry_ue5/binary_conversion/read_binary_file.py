@@ -1,12 +1,15 @@
 import logging
+import struct
 from itertools import batched
 from math import ceil
 from typing import Literal
 
 from hexviewer.asset_registry_ue5.name_mapper import NameMapper
+from hexviewer.asset_registry_ue5.progress import ProgressCallback, SectionProgress, section_progress, PROGRESS_INTERVAL
 from hexviewer.asset_registry_ue5.readers.binary_reader import BinaryReader
 from hexviewer.asset_registry_ue5.readers.fname_reader import FNameReader
 from hexviewer.asset_registry_ue5.data_store_reader import DataStore
+from hexviewer.asset_registry_ue5.instrumentation import stage, checks_enabled
 from hexviewer.asset_registry_ue5.reader_type import ArchiveType
 from hexviewer.asset_registry_ue5.registry_versions import RegistryVersions
 from hexviewer.asset_registry_ue5.unreal_types import SerializedString, FNameHeader
@@ -16,13 +19,24 @@ from hexviewer.asset_registry_ue5.types.registry import AssetRegVersion, AssetRe
 logger = logging.getLogger(__name__)
 
 
-def asset_registry_from_file(reader: BinaryReader):
+def asset_registry_from_file(reader: BinaryReader, sections: dict[str, tuple[int, int]] | None = None,
+                             progress: ProgressCallback | None = None):
+    """
+    If given, sections is filled with the start and end offsets of each section that was read,
+    and progress is called with the bytes read and assets parsed so far
+    """
     logger.info(f"Latest parsable version: {int(RegistryVersions.LATEST_VERSION)}")
     logger.debug(f"File size: {reader.byte_size} bytes")
     logger.debug(f"File byte order: {reader.file_byte_order}")
 
-    header = read_header(reader)
-    state = read_state(reader, header)
+    with stage("ReadBinary"):
+        loc_header_start = reader.tell()
+        with stage("Header"):
+            header = read_header(reader)
+        if sections is not None:
+            sections["Header"] = (loc_header_start, reader.tell())
+
+        state = read_state(reader, header, sections, progress)
 
     if reader.tell() != reader.byte_size:
         raise ValueError("Reader position not at end of file after parsing")
@@ -53,7 +67,8 @@ def read_header(reader: BinaryReader):
         filter_editor_only
     )
 
-def read_state(reader: BinaryReader, header: AssetRegistryHeader):
+def read_state(reader: BinaryReader, header: AssetRegistryHeader, sections: dict[str, tuple[int, int]] | None = None,
+               progress: ProgressCallback | None = None):
     logger.info("Loading registry state")
 
     ver_num = header.version.version_num
@@ -63,7 +78,7 @@ def read_state(reader: BinaryReader, header: AssetRegistryHeader):
     elif ver_num < RegistryVersions.FIXED_TAGS:
         return read_with_table_archive_reader(reader, header)
     else:
-        return read_with_asset_registry_reader(reader, header)
+        return read_with_asset_registry_reader(reader, header, sections, progress)
 
 
 
@@ -75,16 +90,33 @@ def read_with_table_archive_reader(reader: BinaryReader, header: AssetRegistryHe
     load_asset_data(reader, header, ArchiveType.TABLE_ARCHIVE)
 
 
-def read_with_asset_registry_reader(reader: BinaryReader, header: AssetRegistryHeader):
+def read_with_asset_registry_reader(reader: BinaryReader, header: AssetRegistryHeader, sections: dict[str, tuple[int, int]] | None = None,
+                                    progress: ProgressCallback | None = None):
     logger.info("Using Asset Registry Reader")
 
-    names = deserialize_name_batch(reader, header)
-    tag_store = deserialize_data_store(reader)
+    if sections is None:
+        sections = {}
+
+    def read_section(section_name: str, section_reader, *args, per_item: bool = False):
+        """Sections read per_item are passed their SectionProgress and report it per entry"""
+        loc_section_start = reader.tell()
+        tracker = section_progress(progress, "ReadBinary", section_name, position=reader.tell, bytes_total=reader.byte_size)
+        with stage(section_name):
+            section = section_reader(*args, tracker) if per_item else section_reader(*args)
+        sections[section_name] = (loc_section_start, reader.tell())
+        if tracker is not None:
+            tracker.finish(len(section) if per_item else None)
+        return section
+
+    names = read_section("Names", deserialize_name_batch, reader, header)
+    tag_store = read_section("TagStore", deserialize_data_store, reader)
 
-    assets = load_asset_data(reader, header, ArchiveType.ASSET_REGISTRY)
+    assets = read_section("Assets", load_asset_data, reader, header, ArchiveType.ASSET_REGISTRY, per_item=True)
+    if checks_enabled():
+        check_tag_handles(assets, tag_store)
 
-    dependencies = get_dependencies(reader, ArchiveType.ASSET_REGISTRY)
-    packages = get_package_data(reader, header, ArchiveType.ASSET_REGISTRY)
+    dependencies = read_section("Dependencies", get_dependencies, reader, ArchiveType.ASSET_REGISTRY, per_item=True)
+    packages = read_section("Packages", get_package_data, reader, header, ArchiveType.ASSET_REGISTRY)
 
     return AssetRegistryState(
         names=names,
@@ -150,9 +182,8 @@ def deserialize_name_batch(reader: BinaryReader, header: AssetRegistryHeader):
         for b in batched(header_bytes, HEADER_SIZE)
     ]
 
-    logger.debug("Checking headers:")
-    logger.debug(f"num strings with length above char limit (1023): {len([head for head in string_headers if head.char_len() >= 1024])}")
-    logger.debug(f"num_string_bytes: {sum([head.byte_len() for head in string_headers])}")
+    if checks_enabled():
+        check_name_headers(string_headers)
 
     #NameBatchLoader.load -> LoadSeparatedNameBatch
 
@@ -163,7 +194,8 @@ def deserialize_name_batch(reader: BinaryReader, header: AssetRegistryHeader):
         strings.append(
             SerializedString(
                 string_bytes[offset:offset+header.byte_len()],
-                header.is_wide
+                header.is_wide,
+                is_serialized=True
             )
         )
         offset += header.byte_len()
@@ -176,6 +208,12 @@ def deserialize_name_batch(reader: BinaryReader, header: AssetRegistryHeader):
         names=strings,
     )
 
+
+def check_name_headers(string_headers: list[FNameHeader]):
+    num_too_long = sum(1 for head in string_headers if head.char_len() >= 1024)
+    if num_too_long:
+        raise ValueError(f"{num_too_long} names exceed the char limit of 1023")
+
 def deserialize_name_table(reader: BinaryReader):
     # CONSTRUCTOR SECTION
     name_map = []
@@ -205,19 +243,19 @@ def deserialize_data_store(reader: BinaryReader):
 
 
 def load_asset_data(reader:BinaryReader, header: AssetRegistryHeader, reader_mode:Literal[
-    ArchiveType.TABLE_ARCHIVE, ArchiveType.ASSET_REGISTRY]):
+    ArchiveType.TABLE_ARCHIVE, ArchiveType.ASSET_REGISTRY], progress: SectionProgress | None = None):
     logger.info("Loading asset data")
     logger.debug(f"Starting at {hex(reader.tell())}")
 
     if header.version.version_num == int(RegistryVersions.LATEST_VERSION):
-        return load_assets(reader, header, reader_mode)
+        return load_assets(reader, header, reader_mode, progress)
 
     else:
         #return load_assets__old(reader, header, reader_mode)
         raise ValueError("Didn't implement this yet, sorry")
 
-def load_assets(reader, header, reader_mode):
-    return get_cached_asset(reader, header, reader_mode)
+def load_assets(reader, header, reader_mode, progress: SectionProgress | None = None):
+    return get_cached_asset(reader, header, reader_mode, progress)
 
 
 def get_bundles(reader: BinaryReader, header: AssetRegistryHeader, reader_type:ArchiveType):
@@ -242,8 +280,6 @@ def load_bundles(reader: BinaryReader, header: AssetRegistryHeader, reader_type:
         bundle_name = fname_reader.read_fname()
         num_asset_paths = reader.read_int32()
 
-        logger.debug(f"{num_asset_paths} paths")
-
         asset_paths = []
 
         for j in range(num_asset_paths):
@@ -256,7 +292,7 @@ def load_bundles(reader: BinaryReader, header: AssetRegistryHeader, reader_type:
 
 
 
-def get_cached_asset(reader: BinaryReader, header: AssetRegistryHeader, reader_type:ArchiveType):
+def get_cached_asset(reader: BinaryReader, header: AssetRegistryHeader, reader_type:ArchiveType, progress: SectionProgress | None = None):
     logger.info("Loading assets")
 
     ver = header.version.version_num
@@ -265,8 +301,14 @@ def get_cached_asset(reader: BinaryReader, header: AssetRegistryHeader, reader_t
     num_cached = reader.read_int32()
     logger.debug(f"{num_cached} assets to load")
 
+    if progress is not None:
+        progress.items_total = num_cached
+
     cached_assets = []
     for i in range(num_cached):
+        if progress is not None and i % PROGRESS_INTERVAL == 0:
+            progress.update(i)
+
         old_object_path = fname_reader.read_fname() if ver < RegistryVersions.REMOVE_ASSET_PATH_FNAMES else None
         package_path = fname_reader.read_fname()
 
@@ -304,13 +346,22 @@ def get_cached_asset(reader: BinaryReader, header: AssetRegistryHeader, reader_t
             package_flags=package_flags,
         ))
 
-    logger.debug("Does total width of referenced handles match tag store?")
-    logger.debug(f"Sum of numberless handles: {sum([asset.tags.handle_num for asset in cached_assets if asset.tags.has_numberless_keys])}")
-    logger.debug(f"Sum of numbered handles: {sum([asset.tags.handle_num for asset in cached_assets if not asset.tags.has_numberless_keys])}")
-
     return cached_assets
 
 
+def check_tag_handles(assets: list[AssetData], tag_store: DataStore):
+    """Every tag map handle has to lie within the pair table it refers to"""
+    num_pairs = {True: len(tag_store.numberless_pairs), False: len(tag_store.numbered_pairs)}
+    for asset_idx, asset in enumerate(assets):
+        handle = asset.tags
+        if handle.pair_begin + handle.handle_num > num_pairs[bool(handle.has_numberless_keys)]:
+            raise ValueError(
+                f"Tags of asset {asset_idx} reference pairs {handle.pair_begin}-{handle.pair_begin + handle.handle_num}, "
+                f"beyond the {num_pairs[bool(handle.has_numberless_keys)]} "
+                f"{'numberless' if handle.has_numberless_keys else 'numbered'} pairs in the tag store"
+            )
+
+
 
 
 
@@ -319,16 +370,23 @@ NAME_DEP_FLAG_BITS = 0
 MANAGE_DEP_FLAG_BITS = 1
 REFERENCER_FLAG_BITS = 0
 
-def get_dependencies(reader: BinaryReader, reader_type: ArchiveType):
+def get_dependencies(reader: BinaryReader, reader_type: ArchiveType, progress: SectionProgress | None = None):
     logger.info("Loading dependencies")
     dependency_section_size = reader.read_int64()
+    loc_section_start = reader.tell()
     num_dependencies = reader.read_int32()
 
     fname_reader = FNameReader(reader, reader_type)
 
+    if progress is not None:
+        progress.items_total = num_dependencies
+
     dependencies = []
 
     for i in range(num_dependencies):
+        if progress is not None and i % PROGRESS_INTERVAL == 0:
+            progress.update(i)
+
         identifier = fname_reader.read_asset_identifier()
 
         package_deps, package_dep_flags = get_dependency_list(reader, PACKAGE_DEP_FLAG_BITS)
@@ -348,23 +406,45 @@ def get_dependencies(reader: BinaryReader, reader_type: ArchiveType):
             referencer_flags,
         ))
 
+    if checks_enabled() and reader.tell() - loc_section_start != dependency_section_size:
+        raise ValueError(f"Parsed {reader.tell() - loc_section_start} bytes of dependencies when {dependency_section_size} were specified")
+
     return dependencies
 
 def get_dependency_list(reader: BinaryReader, bits_per_flag):
-    deps = read_array(reader, reader.read_int32)
-    flags = reader.read_bytes(get_bytes_for_packed_flags(len(deps), bits_per_flag))
+    deps = reader.read_int32_array(reader.read_int32())
+    flags = reader.read_bytes(get_bytes_for_packed_flags(bits_per_flag, len(deps)))
 
     return deps, flags
 
 
 BITS_PER_WORD = 32
+BYTES_PER_WORD = 4
 def get_bytes_for_packed_flags(bits_per_flag, n_flags):
-    return ceil((bits_per_flag*n_flags)/BITS_PER_WORD)
+    # flag bits are stored as whole uint32 words
+    return ceil((bits_per_flag*n_flags)/BITS_PER_WORD) * BYTES_PER_WORD
+
+COOKED_HASH_SIZE = 16
+CHUNK_ID_SIZE = 12
+CHUNK_HASH_SIZE = 20
+
+
+def package_structs(ver_num: int, file_byte_order: str) -> tuple[struct.Struct, struct.Struct, struct.Struct]:
+    """Fixed width parts of a package entry: disk size and guid, the version fields, and one custom version"""
+    byte_order = "<" if file_byte_order == "little" else ">"
+    num_version_fields = 4 if ver_num >= RegistryVersions.PACKAGE_FILE_SUMMARY_VERSION_CHANGE else 3
+    return (
+        struct.Struct(f"{byte_order}q4I"),
+        struct.Struct(f"{byte_order}{num_version_fields}i"),
+        struct.Struct(f"{byte_order}4Ii"),
+    )
+
 
 def get_package_data(reader: BinaryReader, header:AssetRegistryHeader, reader_mode: ArchiveType):
     logger.info("Loading Packages")
     ver_num = header.version.version_num
     fname_reader = FNameReader(reader, reader_mode)
+    package_head, version_fields, custom_version = package_structs(ver_num, reader.file_byte_order)
 
     packages = []
 
@@ -383,27 +463,27 @@ def get_package_data(reader: BinaryReader, header:AssetRegistryHeader, reader_mo
 
         key = fname_reader.read_fname()
         # serialized FAssetPackageData
-        package_disk_size = reader.read_int64()
-        guid = reader.read_guid()
+        package_disk_size, *guid = package_head.unpack(reader.read_bytes(package_head.size))
+        guid = tuple(guid)
 
         if ver_num >= RegistryVersions.ADDED_COOKED_MD5_HASH:
-            cooked_hash = reader.read_bytes(16)
+            cooked_hash = reader.read_bytes(COOKED_HASH_SIZE)
 
         if ver_num >= RegistryVersions.ADDED_CHUNK_HASHES:
-            chunk_hashes = read_map(reader, 12, 20)
+            chunk_hashes = read_map(reader, CHUNK_ID_SIZE, CHUNK_HASH_SIZE)
 
 
         if ver_num >= RegistryVersions.WORKSPACE_DOMAIN:
-            ue4_ver = reader.read_int32()
+            versions = version_fields.unpack(reader.read_bytes(version_fields.size))
             if ver_num >= RegistryVersions.PACKAGE_FILE_SUMMARY_VERSION_CHANGE:
-                ue5_ver = reader.read_int32()
-            version_licensee = reader.read_int32()
-            flags = reader.read_int32()
+                ue4_ver, ue5_ver, version_licensee, flags = versions
+            else:
+                ue4_ver, version_licensee, flags = versions
 
             num_custom_versions = reader.read_int32()
             custom_versions = [
-               (reader.read_guid(), reader.read_int32())
-                for _ in range(num_custom_versions)
+                (tuple(entry[:4]), entry[4])
+                for entry in custom_version.iter_unpack(reader.read_bytes(num_custom_versions * custom_version.size))
             ]
 
         if ver_num >= RegistryVersions.PACKAGE_IMPORTED_CLASSES:
@@ -440,10 +520,13 @@ def read_array(reader: BinaryReader, element_getter):
 
 
 def read_map(reader: BinaryReader, key_size, element_size):
+    """Map of fixed size keys and values, read as one block"""
     num_entries = reader.read_int32()
+    entry_size = key_size + element_size
+    data = reader.read_bytes(num_entries * entry_size)
 
     return [
-        (reader.read_bytes(key_size), reader.read_bytes(element_size))
-        for _ in range(num_entries)
+        (data[offset:offset + key_size], data[offset + key_size:offset + entry_size])
+        for offset in range(0, len(data), entry_size)
     ]
 
@@ -0,0 +1,410 @@
+import io
+import logging
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+from hexviewer.asset_registry_ue5.binary_conversion.asset_encoder import AssetRecordEncoder
+from hexviewer.asset_registry_ue5.binary_conversion.registry_scanner import RegistryScanner, RegistryInfo, \
+    RegistryFormatError, scan_header, scan_name_batch, scan_data_store, scan_assets, DATA_STORE_ARRAYS, \
+    NAME_BATCH_HASH_SIZE, NAME_BATCH_HEADER_SIZE
+from hexviewer.asset_registry_ue5.binary_conversion.write_binary_file import encode_name_batch
+from hexviewer.asset_registry_ue5.data_store_reader import DataStore, DATASTORE_END
+from hexviewer.asset_registry_ue5.json_conversion.name_reader import NameReader
+from hexviewer.asset_registry_ue5.json_conversion.read_editable_json import parse_assets, TYPED_TAG_VAL_PATTERN
+from hexviewer.asset_registry_ue5.json_conversion.tag_value_type_markers import TYPES_BY_MARKER
+from hexviewer.asset_registry_ue5.name_mapper import NameMapper
+from hexviewer.asset_registry_ue5.reader_type import ArchiveType
+from hexviewer.asset_registry_ue5.readers.binary_writer import BinaryWriter
+from hexviewer.asset_registry_ue5.registry_versions import RegistryVersions
+from hexviewer.asset_registry_ue5.tag_value_types import ValueTypes
+from hexviewer.asset_registry_ue5.types.registry import AssetData, AssetRegistryHeader, AssetRegVersion
+from hexviewer.asset_registry_ue5.unreal_types import FName, FValueID, SerializedString, TagMapHandle
+
+logger = logging.getLogger(__name__)
+
+# tag store size field holding the number of values of each type
+VALUE_TABLE_SIZES = {
+    ValueTypes.NumberlessName: "NumberlessNames",
+    ValueTypes.Name: "Names",
+    ValueTypes.NumberlessExportPath: "NumberlessExportPaths",
+    ValueTypes.ExportPath: "ExportPaths",
+    ValueTypes.LocalizedText: "Texts",
+    ValueTypes.AnsiString: "AnsiStringOffsets",
+    ValueTypes.WideString: "WideStringOffsets",
+}
+
+
+def asset_key(package_name: str, asset_name: str) -> str:
+    return f"{package_name}.{asset_name}"
+
+
+def has_outer_path(info: RegistryInfo) -> bool:
+    return info.version >= RegistryVersions.REMOVE_ASSET_PATH_FNAMES and not info.filter_editor_only
+
+
+class BaseNames:
+    """
+    The name batch of a binary registry, looked up through the stored hashes and decoded on demand,
+    without building a NameMapper for all of its names.
+    """
+    def __init__(self, data, start: int, num_names: int, num_string_bytes: int, file_byte_order=sys.byteorder):
+        self.data = data
+        self.num_names = num_names
+
+        hashes_start = start + 16
+        headers_start = hashes_start + num_names * NAME_BATCH_HASH_SIZE
+        self.strings_start = headers_start + num_names * NAME_BATCH_HEADER_SIZE
+
+        hashes = array("Q", data[hashes_start:headers_start])
+        if file_byte_order != sys.byteorder:
+            hashes.byteswap()
+
+        # headers are the wide bit and the char length as a big endian uint16
+        headers = array("H", data[headers_start:self.strings_start])
+        if sys.byteorder != "big":
+            headers.byteswap()
+        self.headers = headers
+
+        self.offsets = array("Q", accumulate(
+            ((header & 0x3FF) << 1 if header & 0x8000 else header & 0x3FF for header in headers),
+            initial=0
+        ))
+        if self.offsets[-1] != num_string_bytes:
+            raise RegistryFormatError(f"Name headers add up to {self.offsets[-1]} string bytes, "
+                                      f"the batch holds {num_string_bytes}", start)
+
+        self.make_hash = NameMapper().make_hash
+        if num_names and self.make_hash(self.name(0).lower()) != hashes[0]:
+            # hashed with another algorithm, the names are hashed here instead
+            logger.debug("Stored name hashes don't match, hashing the names")
+            hashes = [self.make_hash(self.name(idx).lower()) for idx in range(num_names)]
+
+        self.indices: dict[int, int] = {}
+        # case variants of a name share its hash, by that hash
+        self.shared_hashes: dict[int, list[int]] = {}
+        for idx, name_hash in enumerate(hashes):
+            if (first := self.indices.setdefault(name_hash, idx)) != idx:
+                self.shared_hashes.setdefault(name_hash, [first]).append(idx)
+
+    def name(self, idx: int) -> str:
+        start = self.strings_start + self.offsets[idx]
+        end = self.strings_start + self.offsets[idx + 1]
+        return SerializedString(self.data[start:end], bool(self.headers[idx] & 0x8000)).string_view()
+
+    def resolve(self, name_idx: int, number: int) -> str:
+        if number == FName.NO_NUMBER:
+            return self.name(name_idx)
+        return f"{self.name(name_idx)}___{number - 1}"
+
+    def lookup(self, name: str) -> int | None:
+        """Index of the name, which is case sensitive unlike the stored hashes"""
+        name_hash = self.make_hash(name.lower())
+        candidates = self.shared_hashes.get(name_hash)
+        if candidates is None:
+            candidates = [idx] if (idx := self.indices.get(name_hash)) is not None else []
+
+        for idx in candidates:
+            if self.name(idx) == name:
+                return idx
+        return None
+
+
+class PatchNames:
+    """
+    Names of a patch, which resolve to the name of the base if it has one and are appended after the base names otherwise.
+    Reads names in place of the NameMapper of a NameReader.
+    """
+    def __init__(self, base: BaseNames):
+        self.base = base
+        self.appended = NameMapper()
+
+    def fname_from_string(self, name: str) -> FName | None:
+        if name is None:
+            return None
+
+        name, number = self.appended.read_numbered_fname(name)
+        if (idx := self.base.lookup(name)) is None:
+            idx = self.base.num_names + self.appended.fname_from_string(name).name_idx
+        return FName(name_idx=idx, number=number)
+
+    def find_fname(self, name: str) -> tuple[int, int] | None:
+        """(name index, number) of a name of the base, without appending it"""
+        name, number = self.appended.read_numbered_fname(name)
+        if (idx := self.base.lookup(name)) is None:
+            return None
+        return idx, number
+
+
+class AssetRecordNames:
+    """Reads the names at the start of an encoded asset entry"""
+    def __init__(self, data, info: RegistryInfo, file_byte_order=sys.byteorder):
+        self.data = data
+        self.unpack_uint32 = struct.Struct("<I" if file_byte_order == "little" else ">I").unpack_from
+
+        ver = info.version
+        has_old_object_path = ver < RegistryVersions.REMOVE_ASSET_PATH_FNAMES
+        # position of the package name among the names of an entry
+        self.package_name_pos = int(has_old_object_path) + 1 + (2 if ver >= RegistryVersions.CLASS_PATHS else 1)
+        self.has_outer_path = has_outer_path(info)
+        self.num_names = self.package_name_pos + 2 + int(self.has_outer_path)
+
+    def read(self, pos: int) -> list[tuple[int, int]]:
+        unpack = self.unpack_uint32
+        data = self.data
+        names = []
+        for _ in range(self.num_names):
+            name_idx = unpack(data, pos)[0]
+            if name_idx & FName.IS_NUMBERED_BIT:
+                names.append((name_idx & ~FName.IS_NUMBERED_BIT, unpack(data, pos + 4)[0]))
+                pos += 8
+            else:
+                names.append((name_idx, FName.NO_NUMBER))
+                pos += 4
+        return names
+
+    def identity(self, pos: int) -> tuple[tuple[int, int], tuple[int, int]]:
+        """Package name and asset name of the entry"""
+        names = self.read(pos)
+        return names[self.package_name_pos], names[self.package_name_pos + 1]
+
+    def sort_key(self, pos: int, base_names: BaseNames) -> str:
+        """Same key as asset_sort_keys in write_binary_file"""
+        names = self.read(pos)
+        package_name, asset_name = names[self.package_name_pos], names[self.package_name_pos + 1]
+        if self.has_outer_path:
+            outer = base_names.resolve(*names[-1])
+            prefix = outer + (":" if "." in outer else ".")
+        else:
+            prefix = base_names.resolve(*package_name) + "."
+        return prefix + base_names.resolve(*asset_name)
+
+
+REQUIRED_ASSET_FIELDS = ("PackageName", "AssetName", "AssetClass")
+
+
+def with_patch_defaults(asset: dict, info: RegistryInfo) -> dict:
+    """
+    Copy of a patch asset with the fields every entry is encoded with, missing optional fields defaulting
+    the same way RegistryEditor.add_asset does
+    """
+    key = asset_key(asset.get("PackageName"), asset.get("AssetName"))
+    for field_name in REQUIRED_ASSET_FIELDS:
+        if not isinstance(asset.get(field_name), str):
+            raise ValueError(f"Patch asset {key} has no {field_name}")
+
+    for tag, val in asset.get("TagsAndValues", {}).items():
+        if not isinstance(val, str) or (match := TYPED_TAG_VAL_PATTERN.fullmatch(val)) is None \
+                or match.group(1) not in TYPES_BY_MARKER:
+            raise ValueError(f"Tag {tag} of patch asset {key} has an untyped value {val}, e.g. NAME(Value)")
+
+    asset = dict(asset)
+    if asset.get("PackagePath") is None:
+        asset["PackagePath"] = asset["PackageName"].rsplit("/", maxsplit=1)[0]
+    if asset.get("ChunkIds") is None:
+        asset["ChunkIds"] = []
+    if asset.get("PackageFlags") is None:
+        asset["PackageFlags"] = 0
+    if asset.get("OptionalOuterPath") is None and has_outer_path(info):
+        asset["OptionalOuterPath"] = "None"
+    if asset.get("OldObjectPath") is None and info.version < RegistryVersions.REMOVE_ASSET_PATH_FNAMES:
+        asset["OldObjectPath"] = key
+    return asset
+
+
+def patch_sort_key(asset: dict, info: RegistryInfo) -> str:
+    """Key of a patch asset with its defaults, the same as AssetRecordNames.sort_key of its encoded entry"""
+    if has_outer_path(info):
+        outer = asset["OptionalOuterPath"]
+        prefix = outer + (":" if "." in outer else ".")
+    else:
+        prefix = asset["PackageName"] + "."
+    return prefix + asset["AssetName"]
+
+
+def relocate_pairs(pairs: list[tuple[FName, FValueID]], base_sizes: dict[str, int]) -> list[tuple[FName, FValueID]]:
+    return [
+        (name, FValueID(value_type=val_id.value_type,
+                        value_index=val_id.value_index + base_sizes[VALUE_TABLE_SIZES[val_id.value_type]]))
+        for name, val_id in pairs
+    ]
+
+
+def encode_string_offsets(strings: list[str], first_offset: int, char_size: int, pack_uint32) -> bytes:
+    """Offsets of the strings appended at first_offset, counted the same way DataStore.write counts them"""
+    offsets = accumulate(((len(string) + 1) * char_size for string in strings), initial=first_offset)
+    return b"".join(pack_uint32(offset) for offset, _ in zip(offsets, strings))
+
+
+def patch_tag_store(data, base_info: RegistryInfo, base_tables: dict[str, tuple[int, int]], patch_store: DataStore,
+                    file_byte_order=sys.byteorder) -> bytes:
+    """
+    The tag store of the base with the values and pairs of the patch appended to each table.
+    The patch store is encoded on its own and spliced in table by table, only its string offsets are rebased.
+    """
+    base_sizes = base_info.tag_store_sizes
+    pack_uint32 = struct.Struct("<I" if file_byte_order == "little" else ">I").pack
+
+    patch_store.numberless_pairs = relocate_pairs(patch_store.numberless_pairs, base_sizes)
+    patch_store.numbered_pairs = relocate_pairs(patch_store.numbered_pairs, base_sizes)
+
+    with io.BytesIO() as buffer:
+        patch_store.write(BinaryWriter(buffer, file_byte_order), ArchiveType.ASSET_REGISTRY, base_info.text_tags_first)
+        encoded = buffer.getvalue()
+
+    patch_info = RegistryInfo(version=base_info.version, filter_editor_only=base_info.filter_editor_only)
+    patch_tables = {}
+    scan_data_store(RegistryScanner(encoded, file_byte_order), patch_info, patch_tables)
+
+    def table_bytes(table_name: str) -> bytes:
+        base_start, base_end = base_tables[table_name]
+        patch_start, patch_end = patch_tables[table_name]
+        if table_name == "AnsiStringOffsets":
+            appended = encode_string_offsets(patch_store.ansi_strings, base_sizes["AnsiStrings"], 1, pack_uint32)
+        elif table_name == "WideStringOffsets":
+            appended = encode_string_offsets(patch_store.wide_strings, 2 * base_sizes["WideStrings"], 2, pack_uint32)
+        else:
+            appended = encoded[patch_start:patch_end]
+        return data[base_start:base_end] + appended
+
+    tag_store_start = base_info.sections["TagStore"][0]
+    out = [data[tag_store_start:tag_store_start + 4]]  # start marker
+    out += [
+        pack_uint32(base_sizes[array_name] + patch_info.tag_store_sizes[array_name])
+        for array_name in DATA_STORE_ARRAYS
+    ]
+
+    body_tables = list(DATA_STORE_ARRAYS)
+    if base_info.text_tags_first:
+        body_tables.remove("Texts")
+        texts = table_bytes("Texts")
+        out += [pack_uint32(len(texts)), texts]
+
+    out += [table_bytes(table_name) for table_name in body_tables]
+    out.append(pack_uint32(DATASTORE_END))
+    return b"".join(out)
+
+
+def split_asset_key(key: str) -> tuple[str, str]:
+    if "." not in key:
+        raise ValueError(f"Asset key {key} is not of the form PackageName.AssetName")
+    return tuple(key.split(".", maxsplit=1))
+
+
+def apply_registry_patch(data: bytes, patch: dict, file_byte_order=sys.byteorder) -> bytes:
+    """
+    Applies a patch of the form {"Assets": [assets as in editable json], "DeletedAssets": ["PackageName.AssetName"]}
+    to a binary registry. Patch assets replace the base assets with the same package and asset name, or are added.
+
+    The sections of the base are copied as they are, apart from the names and tag values the patch assets append
+    and the entries of the asset section that are deleted, replaced or inserted, so the work done scales with
+    the patch instead of the base. Replaced entries leave their pairs and values behind, which compact drops.
+    """
+    scanner = RegistryScanner(data, file_byte_order)
+    info = scan_header(scanner)
+    if info.version < RegistryVersions.FIXED_TAGS:
+        raise ValueError(f"Can't patch registries older than version {int(RegistryVersions.FIXED_TAGS)}")
+
+    scan_name_batch(scanner, info)
+    if info.name_hash_version != NameMapper.HASH_VERSION:
+        raise ValueError(f"Can't append names to a name batch of hash version {hex(info.name_hash_version)}")
+    tag_tables = {}
+    scan_data_store(scanner, info, tag_tables)
+    records = []
+    scan_assets(scanner, info, records)
+
+    names_start, names_end = info.sections["Names"]
+    base_names = BaseNames(data, names_start, info.num_names, info.num_name_string_bytes, file_byte_order)
+    patch_names = PatchNames(base_names)
+    record_names = AssetRecordNames(data, info, file_byte_order)
+
+    patch_assets = [with_patch_defaults(asset, info) for asset in patch.get("Assets", [])]
+    deleted = set(patch.get("DeletedAssets", []))
+    keys = [asset_key(asset["PackageName"], asset["AssetName"]) for asset in patch_assets]
+    if len(set(keys)) != len(keys):
+        raise ValueError("Patch holds assets with the same package and asset name")
+    if overlap := deleted.intersection(keys):
+        raise ValueError(f"Patch both deletes and replaces {', '.join(sorted(overlap))}")
+
+    # identity of every base asset to drop, as the names of its entry
+    dropped_identities = {}
+    for key in deleted.union(keys):
+        package_name, asset_name = split_asset_key(key)
+        package_fname = patch_names.find_fname(package_name)
+        asset_fname = patch_names.find_fname(asset_name)
+        if package_fname is not None and asset_fname is not None:
+            dropped_identities[(package_fname, asset_fname)] = key
+
+    dropped_rows = set()
+    found_keys = set()
+    if dropped_identities:
+        identity = record_names.identity
+        for row, (record_start, _) in enumerate(records):
+            if (key := dropped_identities.get(identity(record_start))) is not None:
+                dropped_rows.add(row)
+                found_keys.add(key)
+
+    if missing := sorted(deleted - found_keys):
+        raise ValueError(f"Can't delete assets the base doesn't have: {', '.join(missing)}")
+    num_replaced = len(found_keys) - len(deleted)
+    logger.info(f"Deleting {len(deleted)} assets, replacing {num_replaced} and adding {len(keys) - num_replaced}")
+
+    header = AssetRegistryHeader(
+        version=AssetRegVersion(guid=None, version_num=info.version),
+        filter_editor_only=info.filter_editor_only,
+    )
+    assets, patch_store = parse_assets(patch_assets, NameReader(patch_names), header,
+                                       {"TextTagsFirst": info.text_tags_first})
+    for asset in assets:
+        tags = asset.tags
+        table_name = "NumberlessPairs" if tags.has_numberless_keys else "Pairs"
+        asset.tags = TagMapHandle(
+            has_numberless_keys=tags.has_numberless_keys,
+            handle_num=tags.handle_num,
+            pair_begin=tags.pair_begin + info.tag_store_sizes[table_name],
+        )
+
+    # patch assets are inserted after the base entries that sort before or equal to them
+    sort_keys = [patch_sort_key(asset, info) for asset in patch_assets]
+    order = sorted(range(len(assets)), key=sort_keys.__getitem__)
+    record_key = lambda row: record_names.sort_key(records[row][0], base_names)
+    inserted_at: dict[int, list[AssetData]] = {}
+    for idx in order:
+        row = bisect_right(range(len(records)), sort_keys[idx], key=record_key)
+        inserted_at.setdefault(row, []).append(assets[idx])
+
+    encoder = AssetRecordEncoder(BinaryWriter(io.BytesIO(), file_byte_order), header, ArchiveType.ASSET_REGISTRY)
+    pack_uint32 = encoder.uint32.pack
+
+    # runs of kept entries between the rows where an entry is dropped or entries are inserted are copied in one slice
+    assets_start, assets_end = info.sections["Assets"]
+    asset_section = [pack_uint32(len(records) - len(dropped_rows) + len(assets))]
+    run_start = 0
+    for row in sorted(dropped_rows | inserted_at.keys()):
+        if row > run_start:
+            asset_section.append(data[records[run_start][0]:records[row - 1][1]])
+        if row in inserted_at:
+            asset_section.append(encoder.encode_assets(inserted_at[row]))
+        run_start = row + 1 if row in dropped_rows else row
+    if run_start < len(records):
+        asset_section.append(data[records[run_start][0]:records[-1][1]])
+
+    hash_bytes, header_bytes, string_bytes = encode_name_batch(patch_names.appended, file_byte_order)
+    num_hashes_end = names_start + 16 + info.num_names * NAME_BATCH_HASH_SIZE
+    num_headers_end = num_hashes_end + info.num_names * NAME_BATCH_HEADER_SIZE
+    logger.info(f"Appending {len(patch_names.appended.names_by_idx)} names")
+
+    return b"".join([
+        data[:names_start],
+        pack_uint32(info.num_names + len(patch_names.appended.names_by_idx)),
+        pack_uint32(info.num_name_string_bytes + len(string_bytes)),
+        data[names_start + 8:names_start + 16],  # hash version
+        data[names_start + 16:num_hashes_end], hash_bytes,
+        data[num_hashes_end:num_headers_end], header_bytes,
+        data[num_headers_end:names_end], string_bytes,
+        patch_tag_store(data, info, tag_tables, patch_store, file_byte_order),
+        *asset_section,
+        data[assets_end:],
+    ])
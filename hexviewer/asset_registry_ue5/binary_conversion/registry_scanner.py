@@ -0,0 +1,308 @@
+import logging
+import mmap
+import struct
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from hexviewer.asset_registry_ue5.data_store_reader import DATASTORE_START_NEW, DATASTORE_START_OLD, DATASTORE_END
+from hexviewer.asset_registry_ue5.registry_versions import RegistryVersions
+from hexviewer.asset_registry_ue5.unreal_types import FName
+
+logger = logging.getLogger(__name__)
+
+DATA_STORE_ARRAYS = (
+    "NumberlessNames",
+    "Names",
+    "NumberlessExportPaths",
+    "ExportPaths",
+    "Texts",
+    "AnsiStringOffsets",
+    "WideStringOffsets",
+    "AnsiStrings",
+    "WideStrings",
+    "NumberlessPairs",
+    "Pairs",
+)
+
+NAME_BATCH_HASH_SIZE = 8
+NAME_BATCH_HEADER_SIZE = 2
+
+
+class RegistryFormatError(ValueError):
+    def __init__(self, message: str, offset: int):
+        super().__init__(f"{message} (at {hex(offset)})")
+        self.offset = offset
+
+
+class RegistryScanner:
+    """Walks the binary layout of a registry without building any objects, by reading and skipping raw values"""
+    def __init__(self, data: bytes | mmap.mmap, file_byte_order=sys.byteorder):
+        self.data = data
+        self.pos = 0
+        self.byte_size = len(data)
+        self.file_byte_order = file_byte_order
+
+        prefix = "<" if file_byte_order == "little" else ">"
+        self._uint8 = struct.Struct("B").unpack_from
+        self._int32 = struct.Struct(prefix + "i").unpack_from
+        self._uint32 = struct.Struct(prefix + "I").unpack_from
+        self._int64 = struct.Struct(prefix + "q").unpack_from
+        self._uint64 = struct.Struct(prefix + "Q").unpack_from
+
+    def _read(self, unpack, size: int) -> int:
+        if self.pos + size > self.byte_size:
+            raise RegistryFormatError(f"Tried to read {size} bytes past the end of file at {hex(self.byte_size)}", self.pos)
+        val = unpack(self.data, self.pos)[0]
+        self.pos += size
+        return val
+
+    def read_uint8(self) -> int:
+        return self._read(self._uint8, 1)
+
+    def read_int32(self) -> int:
+        return self._read(self._int32, 4)
+
+    def read_uint32(self) -> int:
+        return self._read(self._uint32, 4)
+
+    def read_int64(self) -> int:
+        return self._read(self._int64, 8)
+
+    def read_uint64(self) -> int:
+        return self._read(self._uint64, 8)
+
+    def skip(self, num_bytes: int):
+        if num_bytes < 0 or self.pos + num_bytes > self.byte_size:
+            raise RegistryFormatError(f"Tried to skip {num_bytes} bytes, file ends at {hex(self.byte_size)}", self.pos)
+        self.pos += num_bytes
+
+    def seek(self, pos: int):
+        if not 0 <= pos <= self.byte_size:
+            raise RegistryFormatError(f"Tried to seek to {hex(pos)}, file ends at {hex(self.byte_size)}", self.pos)
+        self.pos = pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def skip_fname(self):
+        if self.read_uint32() & FName.IS_NUMBERED_BIT:
+            self.skip(4)
+
+    def skip_fnames(self, num_names: int):
+        unpack = self._uint32
+        data = self.data
+        pos = self.pos
+        try:
+            for _ in range(num_names):
+                pos += 8 if unpack(data, pos)[0] & FName.IS_NUMBERED_BIT else 4
+        except struct.error:
+            raise RegistryFormatError("FName table runs past the end of file", self.pos)
+        self.seek(pos)
+
+    def skip_key_val_pairs(self, num_pairs: int):
+        unpack = self._uint32
+        data = self.data
+        pos = self.pos
+        try:
+            for _ in range(num_pairs):
+                pos += 12 if unpack(data, pos)[0] & FName.IS_NUMBERED_BIT else 8
+        except struct.error:
+            raise RegistryFormatError("Pair table runs past the end of file", self.pos)
+        self.seek(pos)
+
+    def skip_fstring(self):
+        char_len = self.read_int32()
+        self.skip(-2 * char_len if char_len < 0 else char_len)
+
+    def skip_fstrings(self, num_strings: int):
+        for _ in range(num_strings):
+            self.skip_fstring()
+
+
+@dataclass
+class RegistryInfo:
+    version: int
+    filter_editor_only: bool
+    num_names: int = 0
+    num_name_string_bytes: int = 0
+    name_hash_version: int = 0
+    text_tags_first: bool = False
+    tag_store_sizes: dict[str, int] = field(default_factory=dict)
+    num_assets: int = 0
+    num_dependencies: int | None = None
+    num_packages: int | None = None
+    sections: dict[str, tuple[int, int]] = field(default_factory=dict)
+
+
+def scan_header(scanner: RegistryScanner, info: RegistryInfo | None = None) -> RegistryInfo:
+    start = scanner.tell()
+    scanner.skip(16)  # version guid
+    version = scanner.read_uint32()
+    filter_editor_only = bool(scanner.read_int32()) if version >= RegistryVersions.ADDED_HEADER else False
+
+    if info is None:
+        info = RegistryInfo(version=version, filter_editor_only=filter_editor_only)
+    info.sections["Header"] = (start, scanner.tell())
+    return info
+
+
+def scan_name_batch(scanner: RegistryScanner, info: RegistryInfo):
+    start = scanner.tell()
+    info.num_names = scanner.read_uint32()
+    info.num_name_string_bytes = scanner.read_uint32()
+    info.name_hash_version = scanner.read_uint64()
+
+    scanner.skip(info.num_names * (NAME_BATCH_HASH_SIZE + NAME_BATCH_HEADER_SIZE) + info.num_name_string_bytes)
+    info.sections["Names"] = (start, scanner.tell())
+
+
+def scan_data_store_sizes(scanner: RegistryScanner, info: RegistryInfo):
+    start_marker = scanner.read_uint32()
+    if start_marker not in (DATASTORE_START_NEW, DATASTORE_START_OLD):
+        raise RegistryFormatError("Invalid start marker for tag data store", scanner.tell() - 4)
+
+    info.text_tags_first = start_marker == DATASTORE_START_NEW
+    info.tag_store_sizes = {
+        array_name: scanner.read_uint32()
+        for array_name in DATA_STORE_ARRAYS
+    }
+
+
+def scan_data_store(scanner: RegistryScanner, info: RegistryInfo, tables: dict[str, tuple[int, int]] | None = None):
+    """If given, tables is filled with the start and end offsets of every table body"""
+    start = scanner.tell()
+    scan_data_store_sizes(scanner, info)
+    sizes = info.tag_store_sizes
+
+    if tables is None:
+        tables = {}
+
+    @contextmanager
+    def table(table_name: str):
+        table_start = scanner.tell()
+        yield
+        tables[table_name] = (table_start, scanner.tell())
+
+    if info.text_tags_first:
+        num_text_bytes = scanner.read_uint32()
+        with table("Texts"):
+            scanner.skip(num_text_bytes)
+
+    with table("NumberlessNames"):
+        scanner.skip_fnames(sizes["NumberlessNames"])
+    with table("Names"):
+        scanner.skip_fnames(sizes["Names"])
+    with table("NumberlessExportPaths"):
+        scanner.skip_fnames(4 * sizes["NumberlessExportPaths"])
+    with table("ExportPaths"):
+        scanner.skip_fnames(4 * sizes["ExportPaths"])
+
+    if not info.text_tags_first:
+        with table("Texts"):
+            scanner.skip_fstrings(sizes["Texts"])
+
+    with table("AnsiStringOffsets"):
+        scanner.skip(4 * sizes["AnsiStringOffsets"])
+    with table("WideStringOffsets"):
+        scanner.skip(4 * sizes["WideStringOffsets"])
+    with table("AnsiStrings"):
+        scanner.skip(sizes["AnsiStrings"])
+    with table("WideStrings"):
+        scanner.skip(2 * sizes["WideStrings"])
+    with table("NumberlessPairs"):
+        scanner.skip_key_val_pairs(sizes["NumberlessPairs"])
+    with table("Pairs"):
+        scanner.skip_key_val_pairs(sizes["Pairs"])
+
+    if scanner.read_uint32() != DATASTORE_END:
+        raise RegistryFormatError("Invalid end marker for tag data store", scanner.tell() - 4)
+
+    info.sections["TagStore"] = (start, scanner.tell())
+
+
+def skip_asset(scanner: RegistryScanner, ver: int, filter_editor_only: bool):
+    if ver < RegistryVersions.REMOVE_ASSET_PATH_FNAMES:
+        scanner.skip_fname()  # old object path
+
+    scanner.skip_fname()  # package path
+    scanner.skip_fnames(2 if ver >= RegistryVersions.CLASS_PATHS else 1)  # class
+    scanner.skip_fnames(2)  # package name, asset name
+
+    if ver >= RegistryVersions.REMOVE_ASSET_PATH_FNAMES and not filter_editor_only:
+        scanner.skip_fname()  # optional outer path
+
+    scanner.skip(8)  # tag map handle
+
+    for _ in range(scanner.read_int32()):
+        scanner.skip_fname()  # bundle name
+        for _ in range(scanner.read_int32()):
+            scanner.skip_fnames(2)
+            scanner.skip_fstring()
+
+    scanner.skip(4 * scanner.read_int32())  # chunk ids
+    scanner.skip(4)  # package flags
+
+
+def scan_assets(scanner: RegistryScanner, info: RegistryInfo, records: list[tuple[int, int]] | None = None):
+    """If given, records is filled with the start and end offsets of every asset entry"""
+    start = scanner.tell()
+    info.num_assets = scanner.read_int32()
+
+    for _ in range(info.num_assets):
+        record_start = scanner.tell()
+        skip_asset(scanner, info.version, info.filter_editor_only)
+        if records is not None:
+            records.append((record_start, scanner.tell()))
+
+    info.sections["Assets"] = (start, scanner.tell())
+
+
+def scan_dependencies(scanner: RegistryScanner, info: RegistryInfo):
+    start = scanner.tell()
+    dependency_section_size = scanner.read_int64()
+    loc_section_start = scanner.tell()
+
+    info.num_dependencies = scanner.read_int32()
+    scanner.seek(loc_section_start + dependency_section_size)
+
+    info.sections["Dependencies"] = (start, scanner.tell())
+
+
+def scan_packages(scanner: RegistryScanner, info: RegistryInfo):
+    info.num_packages = scanner.read_int32()
+
+
+def scan_registry_info(scanner: RegistryScanner, skip_assets: bool = False) -> RegistryInfo:
+    """
+    Reads the header and the sizes of every section, skipping section bodies where their size is known up front.
+    Unless skip_assets is set, the asset section is walked to reach the dependency and package counts after it.
+    """
+    info = scan_header(scanner)
+
+    if info.version < RegistryVersions.FIXED_TAGS:
+        raise RegistryFormatError(f"Can't scan registries older than version {int(RegistryVersions.FIXED_TAGS)}", 16)
+
+    scan_name_batch(scanner, info)
+    scan_data_store(scanner, info)
+
+    if skip_assets:
+        info.num_assets = scanner.read_int32()
+        return info
+
+    scan_assets(scanner, info)
+    scan_dependencies(scanner, info)
+    scan_packages(scanner, info)
+
+    return info
+
+
+@contextmanager
+def open_registry_scanner(input_file: Path, file_byte_order=sys.byteorder, scanner_type: type[RegistryScanner] = RegistryScanner):
+    with input_file.open("rb") as reader:
+        if input_file.stat().st_size == 0:
+            raise ValueError(f"{input_file} is empty")
+
+        with mmap.mmap(reader.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield scanner_type(data, file_byte_order)
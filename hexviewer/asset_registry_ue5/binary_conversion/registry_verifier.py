@@ -0,0 +1,352 @@
+import logging
+import struct
+from array import array
+
+from hexviewer.asset_registry_ue5.binary_conversion.read_binary_file import PACKAGE_DEP_FLAG_BITS, NAME_DEP_FLAG_BITS, \
+    MANAGE_DEP_FLAG_BITS, REFERENCER_FLAG_BITS, get_bytes_for_packed_flags
+from hexviewer.asset_registry_ue5.binary_conversion.registry_scanner import RegistryScanner, RegistryFormatError, \
+    RegistryInfo, scan_header, scan_data_store_sizes, NAME_BATCH_HASH_SIZE
+from hexviewer.asset_registry_ue5.name_mapper import NameMapper
+from hexviewer.asset_registry_ue5.registry_versions import RegistryVersions
+from hexviewer.asset_registry_ue5.tag_value_types import ValueTypes
+from hexviewer.asset_registry_ue5.data_store_reader import DATASTORE_END
+from hexviewer.asset_registry_ue5.unreal_types import FName, FNameHeader, FValueID
+
+logger = logging.getLogger(__name__)
+
+VALUE_TABLE_BY_TYPE = {
+    ValueTypes.AnsiString: "AnsiStringOffsets",
+    ValueTypes.WideString: "WideStringOffsets",
+    ValueTypes.NumberlessName: "NumberlessNames",
+    ValueTypes.Name: "Names",
+    ValueTypes.NumberlessExportPath: "NumberlessExportPaths",
+    ValueTypes.ExportPath: "ExportPaths",
+    ValueTypes.LocalizedText: "Texts",
+}
+
+
+class RegistryVerifier(RegistryScanner):
+    """Checks the structure of a registry while scanning it, raising RegistryFormatError at the first inconsistency"""
+    def __init__(self, data, file_byte_order):
+        super().__init__(data, file_byte_order)
+        self.info: RegistryInfo | None = None
+        self.warnings: list[str] = []
+        self.value_table_sizes: list[int] = []
+
+    def fail(self, message: str, offset: int | None = None):
+        raise RegistryFormatError(message, self.pos if offset is None else offset)
+
+    def check_fnames(self, num_names: int):
+        unpack = self._uint32
+        data = self.data
+        pos = self.pos
+        name_count = self.info.num_names
+        try:
+            for _ in range(num_names):
+                name_idx = unpack(data, pos)[0]
+                if name_idx & FName.IS_NUMBERED_BIT:
+                    name_idx ^= FName.IS_NUMBERED_BIT
+                    if pos + 8 > self.byte_size:
+                        self.fail("FName number runs past the end of file", pos)
+                    if name_idx >= name_count:
+                        self.fail(f"FName index {name_idx} out of range for {name_count} names", pos)
+                    pos += 8
+                else:
+                    if name_idx >= name_count:
+                        self.fail(f"FName index {name_idx} out of range for {name_count} names", pos)
+                    pos += 4
+        except struct.error:
+            self.fail("FName runs past the end of file", pos)
+        self.pos = pos
+
+    def check_fname(self):
+        self.check_fnames(1)
+
+    def check_key_val_pairs(self, num_pairs: int):
+        unpack = self._uint32
+        data = self.data
+        pos = self.pos
+        name_count = self.info.num_names
+        table_sizes = self.value_table_sizes
+        type_mask = (1 << FValueID.TYPE_BITS) - 1
+        try:
+            for _ in range(num_pairs):
+                name_idx = unpack(data, pos)[0]
+                if name_idx & FName.IS_NUMBERED_BIT:
+                    name_idx ^= FName.IS_NUMBERED_BIT
+                    loc_value = pos + 8
+                else:
+                    loc_value = pos + 4
+                if name_idx >= name_count:
+                    self.fail(f"FName index {name_idx} out of range for {name_count} names", pos)
+
+                value_id = unpack(data, loc_value)[0]
+                val_type = value_id & type_mask
+                val_index = value_id >> FValueID.TYPE_BITS
+                if val_type >= len(table_sizes):
+                    self.fail(f"Invalid value type {val_type}", loc_value)
+                if val_index >= table_sizes[val_type]:
+                    self.fail(f"Value index {val_index} out of range for {table_sizes[val_type]} values of type {ValueTypes(val_type).name}", loc_value)
+                pos = loc_value + 4
+        except struct.error:
+            self.fail("Pair table runs past the end of file", pos)
+        self.pos = pos
+
+    def check_fstring(self):
+        loc_string = self.pos
+        char_len = self.read_int32()
+        num_bytes = -2 * char_len if char_len < 0 else char_len
+        self.skip(num_bytes)
+        if num_bytes and any(self.data[self.pos - (2 if char_len < 0 else 1):self.pos]):
+            self.fail("String is not null terminated", loc_string)
+
+    def check_fstrings(self, num_strings: int):
+        for _ in range(num_strings):
+            self.check_fstring()
+
+    def check_int32_array(self, max_value: int | None = None) -> int:
+        loc_array = self.pos
+        num_entries = self.read_int32()
+        if num_entries < 0:
+            self.fail(f"Negative array size {num_entries}", loc_array)
+
+        loc_entries = self.pos
+        self.skip(4 * num_entries)
+
+        if max_value is not None and num_entries:
+            entries = array("i", self.data[loc_entries:self.pos])
+            if self.file_byte_order != "little":
+                entries.byteswap()
+            if min(entries) < 0 or max(entries) >= max_value:
+                self.fail(f"Array entries out of range for {max_value} entries", loc_entries)
+
+        return num_entries
+
+
+def verify_header(verifier: RegistryVerifier):
+    info = verifier.info = scan_header(verifier)
+
+    if not RegistryVersions.FIXED_TAGS <= info.version <= RegistryVersions.LATEST_VERSION:
+        verifier.fail(f"Unsupported version {info.version}", 16)
+
+
+def verify_name_batch(verifier: RegistryVerifier):
+    info = verifier.info
+    start = verifier.tell()
+
+    info.num_names = verifier.read_uint32()
+    info.num_name_string_bytes = verifier.read_uint32()
+    info.name_hash_version = verifier.read_uint64()
+
+    if info.name_hash_version != NameMapper.HASH_VERSION:
+        verifier.warnings.append(f"Name hash version is {hex(info.name_hash_version)}, expected {hex(NameMapper.HASH_VERSION)}")
+
+    verifier.skip(info.num_names * NAME_BATCH_HASH_SIZE)
+
+    loc_headers = verifier.tell()
+    verifier.skip(2 * info.num_names)
+    header_bytes = verifier.data[loc_headers:verifier.tell()]
+
+    wide_bit = FNameHeader.WIDE_FLAG_BIT
+    num_string_bytes = 0
+    for i in range(0, len(header_bytes), 2):
+        char_len = ((header_bytes[i] & ~wide_bit) << 8) + header_bytes[i + 1]
+        num_string_bytes += 2 * char_len if header_bytes[i] & wide_bit else char_len
+
+    if num_string_bytes != info.num_name_string_bytes:
+        verifier.fail(f"Name headers cover {num_string_bytes} string bytes, {info.num_name_string_bytes} were specified", loc_headers)
+
+    verifier.skip(info.num_name_string_bytes)
+    info.sections["Names"] = (start, verifier.tell())
+
+
+def verify_data_store(verifier: RegistryVerifier):
+    info = verifier.info
+    start = verifier.tell()
+    scan_data_store_sizes(verifier, info)
+    sizes = info.tag_store_sizes
+
+    verifier.value_table_sizes = [
+        sizes[VALUE_TABLE_BY_TYPE[val_type]]
+        for val_type in ValueTypes
+    ]
+
+    if sizes["AnsiStringOffsets"] > sizes["AnsiStrings"] or sizes["WideStringOffsets"] > sizes["WideStrings"]:
+        verifier.fail("More string offsets than string characters", start)
+
+    if info.text_tags_first:
+        loc_text_size = verifier.tell()
+        num_text_bytes = verifier.read_uint32()
+        loc_texts = verifier.tell()
+        verifier.check_fstrings(sizes["Texts"])
+        if verifier.tell() - loc_texts != num_text_bytes:
+            verifier.fail(f"Texts take up {verifier.tell() - loc_texts} bytes, {num_text_bytes} were specified", loc_text_size)
+
+    verifier.check_fnames(sizes["NumberlessNames"])
+    verifier.check_fnames(sizes["Names"])
+    verifier.check_fnames(4 * sizes["NumberlessExportPaths"])
+    verifier.check_fnames(4 * sizes["ExportPaths"])
+
+    if not info.text_tags_first:
+        verifier.check_fstrings(sizes["Texts"])
+
+    verifier.skip(4 * sizes["AnsiStringOffsets"])
+    verifier.skip(4 * sizes["WideStringOffsets"])
+
+    loc_ansi = verifier.tell()
+    verifier.skip(sizes["AnsiStrings"])
+    if (num_ansi := verifier.data[loc_ansi:verifier.tell()].count(0)) != sizes["AnsiStringOffsets"]:
+        verifier.fail(f"Found {num_ansi} ANSI strings, {sizes['AnsiStringOffsets']} were specified", loc_ansi)
+
+    loc_wide = verifier.tell()
+    verifier.skip(2 * sizes["WideStrings"])
+    if (num_wide := array("H", verifier.data[loc_wide:verifier.tell()]).count(0)) != sizes["WideStringOffsets"]:
+        verifier.fail(f"Found {num_wide} WIDE strings, {sizes['WideStringOffsets']} were specified", loc_wide)
+
+    verifier.check_key_val_pairs(sizes["NumberlessPairs"])
+    verifier.check_key_val_pairs(sizes["Pairs"])
+
+    if verifier.read_uint32() != DATASTORE_END:
+        verifier.fail("Invalid end marker for tag data store", verifier.tell() - 4)
+
+    info.sections["TagStore"] = (start, verifier.tell())
+
+
+def verify_tag_map_handle(verifier: RegistryVerifier):
+    loc_handle = verifier.tell()
+    data = verifier.read_uint64()
+    has_numberless_keys = bool(data >> 63)
+    handle_num = (data >> 32) & 0xFFFF
+    pair_begin = data & 0xFFFFFFFF
+
+    table_size = verifier.info.tag_store_sizes["NumberlessPairs" if has_numberless_keys else "Pairs"]
+    if pair_begin + handle_num > table_size:
+        verifier.fail(f"Tag map handle range {pair_begin}..{pair_begin + handle_num} exceeds {table_size} pairs", loc_handle)
+
+
+def verify_assets(verifier: RegistryVerifier):
+    info = verifier.info
+    ver = info.version
+    start = verifier.tell()
+
+    info.num_assets = verifier.read_int32()
+    if info.num_assets < 0:
+        verifier.fail(f"Negative asset count {info.num_assets}", start)
+
+    num_class_names = 2 if ver >= RegistryVersions.CLASS_PATHS else 1
+    has_outer_path = ver >= RegistryVersions.REMOVE_ASSET_PATH_FNAMES and not info.filter_editor_only
+
+    for _ in range(info.num_assets):
+        if ver < RegistryVersions.REMOVE_ASSET_PATH_FNAMES:
+            verifier.check_fname()
+        verifier.check_fnames(3 + num_class_names + has_outer_path)
+
+        verify_tag_map_handle(verifier)
+
+        loc_bundles = verifier.tell()
+        num_bundles = verifier.read_int32()
+        if num_bundles < 0:
+            verifier.fail(f"Negative bundle count {num_bundles}", loc_bundles)
+        for _ in range(num_bundles):
+            verifier.check_fname()
+            loc_paths = verifier.tell()
+            num_paths = verifier.read_int32()
+            if num_paths < 0:
+                verifier.fail(f"Negative bundle path count {num_paths}", loc_paths)
+            for _ in range(num_paths):
+                verifier.check_fnames(2)
+                verifier.check_fstring()
+
+        verifier.check_int32_array()
+        verifier.skip(4)  # package flags
+
+    info.sections["Assets"] = (start, verifier.tell())
+
+
+def verify_dependencies(verifier: RegistryVerifier):
+    info = verifier.info
+    start = verifier.tell()
+
+    dependency_section_size = verifier.read_int64()
+    loc_section_start = verifier.tell()
+
+    info.num_dependencies = verifier.read_int32()
+    if info.num_dependencies < 0:
+        verifier.fail(f"Negative dependency count {info.num_dependencies}", loc_section_start)
+
+    for _ in range(info.num_dependencies):
+        flags = verifier.read_uint8()
+        verifier.check_fnames(bin(flags & 0b1111).count("1"))
+
+        for bits_per_flag in (PACKAGE_DEP_FLAG_BITS, NAME_DEP_FLAG_BITS, MANAGE_DEP_FLAG_BITS, REFERENCER_FLAG_BITS):
+            num_deps = verifier.check_int32_array(info.num_dependencies)
+            verifier.skip(get_bytes_for_packed_flags(num_deps, bits_per_flag))
+
+    if verifier.tell() - loc_section_start != dependency_section_size:
+        verifier.fail(f"Dependencies take up {verifier.tell() - loc_section_start} bytes, {dependency_section_size} were specified", start)
+
+    info.sections["Dependencies"] = (start, verifier.tell())
+
+
+def verify_packages(verifier: RegistryVerifier):
+    info = verifier.info
+    ver = info.version
+    start = verifier.tell()
+
+    info.num_packages = verifier.read_int32()
+    if info.num_packages < 0:
+        verifier.fail(f"Negative package count {info.num_packages}", start)
+
+    for _ in range(info.num_packages):
+        verifier.check_fname()  # key
+        verifier.skip(8 + 16)  # disk size, guid
+
+        if ver >= RegistryVersions.ADDED_COOKED_MD5_HASH:
+            verifier.skip(16)
+
+        if ver >= RegistryVersions.ADDED_CHUNK_HASHES:
+            loc_map = verifier.tell()
+            num_chunk_hashes = verifier.read_int32()
+            if num_chunk_hashes < 0:
+                verifier.fail(f"Negative chunk hash count {num_chunk_hashes}", loc_map)
+            verifier.skip(num_chunk_hashes * (12 + 20))
+
+        if ver >= RegistryVersions.WORKSPACE_DOMAIN:
+            verifier.skip(4 if ver < RegistryVersions.PACKAGE_FILE_SUMMARY_VERSION_CHANGE else 8)
+            verifier.skip(8)  # licensee version, flags
+
+            loc_versions = verifier.tell()
+            num_custom_versions = verifier.read_int32()
+            if num_custom_versions < 0:
+                verifier.fail(f"Negative custom version count {num_custom_versions}", loc_versions)
+            verifier.skip(num_custom_versions * (16 + 4))
+
+        if ver >= RegistryVersions.PACKAGE_IMPORTED_CLASSES:
+            loc_classes = verifier.tell()
+            num_classes = verifier.read_int32()
+            if num_classes < 0:
+                verifier.fail(f"Negative imported class count {num_classes}", loc_classes)
+            verifier.check_fnames(num_classes)
+
+        if ver >= RegistryVersions.ASSET_PACKAGE_DATA_HAS_EXTENSION:
+            verifier.check_fstring()
+
+    info.sections["Packages"] = (start, verifier.tell())
+
+
+def verify_registry(verifier: RegistryVerifier) -> RegistryInfo:
+    """Walks the whole file, raising RegistryFormatError with the offset of the first structural error"""
+    verify_header(verifier)
+    verify_name_batch(verifier)
+    verify_data_store(verifier)
+    verify_assets(verifier)
+    verify_dependencies(verifier)
+    verify_packages(verifier)
+
+    if verifier.tell() != verifier.byte_size:
+        verifier.fail(f"{verifier.byte_size - verifier.tell()} bytes left after the end of the registry")
+
+    for warning in verifier.warnings:
+        logger.warning(warning)
+
+    return verifier.info
@@ -1,15 +1,23 @@
 import logging
+from itertools import pairwise
 
 from hexviewer.asset_registry_ue5.data_store_reader import DataStore
+from hexviewer.asset_registry_ue5.instrumentation import stage
 from hexviewer.asset_registry_ue5.json_conversion.name_resolver import NameResolver
 from hexviewer.asset_registry_ue5.name_mapper import NameMapper
+from hexviewer.asset_registry_ue5.progress import ProgressCallback, SectionProgress, section_progress, PROGRESS_INTERVAL
 from hexviewer.asset_registry_ue5.reader_type import ArchiveType
 from hexviewer.asset_registry_ue5.readers.binary_writer import BinaryWriter
 from hexviewer.asset_registry_ue5.readers.fname_reader import FNameWriter
 from hexviewer.asset_registry_ue5.registry_versions import RegistryVersions
 from hexviewer.asset_registry_ue5.types.registry import AssetRegistry, AssetRegistryHeader, AssetRegistryState, \
-    AssetData, Bundle, Dependency, PackageData
-from hexviewer.asset_registry_ue5.unreal_types import FNameHeader, SoftObjectPath, TopLevelAssetPath, SerializedString
+    AssetData, Dependency, PackageData
+from hexviewer.asset_registry_ue5.unreal_types import FName, FNameHeader, SoftObjectPath, TopLevelAssetPath, SerializedString
+from hexviewer.asset_registry_ue5.utils import encode_no_bom, paused_gc
+from hexviewer.asset_registry_ue5.binary_conversion.asset_encoder import AssetRecordEncoder
+from hexviewer.asset_registry_ue5.binary_conversion.read_binary_file import get_bytes_for_packed_flags, \
+    PACKAGE_DEP_FLAG_BITS, NAME_DEP_FLAG_BITS, MANAGE_DEP_FLAG_BITS, REFERENCER_FLAG_BITS, COOKED_HASH_SIZE, \
+    CHUNK_ID_SIZE, CHUNK_HASH_SIZE, package_structs
 
 logger = logging.getLogger(__name__)
 
@@ -21,48 +29,42 @@ def write_header_to_binary(header: AssetRegistryHeader, writer: BinaryWriter):
     writer.write_bool(header.filter_editor_only)
 
 
-def write_names_as_name_batch(writer: BinaryWriter, names: NameMapper):
-    logger.debug("Writing names as name batch")
-    num_strings = len(names.names_by_idx)
-    writer.write_uint32(num_strings)
-
-    loc_num_string_bytes = writer.tell()
-    writer.write_uint32(0)  # placeholder for actual byte amount
-
-    writer.write_uint64(names.HASH_VERSION)
-
-    strings = [
-        name.string_view()
+def encode_name_batch(names: NameMapper, file_byte_order: str) -> tuple[bytes, bytes, bytes]:
+    """The hashes, headers and string bytes of the names, each block in index order"""
+    # names read from a file are written as they were read, only names created from text are encoded
+    string_bytes = [
+        name.string_data if name.is_serialized else encode_no_bom(name.string_view(), name.is_wide)
         for name in names.names_by_idx
     ]
 
     hashes = [
-        names.make_hash(name.lower())
-        for name in strings
+        names.make_hash(name.string_view().lower())
+        for name in names.names_by_idx
     ]
 
     headers = [
-        FNameHeader.from_char_len(len(name), name_serialized.is_wide)
-        for name, name_serialized in zip(strings, names.names_by_idx)
+        FNameHeader.from_char_len(len(name_bytes) // (2 if name.is_wide else 1), name.is_wide)
+        for name_bytes, name in zip(string_bytes, names.names_by_idx)
     ]
 
-    for name_hash in hashes:
-        writer.write_uint64(name_hash)
+    return (
+        b"".join(name_hash.to_bytes(8, file_byte_order) for name_hash in hashes),
+        b"".join(name_header.to_bytes() for name_header in headers),
+        b"".join(string_bytes),
+    )
 
-    for name_header in headers:
-        writer.write_bytes(name_header.to_bytes())
 
-    loc_string_bytes_start = writer.tell()
-
-    for serialized_name in names.names_by_idx:
-        writer.write_bytes(serialized_name.string_data)
-
-    loc_string_bytes_end = writer.tell()
+def write_names_as_name_batch(writer: BinaryWriter, names: NameMapper):
+    logger.debug("Writing names as name batch")
+    hash_bytes, header_bytes, string_bytes = encode_name_batch(names, writer.file_byte_order)
 
-    writer.seek(loc_num_string_bytes)
-    writer.write_uint32(loc_string_bytes_end-loc_string_bytes_start)
+    writer.write_uint32(len(names.names_by_idx))
+    writer.write_uint32(len(string_bytes))
+    writer.write_uint64(names.HASH_VERSION)
 
-    writer.seek(loc_string_bytes_end)
+    writer.write_bytes(hash_bytes)
+    writer.write_bytes(header_bytes)
+    writer.write_bytes(string_bytes)
 
 
 def write_tags_as_data_store(writer: BinaryWriter, tag_store: DataStore, reader_type: ArchiveType):
@@ -70,76 +72,78 @@ def write_tags_as_data_store(writer: BinaryWriter, tag_store: DataStore, reader_
     tag_store.write(writer, reader_type)
 
 
-def write_bundles(writer: BinaryWriter, bundles: list[Bundle], name_writer: FNameWriter):
-    writer.write_int32(len(bundles))
+def asset_sort_keys(assets: list[AssetData], name_resolver: NameResolver) -> list[str]:
+    """
+    The lexical path of every asset, which the asset section is sorted by: the outer path, or the package name
+    if there is none, followed by a delimiter and the asset name.
+    Outer paths and package names are resolved once along with their delimiter.
+    """
+    names_by_idx = name_resolver.name_mapper.names_by_idx
+    resolve_fname = name_resolver.resolve_fname
+    outer_prefixes: dict[int, str] = {}
+    package_prefixes: dict[int, str] = {}
 
-    for bundle in bundles:
-        name_writer.write_fname(bundle.bundle_name)
-        writer.write_int32(len(bundle.asset_paths))
-        for path in bundle.asset_paths:
-            name_writer.write_soft_object_path(path)
+    keys = []
+    for asset in assets:
+        if (outer := asset.optionalOuterPath) is not None:
+            outer_key = outer.number << 32 | outer.name_idx
+            if (prefix := outer_prefixes.get(outer_key)) is None:
+                outer_str = resolve_fname(outer)
+                # objects within an asset are delimited with ":"
+                prefix = outer_prefixes[outer_key] = outer_str + (":" if "." in outer_str else ".")
+        else:
+            package = asset.packageName
+            package_key = package.number << 32 | package.name_idx
+            if (prefix := package_prefixes.get(package_key)) is None:
+                prefix = package_prefixes[package_key] = resolve_fname(package) + "."
+
+        # asset names are mostly unique, the unnumbered ones are read straight from the name table
+        name = asset.assetName
+        if name.number == FName.NO_NUMBER:
+            keys.append(prefix + names_by_idx[name.name_idx].string_view())
+        else:
+            keys.append(prefix + resolve_fname(name))
 
+    return keys
 
 
-def write_assets(writer: BinaryWriter, assets: list[AssetData], name_resolver: NameResolver, header: AssetRegistryHeader, reader_type: ArchiveType):
+def write_assets(writer: BinaryWriter, assets: list[AssetData], name_resolver: NameResolver, header: AssetRegistryHeader, reader_type: ArchiveType,
+                 progress: SectionProgress | None = None):
     logger.debug("Writing asset section")
-    ver = header.version.version_num
-    name_writer = FNameWriter(writer, reader_type)
-
-    def lexical_path(asset: AssetData):
-
-        asset_name = name_resolver.resolve_fname(asset.assetName)
-
-        if asset.optionalOuterPath is not None:
-            delim = "."
-            outer_str = name_resolver.resolve_fname(asset.optionalOuterPath)
-
-            if outer_str.rfind(delim) >= 0:
-                delim = ":"
-
-            return outer_str + delim + asset_name
-
-        else:
-            package_name = name_resolver.resolve_fname(asset.packageName)
-            return package_name + "." + asset_name
-
+    encoder = AssetRecordEncoder(writer, header, reader_type)
 
+    keys = asset_sort_keys(assets, name_resolver)
 
-    assets = sorted(assets, key=lambda x: lexical_path(x))
+    # assets read from a binary file are already in order
+    if any(previous > key for previous, key in pairwise(keys)):
+        order = sorted(range(len(assets)), key=keys.__getitem__)
+        assets = [assets[idx] for idx in order]
+    else:
+        logger.debug("Assets are already sorted")
 
     num_cached = len(assets)
     writer.write_uint32(num_cached)
 
-    for asset in assets:
-        if ver < RegistryVersions.REMOVE_ASSET_PATH_FNAMES:
-            name_writer.write_fname(asset.oldObjectPath)
-
-        name_writer.write_fname(asset.packagePath)
-
-        if ver >= RegistryVersions.CLASS_PATHS:
-            name_writer.write_top_level_asset_path(asset.assetClass)
-        else:
-            name_writer.write_fname(asset.assetClass)
-
-        name_writer.write_fname(asset.packageName)
-        name_writer.write_fname(asset.assetName)
-
-        if ver >= RegistryVersions.REMOVE_ASSET_PATH_FNAMES and not header.filter_editor_only:
-            name_writer.write_fname(asset.optionalOuterPath)
+    # encoded and written in batches of PROGRESS_INTERVAL assets
+    for batch_start in range(0, num_cached, PROGRESS_INTERVAL):
+        if progress is not None:
+            progress.update(batch_start)
+        writer.write_bytes(encoder.encode_assets(assets[batch_start:batch_start + PROGRESS_INTERVAL]))
 
-        writer.write_tag_map_handle(asset.tags)
 
-        write_bundles(writer, asset.bundles, name_writer)
+def write_dependency_list(writer: BinaryWriter, deps, flags: bytes, bits_per_flag: int):
+    num_flag_bytes = get_bytes_for_packed_flags(bits_per_flag, len(deps))
+    if len(flags) != num_flag_bytes:
+        raise ValueError(f"{len(deps)} dependencies with {bits_per_flag} flag bits need {num_flag_bytes} flag bytes, got {len(flags)}")
 
-        write_array(asset.chunk_ids, writer, writer.write_int32)
+    writer.write_int32(len(deps))
+    writer.write_int32_array(deps)
+    writer.write_bytes(flags)
 
-        writer.write_uint32(asset.package_flags)
 
-    pass
-
-
-def write_dependencies(writer: BinaryWriter, dependencies: list[Dependency]):
+def write_dependencies(writer: BinaryWriter, dependencies: list[Dependency], reader_type: ArchiveType):
     logger.debug("Writing dependency section")
+    name_writer = FNameWriter(writer, reader_type)
 
     loc_dependency_section_bytes = writer.tell()
     writer.write_uint64(0)
@@ -148,7 +152,12 @@ def write_dependencies(writer: BinaryWriter, dependencies: list[Dependency]):
 
     writer.write_int32(len(dependencies))
 
-    # TODO parse actual dependencies
+    for dependency in dependencies:
+        name_writer.write_asset_identifier(dependency.identifier)
+        write_dependency_list(writer, dependency.package_deps, dependency.package_dep_flags, PACKAGE_DEP_FLAG_BITS)
+        write_dependency_list(writer, dependency.name_deps, dependency.name_dep_flags, NAME_DEP_FLAG_BITS)
+        write_dependency_list(writer, dependency.manage_deps, dependency.manage_dep_flags, MANAGE_DEP_FLAG_BITS)
+        write_dependency_list(writer, dependency.referencers, dependency.referencer_flags, REFERENCER_FLAG_BITS)
 
     loc_after_dependency_section = writer.tell()
 
@@ -159,35 +168,83 @@ def write_dependencies(writer: BinaryWriter, dependencies: list[Dependency]):
     pass
 
 
-def write_package_data(writer: BinaryWriter, packages: list[PackageData]):
+def write_package_data(writer: BinaryWriter, packages: list[PackageData], header: AssetRegistryHeader, reader_type: ArchiveType):
     logger.debug("Writing package data")
+    ver = header.version.version_num
+    name_writer = FNameWriter(writer, reader_type)
+    package_head, version_fields, custom_version = package_structs(ver, writer.file_byte_order)
+
     writer.write_int32(len(packages))
-    # TODO package_data_to_binary
-    pass
 
+    for package in packages:
+        name_writer.write_fname(package.key)
+        writer.write_bytes(package_head.pack(package.size_on_disk, *package.guid))
+
+        if ver >= RegistryVersions.ADDED_COOKED_MD5_HASH:
+            if len(package.cooked_hash) != COOKED_HASH_SIZE:
+                raise ValueError(f"Cooked hash has {len(package.cooked_hash)} bytes, expected {COOKED_HASH_SIZE}")
+            writer.write_bytes(package.cooked_hash)
+
+        if ver >= RegistryVersions.ADDED_CHUNK_HASHES:
+            write_map(package.chunk_hashes, writer, CHUNK_ID_SIZE, CHUNK_HASH_SIZE)
+
+        if ver >= RegistryVersions.WORKSPACE_DOMAIN:
+            if ver >= RegistryVersions.PACKAGE_FILE_SUMMARY_VERSION_CHANGE:
+                versions = (package.ue4_ver, package.ue5_ver, package.version_licensee, package.flags)
+            else:
+                versions = (package.ue4_ver, package.version_licensee, package.flags)
+            writer.write_bytes(version_fields.pack(*versions))
+
+            writer.write_int32(len(package.custom_versions))
+            writer.write_bytes(b"".join(
+                custom_version.pack(*guid, number)
+                for guid, number in package.custom_versions
+            ))
 
-def write_as_registry_archive(state: AssetRegistryState, writer: BinaryWriter, header: AssetRegistryHeader):
+        if ver >= RegistryVersions.PACKAGE_IMPORTED_CLASSES:
+            write_array(package.imported_classes, writer, name_writer.write_fname)
+
+        if ver >= RegistryVersions.ASSET_PACKAGE_DATA_HAS_EXTENSION:
+            writer.write_fstring(package.extension_path)
+
+
+def write_as_registry_archive(state: AssetRegistryState, writer: BinaryWriter, header: AssetRegistryHeader,
+                              progress: ProgressCallback | None = None):
     logger.debug("Writing state as registry archive")
-    write_names_as_name_batch(writer, state.names)
-    write_tags_as_data_store(writer, state.tag_store, ArchiveType.ASSET_REGISTRY)
-    write_assets(writer, state.assets, NameResolver(state.names), header, ArchiveType.ASSET_REGISTRY)
-    write_dependencies(writer, state.dependencies)
-    write_package_data(writer, state.packages)
+
+    def write_section(section_name: str, section_writer, *args, num_items: int | None = None):
+        """Sections with num_items are passed their SectionProgress and report it per entry"""
+        tracker = section_progress(progress, "WriteBinary", section_name, num_items, position=writer.tell)
+        if num_items is not None:
+            section_writer(*args, tracker)
+        else:
+            section_writer(*args)
+        if tracker is not None:
+            tracker.finish()
+
+    write_section("Names", write_names_as_name_batch, writer, state.names)
+    write_section("TagStore", write_tags_as_data_store, writer, state.tag_store, ArchiveType.ASSET_REGISTRY)
+    write_section("Assets", write_assets, writer, state.assets, NameResolver(state.names), header, ArchiveType.ASSET_REGISTRY,
+                  num_items=len(state.assets))
+    write_section("Dependencies", write_dependencies, writer, state.dependencies, ArchiveType.ASSET_REGISTRY)
+    write_section("Packages", write_package_data, writer, state.packages, header, ArchiveType.ASSET_REGISTRY)
 
 
-def write_state_to_binary(state: AssetRegistryState, writer: BinaryWriter, header: AssetRegistryHeader):
+def write_state_to_binary(state: AssetRegistryState, writer: BinaryWriter, header: AssetRegistryHeader,
+                          progress: ProgressCallback | None = None):
     ver_num = header.version.version_num
     if ver_num < RegistryVersions.FIXED_TAGS:
         #return write_state_as_table_archive(state, writer, header)
         pass
     else:
-        return write_as_registry_archive(state, writer, header)
+        return write_as_registry_archive(state, writer, header, progress)
 
 
-def asset_registry_to_binary_file(registry: AssetRegistry, writer: BinaryWriter):
+def asset_registry_to_binary_file(registry: AssetRegistry, writer: BinaryWriter, progress: ProgressCallback | None = None):
     logger.info("Writing registry object into binary file")
-    write_header_to_binary(registry.header, writer)
-    write_state_to_binary(registry.state, writer, registry.header)
+    with stage("WriteBinary"), paused_gc():
+        write_header_to_binary(registry.header, writer)
+        write_state_to_binary(registry.state, writer, registry.header, progress)
 
     logger.info(f"Wrote file of {writer.tell()} bytes")
 
@@ -198,9 +255,11 @@ def write_array(entries: list, writer: BinaryWriter, element_writer):
         element_writer(val)
 
 
-def write_map(pairs: list[tuple], writer: BinaryWriter, key_writer, element_writer):
-    def pair_write(x: tuple):
-        key_writer(tuple[0])
-        element_writer(tuple[1])
+def write_map(pairs: list[tuple[bytes, bytes]], writer: BinaryWriter, key_size: int, element_size: int):
+    """Map of fixed size keys and values, written as one block"""
+    for key, element in pairs:
+        if len(key) != key_size or len(element) != element_size:
+            raise ValueError(f"Map entry of {len(key)} and {len(element)} bytes, expected {key_size} and {element_size}")
 
-    write_array(pairs, writer,  pair_write)
\ No newline at end of file
+    writer.write_int32(len(pairs))
+    writer.write_bytes(b"".join(key + element for key, element in pairs))
\ No newline at end of file
@@ -0,0 +1,35 @@
+from array import array
+
+from hexviewer.asset_registry_ue5.types.registry import AssetData
+
+
+class ChunkIndex:
+    """Maps chunk ids to the sorted rows of the assets assigned to them"""
+    def __init__(self, rows_by_chunk: dict[int, array]):
+        self.rows_by_chunk = rows_by_chunk
+
+    @classmethod
+    def from_assets(cls, assets: list[AssetData]):
+        rows_by_chunk: dict[int, array] = {}
+
+        # rows are visited in ascending order, so every row array ends up sorted
+        for row, asset in enumerate(assets):
+            for chunk_id in asset.chunk_ids:
+                if (rows := rows_by_chunk.get(chunk_id)) is None:
+                    rows = rows_by_chunk[chunk_id] = array("I")
+                if not rows or rows[-1] != row:
+                    rows.append(row)
+
+        return cls(rows_by_chunk)
+
+    def chunk_ids(self) -> list[int]:
+        return sorted(self.rows_by_chunk)
+
+    def rows(self, chunk_id: int) -> array:
+        return self.rows_by_chunk.get(chunk_id, array("I"))
+
+    def __len__(self):
+        return len(self.rows_by_chunk)
+
+    def __contains__(self, chunk_id: int):
+        return chunk_id in self.rows_by_chunk
@@ -8,6 +8,7 @@ from hexviewer.asset_registry_ue5.readers.binary_reader import BinaryReader
 from hexviewer.asset_registry_ue5.readers.fname_reader import FNameReader, FNameWriter
 from hexviewer.asset_registry_ue5.tag_value_types import ValueTypes
 from hexviewer.asset_registry_ue5.unreal_types import FName, TagMapHandle, FValueID, SerializedString, ExportPath
+from hexviewer.asset_registry_ue5.instrumentation import checks_enabled
 from hexviewer.asset_registry_ue5.utils import encode_no_bom
 
 logger = logging.getLogger(__name__)
@@ -146,8 +147,11 @@ class DataStore:
         logger.debug(f"Reading WIDE texts at {hex(reader.tell())}")
         self.wide_strings = reader.read_bytes(2 * array_sizes.get("WideStrings", 0)).decode(encoding="utf-16").split("\x00")[:-1]
 
-        logger.debug(len(self.ansi_strings))
-        logger.debug(len(self.wide_strings))
+        if checks_enabled():
+            if len(self.ansi_strings) != len(string_offsets):
+                raise ValueError(f"Read {len(self.ansi_strings)} ANSI strings but {len(string_offsets)} offsets")
+            if len(self.wide_strings) != len(wide_string_offsets):
+                raise ValueError(f"Read {len(self.wide_strings)} WIDE strings but {len(wide_string_offsets)} offsets")
 
         self.numberless_pairs = self.load_table(array_sizes.get("NumberlessPairs", 0), fname_reader.read_key_val_pair)
         self.numbered_pairs = self.load_table(array_sizes.get("Pairs", 0), fname_reader.read_key_val_pair)
@@ -162,10 +166,11 @@ class DataStore:
 
         #self.set_up_hashes()
 
-        logger.debug({
-            val_type: len(self.get_table_by_type(val_type))
-            for val_type in ValueTypes
-        })
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug({
+                val_type: len(self.get_table_by_type(val_type))
+                for val_type in ValueTypes
+            })
 
         logger.debug("Finished setting up tag store")
 
@@ -355,6 +360,13 @@ class DataStore:
             pair_begin=new_idx,
         )
 
+    def index_values(self, value_type: ValueTypes):
+        """Hashes the values of one table for insert_value, keeping the first of duplicate values"""
+        hasher = value_hashers.get(value_type)
+        hash_table = self.get_hash_table_by_type(value_type)
+        for idx, val in enumerate(self.get_table_by_type(value_type)):
+            hash_table.setdefault(hasher(val), idx)
+
     def set_up_hashes(self):
         logger.debug("Setting up hashes")
         for val_type in ValueTypes:
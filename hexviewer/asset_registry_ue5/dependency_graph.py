@@ -0,0 +1,182 @@
+import logging
+import sys
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass
+from itertools import compress
+
+from hexviewer.asset_registry_ue5.binary_conversion.read_binary_file import PACKAGE_DEP_FLAG_BITS, NAME_DEP_FLAG_BITS, \
+    MANAGE_DEP_FLAG_BITS, REFERENCER_FLAG_BITS
+from hexviewer.asset_registry_ue5.types.registry import Dependency
+from hexviewer.asset_registry_ue5.unreal_types import AssetIdentifier
+
+logger = logging.getLogger(__name__)
+
+# edge kind: (Dependency attribute holding the targets, attribute holding the packed flags, bits per flag set)
+EDGE_KINDS = {
+    "Package": ("package_deps", "package_dep_flags", PACKAGE_DEP_FLAG_BITS),
+    "Name": ("name_deps", "name_dep_flags", NAME_DEP_FLAG_BITS),
+    "Manage": ("manage_deps", "manage_dep_flags", MANAGE_DEP_FLAG_BITS),
+    "Referencer": ("referencers", "referencer_flags", REFERENCER_FLAG_BITS),
+}
+
+
+def unpack_flags(flag_bytes: bytes, num_flags: int, flag_bits: int, file_byte_order=sys.byteorder) -> list[int]:
+    """Flag sets are packed into uint32 words, lowest bits first, the flag set of edge i starting at bit i * flag_bits"""
+    words = array("I", flag_bytes)
+    if file_byte_order != sys.byteorder:
+        words.byteswap()
+    if sys.byteorder != "little":
+        words.byteswap()
+
+    packed = int.from_bytes(words.tobytes(), "little")
+    mask = (1 << flag_bits) - 1
+    return [(packed >> (idx * flag_bits)) & mask for idx in range(num_flags)]
+
+
+@dataclass
+class EdgeTable:
+    """
+    Compressed sparse rows: the targets of node i are targets[offsets[i]:offsets[i + 1]],
+    and flags holds the flag set of each edge at the same position, if the edge kind has flags.
+    """
+    offsets: array
+    targets: array
+    flags: array | None
+
+    def targets_of(self, node: int) -> array:
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def flags_of(self, node: int) -> array | None:
+        if self.flags is None:
+            return None
+        return self.flags[self.offsets[node]:self.offsets[node + 1]]
+
+    def transpose(self) -> "EdgeTable":
+        num_nodes = len(self.offsets) - 1
+
+        offsets = array("I", bytes(4 * (num_nodes + 1)))
+        for target in self.targets:
+            offsets[target + 1] += 1
+        for node in range(num_nodes):
+            offsets[node + 1] += offsets[node]
+
+        targets = array("i", bytes(4 * len(self.targets)))
+        flags = array("B", bytes(len(self.targets))) if self.flags is not None else None
+        insert_at = array("I", offsets[:-1])
+
+        for source in range(num_nodes):
+            for edge in range(self.offsets[source], self.offsets[source + 1]):
+                target = self.targets[edge]
+                targets[insert_at[target]] = source
+                if flags is not None:
+                    flags[insert_at[target]] = self.flags[edge]
+                insert_at[target] += 1
+
+        return EdgeTable(offsets, targets, flags)
+
+
+class DependencyGraph:
+    """
+    The dependency section as one EdgeTable per edge kind, indexed by node, i.e. the position of the
+    dependency in the section. Every edge kind can be followed forwards or, through its transpose, backwards.
+    """
+    def __init__(self, identifiers: list[AssetIdentifier], edges: dict[str, EdgeTable]):
+        self.identifiers = identifiers
+        self.edges = edges
+        self._reverse_edges: dict[str, EdgeTable] = {}
+
+    @classmethod
+    def from_dependencies(cls, dependencies: list[Dependency], file_byte_order=sys.byteorder):
+        num_nodes = len(dependencies)
+        edges = {}
+
+        for kind, (targets_attr, flags_attr, flag_bits) in EDGE_KINDS.items():
+            offsets = array("I", [0])
+            targets = array("i")
+            flags = array("B") if flag_bits else None
+
+            for dependency in dependencies:
+                node_targets = getattr(dependency, targets_attr)
+                targets.extend(node_targets)
+                offsets.append(len(targets))
+                if flags is not None:
+                    flags.extend(unpack_flags(getattr(dependency, flags_attr), len(node_targets), flag_bits, file_byte_order))
+
+            if targets and not 0 <= min(targets) <= max(targets) < num_nodes:
+                raise ValueError(f"{kind} dependencies reference nodes outside of the {num_nodes} dependency nodes")
+
+            edges[kind] = EdgeTable(offsets, targets, flags)
+
+        logger.debug(f"Dependency graph of {num_nodes} nodes, edges per kind: "
+                     f"{ {kind: len(table.targets) for kind, table in edges.items()} }")
+
+        return cls([dependency.identifier for dependency in dependencies], edges)
+
+    def __len__(self):
+        return len(self.identifiers)
+
+    def edge_table(self, kind: str, reverse: bool = False) -> EdgeTable:
+        if kind not in self.edges:
+            raise ValueError(f"Unknown edge kind {kind}, expected one of {', '.join(self.edges)}")
+        if not reverse:
+            return self.edges[kind]
+
+        if (table := self._reverse_edges.get(kind)) is None:
+            table = self._reverse_edges[kind] = self.edges[kind].transpose()
+        return table
+
+    def levels(self, start_nodes: list[int], kind: str = "Package", reverse: bool = False, max_depth: int | None = None,
+               flag_mask: int | None = None) -> Iterator[set[int]]:
+        """
+        Breadth first search yielding the set of newly reached nodes per depth, starting with start_nodes at depth 0.
+        With flag_mask, only edges whose flag set shares a bit with the mask are followed.
+        """
+        table = self.edge_table(kind, reverse)
+        offsets = table.offsets
+        targets = table.targets
+
+        followed = None
+        if flag_mask is not None:
+            if table.flags is None:
+                raise ValueError(f"{kind} dependencies have no flags to filter by")
+            # one byte per edge, nonzero where the edge is followed
+            followed = table.flags.tobytes().translate(bytes(bool(flags & flag_mask) for flags in range(256)))
+
+        visited = set(start_nodes)
+        frontier = set(visited)
+        yield frontier
+        depth = 0
+
+        # each level is gathered with set operations, so the per node work in python is one slice
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            reached = set()
+            for node in frontier:
+                begin = offsets[node]
+                end = offsets[node + 1]
+                if followed is None:
+                    reached.update(targets[begin:end])
+                else:
+                    reached.update(compress(targets[begin:end], followed[begin:end]))
+
+            frontier = reached - visited
+            if frontier:
+                visited |= frontier
+                yield frontier
+
+    def bfs(self, start_nodes: list[int], kind: str = "Package", reverse: bool = False, max_depth: int | None = None,
+            flag_mask: int | None = None) -> dict[int, int]:
+        """Depth of every node reachable from start_nodes, ordered by depth and node"""
+        depths = {}
+        for depth, level in enumerate(self.levels(start_nodes, kind, reverse, max_depth, flag_mask)):
+            depths.update(dict.fromkeys(sorted(level), depth))
+        return depths
+
+    def closure(self, start_nodes: list[int], kind: str = "Package", flag_mask: int | None = None) -> array:
+        """Sorted nodes reachable from start_nodes, including start_nodes"""
+        return array("i", sorted(set().union(*self.levels(start_nodes, kind, flag_mask=flag_mask))))
+
+    def reverse_closure(self, start_nodes: list[int], kind: str = "Package", flag_mask: int | None = None) -> array:
+        """Sorted nodes from which start_nodes can be reached, including start_nodes"""
+        return array("i", sorted(set().union(*self.levels(start_nodes, kind, reverse=True, flag_mask=flag_mask))))
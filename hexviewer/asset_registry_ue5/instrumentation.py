@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# returned by stage() while profiling is disabled, so instrumented code only pays for one global lookup and call
+NULL_STAGE = nullcontext()
+
+
+@dataclass
+class StageRecord:
+    name: str
+    depth: int
+    start: float  # seconds since the profiler was created
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_bytes: int | None = None  # peak traced memory above the memory in use when the stage started
+
+
+@dataclass
+class _OpenStage:
+    record: StageRecord
+    start_memory: int
+    max_peak: int = 0
+
+
+@dataclass
+class Profiler:
+    """
+    Records wall time, process CPU time and the tracemalloc peak of every stage.
+    Stages may nest; the peak of an outer stage includes the peaks of the stages within it.
+    """
+    track_memory: bool = True
+    records: list[StageRecord] = field(default_factory=list)
+    origin: float = field(default_factory=time.perf_counter)
+    _open: list[_OpenStage] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str):
+        record = StageRecord(name=name, depth=len(self._open), start=time.perf_counter() - self.origin)
+        self.records.append(record)
+
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._open:
+                self._open[-1].max_peak = max(self._open[-1].max_peak, peak)
+            tracemalloc.reset_peak()
+            open_stage = _OpenStage(record, current, current)
+        else:
+            open_stage = _OpenStage(record, 0)
+        self._open.append(open_stage)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record.cpu_seconds = time.process_time() - cpu_start
+            record.wall_seconds = time.perf_counter() - wall_start
+            self._open.pop()
+
+            if self.track_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                peak = max(open_stage.max_peak, peak)
+                record.peak_bytes = peak - open_stage.start_memory
+                if self._open:
+                    self._open[-1].max_peak = max(self._open[-1].max_peak, peak)
+
+    def stop(self):
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def summary(self) -> list[dict]:
+        """Totals per stage name and nesting depth, in order of first appearance"""
+        totals: dict[tuple[str, int], dict] = {}
+        for record in self.records:
+            total = totals.setdefault((record.name, record.depth), {
+                "Stage": record.name,
+                "Depth": record.depth,
+                "Calls": 0,
+                "WallSeconds": 0.0,
+                "CPUSeconds": 0.0,
+                "PeakBytes": None,
+            })
+            total["Calls"] += 1
+            total["WallSeconds"] += record.wall_seconds
+            total["CPUSeconds"] += record.cpu_seconds
+            if record.peak_bytes is not None:
+                total["PeakBytes"] = max(total["PeakBytes"] or 0, record.peak_bytes)
+
+        return list(totals.values())
+
+    def format_summary(self) -> str:
+        lines = [f"{'stage':<36}{'calls':>7}{'wall s':>10}{'cpu s':>10}{'peak MiB':>10}"]
+        for total in self.summary():
+            name = "  " * total["Depth"] + total["Stage"]
+            peak = f"{total['PeakBytes'] / 1024 ** 2:.1f}" if total["PeakBytes"] is not None else "-"
+            lines.append(
+                f"{name:<36}{total['Calls']:>7}{total['WallSeconds']:>10.3f}{total['CPUSeconds']:>10.3f}{peak:>10}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """Complete events in the Chrome trace event format, viewable in chrome://tracing or Perfetto"""
+        pid = os.getpid()
+        tid = threading.get_ident()
+        return {
+            "traceEvents": [
+                {
+                    "name": record.name,
+                    "ph": "X",
+                    "ts": round(record.start * 1e6, 3),
+                    "dur": round(record.wall_seconds * 1e6, 3),
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {
+                        "cpu_seconds": record.cpu_seconds,
+                        "peak_bytes": record.peak_bytes,
+                    },
+                }
+                for record in self.records
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def write_chrome_trace(self, output_path: Path):
+        with output_path.open("w") as writer:
+            json.dump(self.chrome_trace(), writer)
+
+
+_profiler: Profiler | None = None
+_checks_enabled = False
+
+
+def enable_profiling(track_memory: bool = True) -> Profiler:
+    global _profiler
+    _profiler = Profiler(track_memory=track_memory)
+    return _profiler
+
+
+def disable_profiling():
+    global _profiler
+    if _profiler is not None:
+        _profiler.stop()
+    _profiler = None
+
+
+def get_profiler() -> Profiler | None:
+    return _profiler
+
+
+def stage(name: str):
+    """Context manager timing the enclosed block as a named stage while profiling is enabled"""
+    if _profiler is None:
+        return NULL_STAGE
+    return _profiler.stage(name)
+
+
+def enable_checks(enabled: bool = True):
+    """Turns on consistency checks that cost a pass over already parsed data, which default runs skip"""
+    global _checks_enabled
+    _checks_enabled = enabled
+
+
+def checks_enabled() -> bool:
+    return _checks_enabled
@@ -1,8 +1,11 @@
 import jmespath
 from pathlib import Path
 
+from hexviewer.asset_registry_ue5.instrumentation import stage
+
 def apply_json_filter(json_registry: dict, filter_file: Path) -> dict:
-    with filter_file.open() as reader:
-        json_filter = jmespath.compile(reader.read())
+    with stage("Filter"):
+        with filter_file.open() as reader:
+            json_filter = jmespath.compile(reader.read())
 
-    return json_filter.search(json_registry)
\ No newline at end of file
+        return json_filter.search(json_registry)
\ No newline at end of file
@@ -3,8 +3,10 @@ from typing import Callable
 import base64
 
 from hexviewer.asset_registry_ue5.data_store_reader import DataStore
+from hexviewer.asset_registry_ue5.instrumentation import stage
 from hexviewer.asset_registry_ue5.json_conversion.name_resolver import NameResolver
 from hexviewer.asset_registry_ue5.json_conversion.tag_value_type_markers import MARKERS_BY_TYPE
+from hexviewer.asset_registry_ue5.progress import ProgressCallback, section_progress, PROGRESS_INTERVAL
 from hexviewer.asset_registry_ue5.registry_versions import RegistryVersions
 from hexviewer.asset_registry_ue5.tag_value_types import ValueTypes
 from hexviewer.asset_registry_ue5.types.registry import AssetData, AssetRegistryState, AssetRegistry, \
@@ -25,7 +27,8 @@ def header_to_json(header):
         "FilterEditorOnly": header.filter_editor_only,
     }
 
-def assets_to_json(assets: list[AssetData], header: AssetRegistryHeader, tag_store: DataStore, name_resolver: NameResolver):
+def assets_to_json(assets: list[AssetData], header: AssetRegistryHeader, tag_store: DataStore, name_resolver: NameResolver,
+                   progress: ProgressCallback | None = None):
     logger.debug("Serializing assets")
     asset_out: list[dict] = []
 
@@ -45,7 +48,12 @@ def assets_to_json(assets: list[AssetData], header: AssetRegistryHeader, tag_sto
         ValueTypes.LocalizedText: SerializedString.string_view,
     }
 
-    for asset in assets:
+    tracker = section_progress(progress, "MakeEditableJson", "Assets", len(assets))
+
+    for asset_idx, asset in enumerate(assets):
+        if tracker is not None and asset_idx % PROGRESS_INTERVAL == 0:
+            tracker.update(asset_idx)
+
         asset_name = name_resolver.resolve_fname(asset.assetName)
 
         if ver >= RegistryVersions.CLASS_PATHS:
@@ -96,6 +104,9 @@ def assets_to_json(assets: list[AssetData], header: AssetRegistryHeader, tag_sto
             "OptionalOuterPath": optional_outer_path,
         })
 
+    if tracker is not None:
+        tracker.finish()
+
     return asset_out
 
 
@@ -105,13 +116,13 @@ def dependencies_to_json(dependencies: list[Dependency], name_resolver: NameReso
     for dependency in dependencies:
         dep_out = {
             "AssetIdentifier": name_resolver.resolve_asset_identifier(dependency.identifier),
-            "PackageDependencies": [hex(node_idx) for node_idx in dependency.package_deps],
+            "PackageDependencies": dependency.package_deps.tolist(),
             "PackageDepFlags": b64string(dependency.package_dep_flags),
-            "NameDependencies": [hex(node_idx) for node_idx in dependency.name_deps],
+            "NameDependencies": dependency.name_deps.tolist(),
             "NameDepFlags": b64string(dependency.name_dep_flags),
-            "ManageDependencies": [hex(node_idx) for node_idx in dependency.manage_deps],
+            "ManageDependencies": dependency.manage_deps.tolist(),
             "ManageDepFlags": b64string(dependency.manage_dep_flags),
-            "Referencers": [hex(node_idx) for node_idx in dependency.referencers],
+            "Referencers": dependency.referencers.tolist(),
             "ReferencerFlags": b64string(dependency.referencer_flags),
         }
         dependencies_out.append(dep_out)
@@ -127,10 +138,10 @@ def packages_to_json(packages: list[PackageData], name_resolver:NameResolver):
             "Key": name_resolver.resolve_fname(package.key),
             "ByteSize": package.size_on_disk,
             "GUID": package.guid,
-            "CookedHash": b64string(package.cooked_hash),
+            "CookedHash": b64string(package.cooked_hash) if package.cooked_hash is not None else None,
             "ChunkHashes": [
                 {"ChunkID": b64string(chunk_id), "ChunkHash": b64string(chunk_hash)}
-                for chunk_id, chunk_hash in package.chunk_hashes
+                for chunk_id, chunk_hash in package.chunk_hashes or []
             ],
             "UE4Version": package.ue4_ver,
             "UE5Version": package.ue5_ver,
@@ -138,20 +149,20 @@ def packages_to_json(packages: list[PackageData], name_resolver:NameResolver):
             "Flags": package.flags,
             "CustomVersions": [
                 {"VersionKey": guid, "VersionNumber": number}
-                for guid, number in package.custom_versions
+                for guid, number in package.custom_versions or []
             ],
             "ImportedClasses": [
                 name_resolver.resolve_fname(name)
-                for name in package.imported_classes
+                for name in package.imported_classes or []
             ],
-            "ExtensionPath": package.extension_path.string_view()
+            "ExtensionPath": package.extension_path.string_view() if package.extension_path is not None else None
         })
 
     return packages_out
 
 
 
-def state_to_json(state: AssetRegistryState, header: AssetRegistryHeader):
+def state_to_json(state: AssetRegistryState, header: AssetRegistryHeader, progress: ProgressCallback | None = None):
     logger.debug("Serializing state")
 
     options = {
@@ -161,7 +172,7 @@ def state_to_json(state: AssetRegistryState, header: AssetRegistryHeader):
     name_resolver = NameResolver(state.names)
     logger.debug(f"{len(state.names.names_by_idx)} known FNames")
 
-    assets_serialized = assets_to_json(state.assets, header, state.tag_store, name_resolver)
+    assets_serialized = assets_to_json(state.assets, header, state.tag_store, name_resolver, progress)
     dependencies_serialized = dependencies_to_json(state.dependencies, name_resolver)
     packages_serialized = packages_to_json(state.packages, name_resolver)
 
@@ -173,11 +184,12 @@ def state_to_json(state: AssetRegistryState, header: AssetRegistryHeader):
     }
 
 
-def make_editable_json(registry: AssetRegistry):
+def make_editable_json(registry: AssetRegistry, progress: ProgressCallback | None = None):
     logger.info("Writing registry object into json file")
-    header_serialized = header_to_json(registry.header)
+    with stage("MakeEditableJson"):
+        header_serialized = header_to_json(registry.header)
 
-    state_serialized = state_to_json(registry.state, registry.header)
+        state_serialized = state_to_json(registry.state, registry.header, progress)
 
     return {
         "Header": header_serialized,
@@ -1,15 +1,19 @@
+import base64
 import logging
 import re
+from array import array
 from collections.abc import Callable
 
 from hexviewer.asset_registry_ue5.data_store_reader import DataStore
+from hexviewer.asset_registry_ue5.instrumentation import stage
 from hexviewer.asset_registry_ue5.json_conversion.name_reader import NameReader
 from hexviewer.asset_registry_ue5.json_conversion.tag_value_type_markers import TYPES_BY_MARKER
 from hexviewer.asset_registry_ue5.name_mapper import NameMapper
+from hexviewer.asset_registry_ue5.progress import ProgressCallback, section_progress, PROGRESS_INTERVAL
 from hexviewer.asset_registry_ue5.registry_versions import RegistryVersions
 from hexviewer.asset_registry_ue5.tag_value_types import ValueTypes
 from hexviewer.asset_registry_ue5.types.registry import AssetRegistry, AssetRegistryHeader, AssetRegVersion, \
-    AssetRegistryState, AssetData, Bundle
+    AssetRegistryState, AssetData, Bundle, Dependency, PackageData
 from hexviewer.asset_registry_ue5.unreal_types import SerializedString
 
 logger = logging.getLogger(__name__)
@@ -34,7 +38,8 @@ def parse_header(header_dict) -> AssetRegistryHeader:
         filter_editor_only=bool(header_dict["FilterEditorOnly"])
     )
 
-def parse_assets(assets: list[dict], name_mapper: NameReader, header: AssetRegistryHeader, options: dict) -> tuple[list[AssetData], DataStore | None]:
+def parse_assets(assets: list[dict], name_mapper: NameReader, header: AssetRegistryHeader, options: dict,
+                 progress: ProgressCallback | None = None) -> tuple[list[AssetData], DataStore | None]:
     logger.info("Loading assets")
     ver = header.version.version_num
 
@@ -55,7 +60,12 @@ def parse_assets(assets: list[dict], name_mapper: NameReader, header: AssetRegis
         ValueTypes.LocalizedText: SerializedString.from_string,
     }
 
-    for asset in assets:
+    tracker = section_progress(progress, "LoadJson", "Assets", len(assets))
+
+    for asset_idx, asset in enumerate(assets):
+        if tracker is not None and asset_idx % PROGRESS_INTERVAL == 0:
+            tracker.update(asset_idx)
+
         package_name = name_mapper.read_fname(asset.get("PackageName"))
         package_path = name_mapper.read_fname(asset.get("PackagePath"))
 
@@ -114,20 +124,81 @@ def parse_assets(assets: list[dict], name_mapper: NameReader, header: AssetRegis
             )
         )
 
+    if tracker is not None:
+        tracker.finish()
+
     logger.info(f"{len(assets_out)} assets loaded")
 
     return assets_out, data_store
 
 
-def parse_state(state_reg: dict, header: AssetRegistryHeader) -> AssetRegistryState:
+def parse_node_indices(entries: list[int | str]) -> array:
+    # older json files list the node indices as hex strings
+    return array("i", [int(entry, 16) if isinstance(entry, str) else entry for entry in entries])
+
+
+def parse_dependencies(dependencies: list[dict], name_mapper: NameReader) -> list[Dependency]:
+    logger.info("Loading dependencies")
+    return [
+        Dependency(
+            identifier=name_mapper.read_asset_identifier(dependency.get("AssetIdentifier")),
+            package_deps=parse_node_indices(dependency.get("PackageDependencies", [])),
+            package_dep_flags=base64.b64decode(dependency.get("PackageDepFlags", "")),
+            name_deps=parse_node_indices(dependency.get("NameDependencies", [])),
+            name_dep_flags=base64.b64decode(dependency.get("NameDepFlags", "")),
+            manage_deps=parse_node_indices(dependency.get("ManageDependencies", [])),
+            manage_dep_flags=base64.b64decode(dependency.get("ManageDepFlags", "")),
+            referencers=parse_node_indices(dependency.get("Referencers", [])),
+            referencer_flags=base64.b64decode(dependency.get("ReferencerFlags", "")),
+        )
+        for dependency in dependencies
+    ]
+
+
+def parse_guid(guid: list[int]) -> tuple[int, int, int, int]:
+    if len(guid) != 4:
+        raise ValueError(f"GUID {guid} does not have 4 parts")
+    return tuple(guid)
+
+
+def parse_packages(packages: list[dict], name_mapper: NameReader) -> list[PackageData]:
+    logger.info("Loading packages")
+    parsed = []
+    for package in packages:
+        cooked_hash = package.get("CookedHash")
+        extension_path = package.get("ExtensionPath")
+        parsed.append(PackageData(
+            key=name_mapper.read_fname(package["Key"]),
+            size_on_disk=package.get("ByteSize", 0),
+            guid=parse_guid(package.get("GUID", [0, 0, 0, 0])),
+            cooked_hash=base64.b64decode(cooked_hash) if cooked_hash is not None else bytes(16),
+            chunk_hashes=[
+                (base64.b64decode(chunk_hash["ChunkID"]), base64.b64decode(chunk_hash["ChunkHash"]))
+                for chunk_hash in package.get("ChunkHashes", [])
+            ],
+            ue4_ver=package.get("UE4Version", 0),
+            ue5_ver=package.get("UE5Version", 0),
+            version_licensee=package.get("VersionLicensee", 0),
+            flags=package.get("Flags", 0),
+            custom_versions=[
+                (parse_guid(custom_version["VersionKey"]), custom_version["VersionNumber"])
+                for custom_version in package.get("CustomVersions", [])
+            ],
+            imported_classes=[name_mapper.read_fname(name) for name in package.get("ImportedClasses", [])],
+            extension_path=SerializedString.from_string(extension_path if extension_path is not None else ""),
+        ))
+    return parsed
+
+
+def parse_state(state_reg: dict, header: AssetRegistryHeader, progress: ProgressCallback | None = None) -> AssetRegistryState:
     logger.info("Loading state")
     options = state_reg.get("Options", {})
 
     names = NameMapper()
     fname_reader = NameReader(names)
-    assets, tag_store = parse_assets(state_reg.get("Assets",  []), fname_reader, header, options)
-    dependencies = [] #TODO
-    packages = [] #TODO
+    assets, tag_store = parse_assets(state_reg.get("Assets",  []), fname_reader, header, options, progress)
+    dependencies = parse_dependencies(state_reg.get("Dependencies", []), fname_reader)
+    packages = parse_packages(state_reg.get("Packages", []), fname_reader)
 
     logger.debug(f"Registered {len(names.names_by_idx)} FNames")
 
@@ -140,10 +211,11 @@ def parse_state(state_reg: dict, header: AssetRegistryHeader) -> AssetRegistrySt
     )
 
 
-def load_registry_from_json(json_reg: dict) -> AssetRegistry:
+def load_registry_from_json(json_reg: dict, progress: ProgressCallback | None = None) -> AssetRegistry:
     logger.info("Parsing asset registry from json")
-    header = parse_header(json_reg.get("Header"))
-    state = parse_state(json_reg.get("State"), header)
+    with stage("LoadJson"):
+        header = parse_header(json_reg.get("Header"))
+        state = parse_state(json_reg.get("State"), header, progress)
     return AssetRegistry(
         header=header,
         state=state
@@ -0,0 +1,97 @@
+import sys
+from collections.abc import Callable, Iterable
+from dataclasses import fields, is_dataclass
+from enum import Enum
+
+from hexviewer.asset_registry_ue5.types.registry import AssetRegistryState
+
+POINTER_SIZE = 8
+
+# component: roots of the component within a loaded state. Components are measured in this order and an object
+# reachable from several components is only counted for the first, so the sizes add up to the retained total.
+MEMORY_COMPONENTS: dict[str, Callable[[AssetRegistryState], Iterable]] = {
+    "NameTable": lambda state: [state.names.names_by_idx],
+    "NameHashes": lambda state: [state.names.names],
+    "Texts": lambda state: [state.tag_store.texts],
+    "AnsiStrings": lambda state: [state.tag_store.ansi_strings],
+    "WideStrings": lambda state: [state.tag_store.wide_strings],
+    "NumberlessNames": lambda state: [state.tag_store.numberless_names],
+    "Names": lambda state: [state.tag_store.names],
+    "NumberlessExportPaths": lambda state: [state.tag_store.numberless_export_paths],
+    "ExportPaths": lambda state: [state.tag_store.export_paths],
+    "NumberlessPairs": lambda state: [state.tag_store.numberless_pairs],
+    "NumberedPairs": lambda state: [state.tag_store.numbered_pairs],
+    "ValueHashes": lambda state: [state.tag_store.hash_tables_by_type],
+    "Bundles": lambda state: (asset.bundles for asset in state.assets),
+    "Assets": lambda state: [state.assets],
+    "Dependencies": lambda state: [state.dependencies],
+    "Packages": lambda state: [state.packages],
+}
+
+
+def deep_sizeof(root, seen: set[int]) -> int:
+    """Size of root and of everything reachable from it that is not in seen yet, adding the visited objects to seen"""
+    total = 0
+    pending = [root]
+    while pending:
+        obj = pending.pop()
+        # classes and enum members are shared by every registry, they do not count towards its size
+        if id(obj) in seen or obj is None or isinstance(obj, (type, Enum)):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+
+        if isinstance(obj, (str, bytes, bytearray, int, float, bool)):
+            continue
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pending.extend(obj)
+        elif is_dataclass(obj):
+            # reading __dict__ would materialize a dict for every instance, so the fields are read one by one
+            # and their storage is counted as one pointer each
+            dataclass_fields = fields(obj)
+            total += POINTER_SIZE * len(dataclass_fields)
+            pending.extend(getattr(obj, field.name) for field in dataclass_fields)
+        else:
+            if hasattr(obj, "__dict__"):
+                pending.append(vars(obj))
+            for slot in getattr(type(obj), "__slots__", ()):
+                pending.append(getattr(obj, slot, None))
+
+    return total
+
+
+def memory_report(state: AssetRegistryState) -> dict:
+    seen: set[int] = set()
+    components = {
+        component: sum(deep_sizeof(root, seen) for root in roots(state))
+        for component, roots in MEMORY_COMPONENTS.items()
+    }
+
+    total_bytes = sum(components.values())
+    num_assets = len(state.assets)
+    num_names = len(state.names.names_by_idx)
+    name_bytes = components["NameTable"] + components["NameHashes"]
+
+    return {
+        "Components": components,
+        "TotalBytes": total_bytes,
+        "Assets": num_assets,
+        "Names": num_names,
+        "BytesPerAsset": round(total_bytes / num_assets, 1) if num_assets else None,
+        "BytesPerName": round(name_bytes / num_names, 1) if num_names else None,
+    }
+
+
+def format_memory_report(report: dict) -> str:
+    total_bytes = report["TotalBytes"]
+    lines = [f"{'component':<28}{'MiB':>10}{'share':>8}"]
+    for component, size in report["Components"].items():
+        share = size / total_bytes if total_bytes else 0
+        lines.append(f"{component:<28}{size / 1024 ** 2:>10.1f}{share:>8.1%}")
+    lines.append(f"{'total':<28}{total_bytes / 1024 ** 2:>10.1f}")
+    lines.append(f"{report['Assets']} assets, {report['BytesPerAsset']} bytes per asset")
+    lines.append(f"{report['Names']} names, {report['BytesPerName']} bytes per name (table and hashes)")
+    return "\n".join(lines)
@@ -0,0 +1,59 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+
+# items between two updates inside the per-asset loops, so reporting costs one modulo per item
+PROGRESS_INTERVAL = 5_000
+
+
+@dataclass
+class ProgressUpdate:
+    operation: str  # e.g. "ReadBinary" or "MakeEditableJson"
+    section: str
+    items_done: int
+    items_total: int | None = None
+    bytes_done: int | None = None  # position in the file being read or written, if there is one
+    bytes_total: int | None = None
+    finished: bool = False  # set on the last update of a section
+
+
+ProgressCallback = Callable[[ProgressUpdate], None]
+
+
+class SectionProgress:
+    """
+    Reports the progress of one section to a callback.
+    position returns the current byte offset, for sections that read or write a file.
+    """
+    def __init__(self, callback: ProgressCallback, operation: str, section: str, items_total: int | None = None,
+                 position: Callable[[], int] | None = None, bytes_total: int | None = None):
+        self.callback = callback
+        self.operation = operation
+        self.section = section
+        self.items_total = items_total
+        self.position = position
+        self.bytes_total = bytes_total
+        self.update(0)
+
+    def update(self, items_done: int, finished: bool = False):
+        self.callback(ProgressUpdate(
+            operation=self.operation,
+            section=self.section,
+            items_done=items_done,
+            items_total=self.items_total,
+            bytes_done=self.position() if self.position is not None else None,
+            bytes_total=self.bytes_total,
+            finished=finished,
+        ))
+
+    def finish(self, items_done: int | None = None):
+        if items_done is None:
+            items_done = self.items_total or 0
+        self.update(items_done, finished=True)
+
+
+def section_progress(callback: ProgressCallback | None, operation: str, section: str, items_total: int | None = None,
+                     position: Callable[[], int] | None = None, bytes_total: int | None = None) -> SectionProgress | None:
+    """None without a callback, so that loops only need an `is not None` test to skip reporting"""
+    if callback is None:
+        return None
+    return SectionProgress(callback, operation, section, items_total, position, bytes_total)
@@ -2,6 +2,7 @@ import io
 import os
 import struct
 import sys
+from array import array
 
 from hexviewer.asset_registry_ue5.bytes import BITMASK_16, BITMASK_32
 from hexviewer.asset_registry_ue5.unreal_types import FGuid, SerializedString, TagMapHandle, FValueID
@@ -58,6 +59,12 @@ class BinaryReader:
     def read_bool(self):
         return bool(self.read_int32())
 
+    def read_int32_array(self, num_entries: int) -> array:
+        entries = array("i", self.stream.read(4 * num_entries))
+        if self.file_byte_order != sys.byteorder:
+            entries.byteswap()
+        return entries
+
     def read_guid(self) -> FGuid:
         guid = (
             self.read_uint32(),
@@ -78,7 +85,7 @@ class BinaryReader:
 
         string_data = self.read_bytes(char_len * (2 if is_wide else 1))
 
-        return SerializedString(string_data, is_wide)
+        return SerializedString(string_data, is_wide, is_serialized=True)
 
     def read_value_id(self):
         data = self.read_uint32()
@@ -101,10 +108,8 @@ class BinaryReader:
         non_case_preserving_hash = self.read_uint16()
         case_preserving_hash = self.read_uint16()
 
-        return SerializedString(
-            string_data,
-            is_wide
-        )
+        # a fixed size buffer padded with nulls, not the form strings are written in
+        return SerializedString(string_data, is_wide)
 
 
 
@@ -1,9 +1,9 @@
 import io
 import struct
 import sys
+from array import array
 
-from hexviewer.asset_registry_ue5.bytes import BITMASK_16, BITMASK_32
-from hexviewer.asset_registry_ue5.unreal_types import FGuid, SerializedString, TagMapHandle, FValueID
+from hexviewer.asset_registry_ue5.unreal_types import FGuid, SerializedString, TagMapHandle, FValueID, pack_tag_map_handle
 from hexviewer.asset_registry_ue5.utils import encode_no_bom
 
 
@@ -54,19 +54,33 @@ class BinaryWriter:
     def write_bool(self, val):
         self.write_int32(bool(val))
 
+    def write_int32_array(self, entries):
+        entries = array("i", entries)
+        if self.file_byte_order != sys.byteorder:
+            entries.byteswap()
+        self.stream.write(entries.tobytes())
+
     def write_guid(self, guid: FGuid):
         for part in guid:
             self.write_uint32(part)
 
-    def write_fstring(self, val: SerializedString):
-        parsed_string = val.string_view() + "\x00"
+    def fstring_bytes(self, val: SerializedString) -> bytes:
+        if val.is_serialized:
+            string_data = val.string_data
+        elif not val.string_data:
+            # an empty FString is serialized as its length only, without a null terminator
+            string_data = b""
+        else:
+            string_data = encode_no_bom(val.string_view() + "\x00", is_wide=val.is_wide)
 
-        num_chars = len(parsed_string)
+        num_chars = len(string_data) // (2 if val.is_wide else 1)
         if val.is_wide:
             num_chars *= -1
 
-        self.write_int32(num_chars)
-        self.write_bytes(encode_no_bom(parsed_string, is_wide=val.is_wide))
+        return num_chars.to_bytes(4, signed=True, byteorder=self.file_byte_order) + string_data
+
+    def write_fstring(self, val: SerializedString):
+        self.stream.write(self.fstring_bytes(val))
 
 
     def write_value_id(self, val: FValueID):
@@ -76,11 +90,7 @@ class BinaryWriter:
         self.write_uint32(val_index | val_type)
 
     def write_tag_map_handle(self, val: TagMapHandle):
-        numberless_flag = bool(val.has_numberless_keys) << 63
-        handle_num = (val.handle_num & BITMASK_16) << 32
-        pair_begin = val.pair_begin & BITMASK_32
-
-        self.write_uint64(numberless_flag | handle_num | pair_begin)
+        self.write_uint64(pack_tag_map_handle(val))
 
     def write_serialized_fname(self, val: SerializedString):
         parsed_string = val.string_view()
@@ -119,3 +119,13 @@ class FNameWriter:
     def write_top_level_asset_path(self, path: TopLevelAssetPath):
         self.write_fname(path.package)
         self.write_fname(path.asset)
+
+    def write_asset_identifier(self, identifier: AssetIdentifier):
+        self.writer.write_uint8(identifier.flags)
+
+        # the flag bits tell which names follow, in the same order as read_asset_identifier expects them
+        for bit, name in enumerate((identifier.packageName, identifier.typeName, identifier.objectName, identifier.valueName)):
+            if identifier.flags & (1 << bit):
+                if name is None:
+                    raise ValueError(f"Asset identifier flags {identifier.flags} require a name for bit {bit}")
+                self.write_fname(name)
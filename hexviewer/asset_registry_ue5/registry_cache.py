@@ -0,0 +1,126 @@
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from hexviewer.asset_registry_ue5.instrumentation import stage
+from hexviewer.asset_registry_ue5.utils import tool_version
+
+# the snapshot code pulls in the whole registry model, it is only imported once the cache is used
+# so that configuring the cache at cli startup stays cheap
+if TYPE_CHECKING:
+    from hexviewer.asset_registry_ue5.types.registry import AssetRegistry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 2 * 1024 ** 3
+CACHE_ENTRY_SUFFIX = ".snapshot"
+
+
+class RegistryCache:
+    """
+    On-disk cache of parsed registries, keyed by file content, byte order, tool version and snapshot format.
+    Entries are replaced atomically, unreadable entries are dropped, and the least recently used entries
+    are evicted once the cache grows beyond max_bytes.
+    """
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def cache_key(self, content_hash: str, file_byte_order: str) -> str:
+        from hexviewer.asset_registry_ue5.registry_snapshot import SNAPSHOT_FORMAT_VERSION
+
+        key_data = f"{content_hash}-{file_byte_order}-{tool_version()}-{SNAPSHOT_FORMAT_VERSION}-{sys.version_info[:2]}"
+        return hashlib.blake2b(key_data.encode("utf-8"), digest_size=20).hexdigest()
+
+    def entry_path(self, cache_key: str) -> Path:
+        return self.cache_dir / (cache_key + CACHE_ENTRY_SUFFIX)
+
+    def load(self, cache_key: str, sections: dict[str, tuple[int, int]] | None = None) -> "AssetRegistry | None":
+        from hexviewer.asset_registry_ue5.registry_snapshot import registry_from_snapshot
+
+        entry = self.entry_path(cache_key)
+
+        try:
+            with stage("CacheLoad"):
+                with entry.open("rb") as reader:
+                    stored_key, snapshot = pickle.load(reader)
+                if stored_key != cache_key:
+                    raise ValueError(f"Entry holds key {stored_key}")
+                registry = registry_from_snapshot(snapshot, sections)
+        except FileNotFoundError:
+            logger.debug(f"Cache miss for {cache_key}")
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry {entry.name}: {e}")
+            entry.unlink(missing_ok=True)
+            return None
+
+        os.utime(entry)  # mark as recently used
+        logger.info(f"Loaded registry from cache entry {entry.name}")
+        return registry
+
+    def store(self, cache_key: str, registry: "AssetRegistry", sections: dict[str, tuple[int, int]] | None = None):
+        from hexviewer.asset_registry_ue5.registry_snapshot import registry_to_snapshot
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = self.entry_path(cache_key)
+
+        with stage("CacheStore"):
+            snapshot = registry_to_snapshot(registry, sections)
+
+            with tempfile.NamedTemporaryFile("wb", dir=self.cache_dir, suffix=".tmp", delete=False) as writer:
+                try:
+                    pickle.dump((cache_key, snapshot), writer, protocol=pickle.HIGHEST_PROTOCOL)
+                except BaseException:
+                    writer.close()
+                    os.unlink(writer.name)
+                    raise
+
+        os.replace(writer.name, entry)
+        logger.info(f"Stored registry in cache entry {entry.name}")
+
+        self.evict()
+
+    def entries(self) -> list[Path]:
+        if not self.cache_dir.is_dir():
+            return []
+        return list(self.cache_dir.glob("*" + CACHE_ENTRY_SUFFIX))
+
+    def evict(self):
+        entries = []
+        for entry in self.entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        total_size = sum(size for _, size, _ in entries)
+
+        for _, size, entry in sorted(entries, key=lambda x: x[0]):
+            if total_size <= self.max_bytes:
+                break
+            logger.debug(f"Evicting cache entry {entry.name}")
+            entry.unlink(missing_ok=True)
+            total_size -= size
+
+    def clear(self):
+        for entry in self.entries():
+            entry.unlink(missing_ok=True)
+
+
+_default_cache: RegistryCache | None = None
+
+
+def configure_cache(cache_dir: Path | None, max_bytes: int = DEFAULT_CACHE_SIZE):
+    global _default_cache
+    _default_cache = RegistryCache(cache_dir, max_bytes) if cache_dir is not None else None
+
+
+def get_cache() -> RegistryCache | None:
+    return _default_cache
@@ -0,0 +1,199 @@
+import logging
+from dataclasses import dataclass, field
+
+from cityhash import CityHash64
+
+from hexviewer.asset_registry_ue5.json_conversion.make_editable_json import assets_to_json
+from hexviewer.asset_registry_ue5.json_conversion.name_resolver import NameResolver
+from hexviewer.asset_registry_ue5.json_conversion.tag_value_type_markers import MARKERS_BY_TYPE
+from hexviewer.asset_registry_ue5.tag_value_types import ValueTypes
+from hexviewer.asset_registry_ue5.types.registry import AssetData, AssetRegistry
+from hexviewer.asset_registry_ue5.unreal_types import FName, ExportPath, SerializedString
+
+logger = logging.getLogger(__name__)
+
+# json fields of an asset that aren't part of its content
+IDENTITY_FIELDS = ("PackageName", "AssetName", "HasNumberlessTags", "TagsAndValues")
+FIELD_SEPARATOR = "\x1f"
+
+
+class AssetFingerprinter:
+    """
+    Resolves the assets of one registry to their key, "PackageName.AssetName", and a hash of their content:
+    class, package path, outer path, tags, bundles, chunk ids and package flags.
+    The hash only depends on the resolved strings, so it's comparable between registries with different name
+    and value tables. Names, tag values and key value pairs are resolved once per table entry, in one pass per table.
+    """
+    def __init__(self, registry: AssetRegistry):
+        self.registry = registry
+        self.name_resolver = NameResolver(registry.state.names)
+        self.names = [name.string_view() for name in registry.state.names.names_by_idx]
+
+        tag_store = registry.state.tag_store
+        value_resolvers = {
+            ValueTypes.AnsiString: str,
+            ValueTypes.WideString: str,
+            ValueTypes.NumberlessName: self.resolve_fname,
+            ValueTypes.Name: self.resolve_fname,
+            ValueTypes.NumberlessExportPath: self.resolve_export_path,
+            ValueTypes.ExportPath: self.resolve_export_path,
+            ValueTypes.LocalizedText: SerializedString.string_view,
+        }
+        values = {
+            value_type: [f"{MARKERS_BY_TYPE[value_type]}({resolve(val)})" for val in tag_store.get_table_by_type(value_type)]
+            for value_type, resolve in value_resolvers.items()
+        }
+
+        # "Key=TYPE(Value)" of every pair, by has_numberless_keys
+        self.pairs = {
+            has_numberless_keys: [
+                f"{self.resolve_fname(name)}={values[val_id.value_type][val_id.value_index]}"
+                for name, val_id in table
+            ]
+            for has_numberless_keys, table in ((True, tag_store.numberless_pairs), (False, tag_store.numbered_pairs))
+        }
+
+    def resolve_fname(self, name: FName | None) -> str:
+        if name is None:
+            return ""
+        if name.number == FName.NO_NUMBER:
+            return self.names[name.name_idx]
+        return f"{self.names[name.name_idx]}___{name.number - 1}"
+
+    def resolve_export_path(self, path: ExportPath) -> str:
+        resolve_fname = self.resolve_fname
+        return (f"{resolve_fname(path.class_path.package)}.{resolve_fname(path.class_path.asset)}"
+                f"'{resolve_fname(path.package_name)}.{resolve_fname(path.object_name)}'")
+
+    def key(self, asset: AssetData) -> str:
+        return f"{self.resolve_fname(asset.packageName)}.{self.resolve_fname(asset.assetName)}"
+
+    def fingerprint(self, asset: AssetData) -> int:
+        resolve_fname = self.resolve_fname
+        asset_class = asset.assetClass
+        if isinstance(asset_class, FName):
+            class_str = resolve_fname(asset_class)
+        else:
+            class_str = f"{resolve_fname(asset_class.package)}.{resolve_fname(asset_class.asset)}"
+
+        # tag order isn't part of the content
+        tags = asset.tags
+        pairs = sorted(self.pairs[bool(tags.has_numberless_keys)][tags.pair_begin:tags.pair_begin + tags.handle_num])
+
+        parts = [
+            class_str,
+            resolve_fname(asset.packagePath),
+            resolve_fname(asset.optionalOuterPath),
+            str(asset.chunk_ids),
+            str(asset.package_flags),
+            *pairs,
+        ]
+
+        for bundle in asset.bundles:
+            parts.append(resolve_fname(bundle.bundle_name))
+            parts += [self.name_resolver.resolve_soft_object_path(path) for path in bundle.asset_paths]
+
+        return CityHash64(FIELD_SEPARATOR.join(parts))
+
+    def fingerprints(self) -> dict[str, tuple[int, int]]:
+        """(row, fingerprint) of every asset by key, keeping the first of assets with the same key"""
+        fingerprints = {}
+        for row, asset in enumerate(self.registry.state.assets):
+            key = self.key(asset)
+            if key not in fingerprints:
+                fingerprints[key] = row, self.fingerprint(asset)
+
+        if len(fingerprints) != len(self.registry.state.assets):
+            logger.warning(f"{len(self.registry.state.assets) - len(fingerprints)} assets share their key "
+                           f"with an earlier asset and are left out of the diff")
+        return fingerprints
+
+    def assets_to_json(self, rows: list[int]) -> list[dict]:
+        registry = self.registry
+        return assets_to_json([registry.state.assets[row] for row in rows], registry.header,
+                              registry.state.tag_store, self.name_resolver)
+
+
+@dataclass
+class RegistryDiff:
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    num_unchanged: int = 0
+    # json of the added and changed assets as they are in the new registry, by key
+    new_assets: dict[str, dict] = field(default_factory=dict)
+    old_assets: dict[str, dict] = field(default_factory=dict)
+
+
+def diff_registries(old: AssetRegistry, new: AssetRegistry) -> RegistryDiff:
+    """Compares the assets of both registries by key and fingerprint, only changed assets are resolved to json"""
+    old_fingerprinter = AssetFingerprinter(old)
+    new_fingerprinter = AssetFingerprinter(new)
+    old_fingerprints = old_fingerprinter.fingerprints()
+    new_fingerprints = new_fingerprinter.fingerprints()
+
+    diff = RegistryDiff()
+    for key, (_, fingerprint) in new_fingerprints.items():
+        if (old_entry := old_fingerprints.get(key)) is None:
+            diff.added.append(key)
+        elif old_entry[1] != fingerprint:
+            diff.changed.append(key)
+        else:
+            diff.num_unchanged += 1
+    diff.removed = [key for key in old_fingerprints if key not in new_fingerprints]
+
+    diff.added.sort()
+    diff.removed.sort()
+    diff.changed.sort()
+
+    new_keys = diff.added + diff.changed
+    new_json = new_fingerprinter.assets_to_json([new_fingerprints[key][0] for key in new_keys])
+    diff.new_assets = dict(zip(new_keys, new_json))
+    old_json = old_fingerprinter.assets_to_json([old_fingerprints[key][0] for key in diff.changed])
+    diff.old_assets = dict(zip(diff.changed, old_json))
+
+    logger.info(f"{len(diff.added)} added, {len(diff.removed)} removed, {len(diff.changed)} changed "
+                f"and {diff.num_unchanged} unchanged assets")
+    return diff
+
+
+def asset_changes(old_asset: dict, new_asset: dict) -> dict:
+    """Changed fields of an asset, and its added, removed and changed tags"""
+    old_tags = old_asset["TagsAndValues"]
+    new_tags = new_asset["TagsAndValues"]
+
+    changes = {
+        "Fields": {
+            field_name: {"Old": old_val, "New": new_asset.get(field_name)}
+            for field_name, old_val in old_asset.items()
+            if field_name not in IDENTITY_FIELDS and new_asset.get(field_name) != old_val
+        },
+        "Tags": {
+            "Added": {tag: val for tag, val in new_tags.items() if tag not in old_tags},
+            "Removed": {tag: val for tag, val in old_tags.items() if tag not in new_tags},
+            "Changed": {
+                tag: {"Old": old_tags[tag], "New": val}
+                for tag, val in new_tags.items()
+                if tag in old_tags and old_tags[tag] != val
+            },
+        },
+    }
+    return changes
+
+
+def diff_to_json(diff: RegistryDiff) -> dict:
+    """The diff as a patch for apply_patch, along with a summary and the changes of every changed asset"""
+    return {
+        "Summary": {
+            "Added": len(diff.added),
+            "Removed": len(diff.removed),
+            "Changed": len(diff.changed),
+            "Unchanged": diff.num_unchanged,
+        },
+        "Changes": {
+            key: asset_changes(diff.old_assets[key], diff.new_assets[key])
+            for key in diff.changed
+        },
+        "Assets": list(diff.new_assets.values()),
+        "DeletedAssets": diff.removed,
+    }
@@ -0,0 +1,229 @@
+import logging
+
+from hexviewer.asset_registry_ue5.json_conversion.name_reader import NameReader
+from hexviewer.asset_registry_ue5.json_conversion.name_resolver import NameResolver
+from hexviewer.asset_registry_ue5.json_conversion.read_editable_json import TYPED_TAG_VAL_PATTERN
+from hexviewer.asset_registry_ue5.json_conversion.tag_value_type_markers import MARKERS_BY_TYPE, TYPES_BY_MARKER
+from hexviewer.asset_registry_ue5.registry_versions import RegistryVersions
+from hexviewer.asset_registry_ue5.tag_value_types import ValueTypes
+from hexviewer.asset_registry_ue5.types.registry import AssetData, AssetRegistryHeader, AssetRegistryState
+from hexviewer.asset_registry_ue5.unreal_types import FName, FValueID, SerializedString, ExportPath
+
+logger = logging.getLogger(__name__)
+
+NUMBERLESS_VALUE_TYPES = (ValueTypes.NumberlessName, ValueTypes.NumberlessExportPath)
+
+
+def object_path(asset: AssetData, name_resolver: NameResolver) -> str:
+    """Path of the asset as "Package.Asset", or "Outer.Object" or "Package.Asset:Object" for assets with an outer path"""
+    asset_name = name_resolver.resolve_fname(asset.assetName)
+    outer_path = name_resolver.resolve_fname(asset.optionalOuterPath)
+
+    if outer_path is None or outer_path == "None":
+        return name_resolver.resolve_fname(asset.packageName) + "." + asset_name
+
+    return outer_path + (":" if "." in outer_path else ".") + asset_name
+
+
+def value_names(val) -> list[FName]:
+    if isinstance(val, FName):
+        return [val]
+    if isinstance(val, ExportPath):
+        return [val.class_path.package, val.class_path.asset, val.package_name, val.object_name]
+    return []
+
+
+class RegistryEditor:
+    """
+    Edits the assets and tags of a state in place, e.g. of a registry read from a binary file that is written back afterwards.
+
+    Assets are looked up by object path through an index. Tag values are deduplicated through the value hashes of
+    the tag store, and a modified tag map is written to a new pair range, unless the range was created by this editor
+    for the same asset. Removed assets and replaced pair ranges leave unreferenced names and values behind,
+    which compact() in registry_remapper drops.
+    """
+    def __init__(self, state: AssetRegistryState, header: AssetRegistryHeader):
+        self.state = state
+        self.header = header
+        self.name_reader = NameReader(state.names)
+        self.name_resolver = NameResolver(state.names)
+
+        self.rows: dict[str, int] = {}
+        for row, asset in enumerate(state.assets):
+            self.rows.setdefault(object_path(asset, self.name_resolver), row)
+        if len(self.rows) != len(state.assets):
+            logger.warning(f"{len(state.assets) - len(self.rows)} assets share their path with an earlier asset "
+                           f"and can't be looked up")
+
+        self._indexed_value_types: set[ValueTypes] = set()
+        # (has_numberless_keys, pair_begin) of the pair ranges created by this editor, each used by a single asset
+        self._owned_ranges: set[tuple[bool, int]] = set()
+
+    def __len__(self):
+        return len(self.state.assets)
+
+    def __contains__(self, path: str):
+        return path in self.rows
+
+    def get_asset(self, path: str) -> AssetData | None:
+        if (row := self.rows.get(path)) is None:
+            return None
+        return self.state.assets[row]
+
+    def _require_asset(self, path: str) -> AssetData:
+        if (asset := self.get_asset(path)) is None:
+            raise ValueError(f"No asset {path}")
+        return asset
+
+    def add_asset(self, package_name: str, asset_name: str, asset_class: str, tags: dict[str, str] | None = None,
+                  chunk_ids: list[int] | None = None, package_flags: int = 0, package_path: str | None = None) -> AssetData:
+        """
+        Adds an asset without an outer path or bundles. asset_class is a class path like "/Script/Engine.Texture2D",
+        tag values are typed the same way as in json, e.g. "NAME(Value)".
+        """
+        ver = self.header.version.version_num
+        read_fname = self.name_reader.read_fname
+
+        path = f"{package_name}.{asset_name}"
+        if path in self.rows:
+            raise ValueError(f"Asset {path} already exists")
+
+        if package_path is None:
+            package_path = package_name.rsplit("/", maxsplit=1)[0]
+
+        if ver >= RegistryVersions.CLASS_PATHS:
+            asset_class_name = self.name_reader.read_top_level_path(asset_class)
+        else:
+            asset_class_name = read_fname(asset_class)
+
+        pairs = [
+            (read_fname(key), self.insert_value(value))
+            for key, value in (tags or {}).items()
+        ]
+        has_numberless_keys = all(name.number == FName.NO_NUMBER for name, _ in pairs)
+
+        asset = AssetData(
+            packagePath=read_fname(package_path),
+            packageName=read_fname(package_name),
+            assetClass=asset_class_name,
+            assetName=read_fname(asset_name),
+            tags=self.state.tag_store.register_map_pairs(pairs, has_numberless_keys),
+            bundles=[],
+            chunk_ids=list(chunk_ids or []),
+            package_flags=package_flags,
+            oldObjectPath=read_fname(path) if ver < RegistryVersions.REMOVE_ASSET_PATH_FNAMES else None,
+            optionalOuterPath=read_fname("None"),
+        )
+
+        if pairs:
+            self._owned_ranges.add((has_numberless_keys, asset.tags.pair_begin))
+        self.rows[path] = len(self.state.assets)
+        self.state.assets.append(asset)
+        return asset
+
+    def remove_asset(self, path: str) -> AssetData:
+        """Removes the asset by moving the last asset into its row, the write sorts the assets anyway"""
+        if (row := self.rows.pop(path, None)) is None:
+            raise ValueError(f"No asset {path}")
+
+        assets = self.state.assets
+        removed = assets[row]
+        last = assets.pop()
+        if row < len(assets):
+            assets[row] = last
+            self.rows[object_path(last, self.name_resolver)] = row
+
+        return removed
+
+    def get_tags(self, path: str) -> dict[str, str]:
+        """Tags of the asset with their values typed as in json"""
+        asset = self._require_asset(path)
+        tag_store = self.state.tag_store
+        return {
+            self.name_resolver.resolve_fname(key): self.format_value(val_id)
+            for key, val_id in tag_store.get_key_val_pair(asset.tags)
+        }
+
+    def set_tag(self, path: str, key: str, value: str):
+        """Adds or replaces a tag, value is typed the same way as in json, e.g. "ANSI(Value)" or "TEXT(Value)" """
+        asset = self._require_asset(path)
+        tag_name = self.name_reader.read_fname(key)
+        val_id = self.insert_value(value)
+
+        pairs = list(self.state.tag_store.get_key_val_pair(asset.tags))
+        for idx, (name, _) in enumerate(pairs):
+            if name == tag_name:
+                pairs[idx] = (tag_name, val_id)
+                break
+        else:
+            pairs.append((tag_name, val_id))
+
+        self._set_pairs(asset, pairs)
+
+    def remove_tag(self, path: str, key: str) -> bool:
+        """Removes the tag if the asset has it, returning whether it did"""
+        asset = self._require_asset(path)
+        tag_name = self.name_reader.read_fname(key)
+
+        old_pairs = self.state.tag_store.get_key_val_pair(asset.tags)
+        pairs = [(name, val_id) for name, val_id in old_pairs if name != tag_name]
+        if len(pairs) == len(old_pairs):
+            return False
+
+        self._set_pairs(asset, pairs)
+        return True
+
+    def format_value(self, val_id: FValueID) -> str:
+        val = self.state.tag_store.get_value(val_id)
+        if isinstance(val, SerializedString):
+            val_str = val.string_view()
+        elif isinstance(val, FName):
+            val_str = self.name_resolver.resolve_fname(val)
+        elif isinstance(val, ExportPath):
+            val_str = self.name_resolver.resolve_export_path(val)
+        else:
+            val_str = val
+        return f"{MARKERS_BY_TYPE[val_id.value_type]}({val_str})"
+
+    def insert_value(self, value: str) -> FValueID:
+        if (match := TYPED_TAG_VAL_PATTERN.fullmatch(value)) is None or match.group(1) not in TYPES_BY_MARKER:
+            raise ValueError(f"Tag value {value} is not typed, e.g. NAME(Value)")
+        value_type = TYPES_BY_MARKER[match.group(1)]
+        value_str = match.group(2)
+
+        if value_type in (ValueTypes.AnsiString, ValueTypes.WideString):
+            val = value_str
+        elif value_type == ValueTypes.LocalizedText:
+            val = SerializedString.from_string(value_str)
+        elif value_type in (ValueTypes.Name, ValueTypes.NumberlessName):
+            val = self.name_reader.read_fname(value_str)
+        else:
+            if (val := self.name_reader.read_export_path(value_str)) is None:
+                raise ValueError(f"Tag value {value} is not an export path")
+
+        if value_type in NUMBERLESS_VALUE_TYPES and any(name.number != FName.NO_NUMBER for name in value_names(val)):
+            raise ValueError(f"Tag value {value} holds a numbered name")
+
+        tag_store = self.state.tag_store
+        if value_type not in self._indexed_value_types:
+            # stores read from a binary file don't hash their values up front
+            tag_store.index_values(value_type)
+            self._indexed_value_types.add(value_type)
+
+        return tag_store.insert_value(val, value_type)
+
+    def _set_pairs(self, asset: AssetData, pairs: list[tuple[FName, FValueID]]):
+        tag_store = self.state.tag_store
+        handle = asset.tags
+        has_numberless_keys = handle.has_numberless_keys and all(name.number == FName.NO_NUMBER for name, _ in pairs)
+
+        if ((has_numberless_keys, handle.pair_begin) in self._owned_ranges
+                and has_numberless_keys == handle.has_numberless_keys and len(pairs) == handle.handle_num):
+            table = tag_store.numberless_pairs if has_numberless_keys else tag_store.numbered_pairs
+            table[handle.pair_begin:handle.pair_begin + handle.handle_num] = pairs
+            return
+
+        # copy on write, the old range may be shared with other assets
+        asset.tags = tag_store.register_map_pairs(pairs, has_numberless_keys)
+        if pairs:
+            self._owned_ranges.add((has_numberless_keys, asset.tags.pair_begin))
@@ -0,0 +1,221 @@
+import logging
+import random
+from dataclasses import dataclass, field
+
+from hexviewer.asset_registry_ue5.data_store_reader import DataStore
+from hexviewer.asset_registry_ue5.name_mapper import NameMapper
+from hexviewer.asset_registry_ue5.registry_versions import RegistryVersions
+from hexviewer.asset_registry_ue5.tag_value_types import ValueTypes
+from hexviewer.asset_registry_ue5.types.registry import AssetRegistry, AssetRegistryHeader, AssetRegVersion, \
+    AssetRegistryState, AssetData, Bundle
+from hexviewer.asset_registry_ue5.unreal_types import FName, FValueID, TopLevelAssetPath, ExportPath, SoftObjectPath, \
+    SerializedString
+from hexviewer.asset_registry_ue5.utils import paused_gc
+
+logger = logging.getLogger(__name__)
+
+# version guid of the asset registry format, as written by the engine
+ASSET_REGISTRY_GUID = (0x717F9EE7, 0xE9B0493A, 0x88B39132, 0x1B388107)
+
+# value kinds and their default share of all tag values; strings become WIDE and names or paths
+# become numbered according to the wide and numbered fractions
+VALUE_KINDS = ("STRING", "NAME", "PATH", "TEXT")
+DEFAULT_TYPE_MIX = {
+    "STRING": 0.5,
+    "NAME": 0.2,
+    "PATH": 0.2,
+    "TEXT": 0.1,
+}
+
+BUNDLE_NAMES = ("Menu", "Game", "Preload", "Cosmetics")
+PACKAGE_FLAGS = (0x0, 0x400, 0x20000, 0x80000000)
+LOG_INTERVAL = 100_000
+
+
+@dataclass
+class GeneratorConfig:
+    num_assets: int = 1000
+    tags_per_asset: int = 8
+    type_mix: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_TYPE_MIX))
+    name_reuse: float = 0.8  # chance that a tag value repeats an earlier value of the same kind
+    wide_fraction: float = 0.05
+    numbered_fraction: float = 0.1
+    bundle_fraction: float = 0.05
+    num_chunks: int = 16
+    chunks_per_asset: int = 1
+    num_classes: int = 64
+    assets_per_folder: int = 100
+    filter_editor_only: bool = False
+    seed: int = 0
+
+    def __post_init__(self):
+        if unknown := set(self.type_mix) - set(VALUE_KINDS):
+            raise ValueError(f"Unknown value kinds {sorted(unknown)}, expected some of {VALUE_KINDS}")
+        if sum(self.type_mix.values()) <= 0:
+            raise ValueError("Type mix needs at least one positive weight")
+        for fraction_name in ("name_reuse", "wide_fraction", "numbered_fraction", "bundle_fraction"):
+            if not 0 <= getattr(self, fraction_name) <= 1:
+                raise ValueError(f"{fraction_name} must be between 0 and 1")
+
+
+class RegistryGenerator:
+    """
+    Builds a synthetic version 17 registry state through NameMapper and DataStore.insert_value,
+    the same way a registry read from json is built. The same config and seed always yield the same registry.
+    """
+    def __init__(self, config: GeneratorConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.names = NameMapper()
+        self.tag_store = DataStore()
+        self.tag_store.text_first = True
+
+        self.value_pools: dict[str, list[FValueID]] = {kind: [] for kind in VALUE_KINDS}
+        self.num_values = 0
+
+        kinds = [kind for kind in VALUE_KINDS if self.config.type_mix.get(kind, 0) > 0]
+        self.kinds = kinds
+        self.kind_weights = [self.config.type_mix[kind] for kind in kinds]
+
+        self.class_paths = [
+            TopLevelAssetPath(self.fname("/Script/Engine"), self.fname(f"GeneratedClass{idx}"))
+            for idx in range(max(1, config.num_classes))
+        ]
+        self.tag_keys = [
+            self.numbered_fname(f"GeneratedTag{idx}")
+            for idx in range(max(4 * config.tags_per_asset, 32))
+        ]
+        self.none_name = self.fname("None")
+
+    def fname(self, name: str) -> FName:
+        return self.names.fname_from_string(name)
+
+    def numbered_fname(self, name: str) -> FName:
+        if self.rng.random() < self.config.numbered_fraction:
+            name = f"{name}___{self.rng.randrange(16)}"
+        return self.fname(name)
+
+    def word(self) -> tuple[str, bool]:
+        self.num_values += 1
+        if self.rng.random() < self.config.wide_fraction:
+            return f"Wert{self.num_values}üß", True
+        return f"Value{self.num_values}", False
+
+    def object_path_names(self, asset_idx: int) -> tuple[str, str, str]:
+        folder = f"/Game/Generated/Folder{asset_idx // self.config.assets_per_folder}"
+        asset_name = f"Asset{asset_idx}"
+        return folder, f"{folder}/{asset_name}", asset_name
+
+    def new_value(self, kind: str) -> FValueID:
+        if kind == "STRING":
+            val, is_wide = self.word()
+            return self.tag_store.insert_value(val, ValueTypes.WideString if is_wide else ValueTypes.AnsiString)
+
+        if kind == "TEXT":
+            val, _ = self.word()
+            return self.tag_store.insert_value(SerializedString.from_string(val), ValueTypes.LocalizedText)
+
+        if kind == "NAME":
+            val, _ = self.word()
+            name = self.numbered_fname(val)
+            return self.tag_store.insert_value(
+                name,
+                ValueTypes.NumberlessName if name.number == FName.NO_NUMBER else ValueTypes.Name
+            )
+
+        _, package_name, asset_name = self.object_path_names(self.rng.randrange(max(1, self.config.num_assets)))
+        path = ExportPath(
+            class_path=self.rng.choice(self.class_paths),
+            package_name=self.fname(package_name),
+            object_name=self.numbered_fname(asset_name),
+        )
+        is_numberless = path.object_name.number == FName.NO_NUMBER
+        return self.tag_store.insert_value(
+            path,
+            ValueTypes.NumberlessExportPath if is_numberless else ValueTypes.ExportPath
+        )
+
+    def tag_value(self, kind: str) -> FValueID:
+        pool = self.value_pools[kind]
+        if pool and self.rng.random() < self.config.name_reuse:
+            return self.rng.choice(pool)
+
+        val_id = self.new_value(kind)
+        pool.append(val_id)
+        return val_id
+
+    def bundles(self) -> list[Bundle]:
+        if self.rng.random() >= self.config.bundle_fraction:
+            return []
+
+        asset_paths = []
+        for _ in range(self.rng.randint(1, 3)):
+            _, package_name, asset_name = self.object_path_names(self.rng.randrange(self.config.num_assets))
+            asset_paths.append(SoftObjectPath(
+                asset_path=TopLevelAssetPath(self.fname(package_name), self.fname(asset_name)),
+                sub_path=SerializedString.from_string(f"Widget{self.rng.randrange(8)}"),
+            ))
+
+        return [Bundle(bundle_name=self.fname(self.rng.choice(BUNDLE_NAMES)), asset_paths=asset_paths)]
+
+    def asset(self, asset_idx: int) -> AssetData:
+        config = self.config
+        rng = self.rng
+
+        folder, package_name, asset_name = self.object_path_names(asset_idx)
+
+        keys = rng.sample(self.tag_keys, min(config.tags_per_asset, len(self.tag_keys)))
+        kinds = rng.choices(self.kinds, self.kind_weights, k=len(keys))
+        pairs = [(key, self.tag_value(kind)) for key, kind in zip(keys, kinds)]
+        has_numberless_keys = all(key.number == FName.NO_NUMBER for key in keys)
+
+        if config.num_chunks > 0:
+            chunk_ids = sorted(rng.sample(range(config.num_chunks), min(config.chunks_per_asset, config.num_chunks)))
+        else:
+            chunk_ids = []
+
+        return AssetData(
+            packagePath=self.fname(folder),
+            packageName=self.fname(package_name),
+            assetClass=rng.choice(self.class_paths),
+            assetName=self.fname(asset_name),
+            tags=self.tag_store.register_map_pairs(pairs, has_numberless_keys),
+            bundles=self.bundles(),
+            chunk_ids=chunk_ids,
+            package_flags=rng.choice(PACKAGE_FLAGS),
+            oldObjectPath=None,
+            optionalOuterPath=self.none_name,
+        )
+
+    def generate(self) -> AssetRegistry:
+        logger.info(f"Generating {self.config.num_assets} assets with seed {self.config.seed}")
+
+        assets = []
+        with paused_gc():
+            for asset_idx in range(self.config.num_assets):
+                assets.append(self.asset(asset_idx))
+                if (asset_idx + 1) % LOG_INTERVAL == 0:
+                    logger.info(f"Generated {asset_idx + 1} assets")
+
+        logger.debug(f"Generated {len(self.names.names_by_idx)} names and {self.num_values} distinct values")
+
+        return AssetRegistry(
+            header=AssetRegistryHeader(
+                version=AssetRegVersion(
+                    guid=ASSET_REGISTRY_GUID,
+                    version_num=int(RegistryVersions.ASSET_PACKAGE_DATA_HAS_EXTENSION),
+                ),
+                filter_editor_only=self.config.filter_editor_only,
+            ),
+            state=AssetRegistryState(
+                names=self.names,
+                tag_store=self.tag_store,
+                assets=assets,
+                dependencies=[],
+                packages=[],
+            ),
+        )
+
+
+def generate_registry(config: GeneratorConfig) -> AssetRegistry:
+    return RegistryGenerator(config).generate()
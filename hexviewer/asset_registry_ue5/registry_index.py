@@ -0,0 +1,53 @@
+import logging
+
+from hexviewer.asset_registry_ue5.chunk_index import ChunkIndex
+from hexviewer.asset_registry_ue5.json_conversion.make_editable_json import assets_to_json
+from hexviewer.asset_registry_ue5.json_conversion.name_resolver import NameResolver
+from hexviewer.asset_registry_ue5.types.registry import AssetRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class RegistryIndex:
+    """
+    Lookup tables over a parsed registry for answering many small queries:
+    object path ("PackageName.AssetName") to row, package name to rows, and chunk id to rows.
+    """
+    def __init__(self, registry: AssetRegistry):
+        self.registry = registry
+        state = registry.state
+        self.name_resolver = NameResolver(state.names)
+
+        logger.debug(f"Indexing {len(state.assets)} assets")
+        self.chunks = ChunkIndex.from_assets(state.assets)
+        self.rows_by_path: dict[str, int] = {}
+        self.rows_by_package: dict[str, list[int]] = {}
+
+        resolve_fname = self.name_resolver.resolve_fname
+        for row, asset in enumerate(state.assets):
+            package_name = resolve_fname(asset.packageName)
+            self.rows_by_path.setdefault(f"{package_name}.{resolve_fname(asset.assetName)}", row)
+            self.rows_by_package.setdefault(package_name, []).append(row)
+
+    def find_rows(self, path: str) -> list[int]:
+        """Rows of the asset with the given object path, or of all assets in the package if path is a package name"""
+        if (row := self.rows_by_path.get(path)) is not None:
+            return [row]
+        return self.rows_by_package.get(path, [])
+
+    def assets_json(self, rows: list[int]) -> list[dict]:
+        state = self.registry.state
+        return assets_to_json(
+            [state.assets[row] for row in rows],
+            self.registry.header,
+            state.tag_store,
+            self.name_resolver,
+        )
+
+    def object_paths(self, rows) -> list[str]:
+        resolve_fname = self.name_resolver.resolve_fname
+        assets = self.registry.state.assets
+        return [
+            f"{resolve_fname(assets[row].packageName)}.{resolve_fname(assets[row].assetName)}"
+            for row in rows
+        ]
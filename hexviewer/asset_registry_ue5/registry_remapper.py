@@ -0,0 +1,285 @@
+import logging
+from array import array
+from collections.abc import Iterable
+from dataclasses import replace
+
+from hexviewer.asset_registry_ue5.data_store_reader import DataStore
+from hexviewer.asset_registry_ue5.name_mapper import NameMapper
+from hexviewer.asset_registry_ue5.tag_value_types import ValueTypes
+from hexviewer.asset_registry_ue5.types.registry import AssetRegistryState, AssetData, Bundle, Dependency, PackageData
+from hexviewer.asset_registry_ue5.unreal_types import FName, TopLevelAssetPath, ExportPath, SoftObjectPath, \
+    FValueID, TagMapHandle, AssetIdentifier
+
+logger = logging.getLogger(__name__)
+
+NAME_VALUE_TYPES = (
+    ValueTypes.Name,
+    ValueTypes.NumberlessName,
+    ValueTypes.ExportPath,
+    ValueTypes.NumberlessExportPath,
+)
+
+
+def name_indices(val) -> list[int]:
+    """Indices of all FNames held by a name-bearing value"""
+    if val is None:
+        return []
+    if isinstance(val, FName):
+        return [val.name_idx]
+    if isinstance(val, TopLevelAssetPath):
+        return [val.package.name_idx, val.asset.name_idx]
+    if isinstance(val, ExportPath):
+        return [
+            val.class_path.package.name_idx,
+            val.class_path.asset.name_idx,
+            val.package_name.name_idx,
+            val.object_name.name_idx,
+        ]
+    if isinstance(val, SoftObjectPath):
+        return name_indices(val.asset_path)
+    raise TypeError(f"Can't collect names from {type(val).__name__}")
+
+
+def remap_fname(name: FName | None, name_map: dict[int, int]) -> FName | None:
+    if name is None:
+        return None
+    return FName(name_map[name.name_idx], name.number)
+
+
+def remap_top_level_asset_path(path: TopLevelAssetPath, name_map: dict[int, int]) -> TopLevelAssetPath:
+    return TopLevelAssetPath(
+        package=remap_fname(path.package, name_map),
+        asset=remap_fname(path.asset, name_map),
+    )
+
+
+def remap_export_path(path: ExportPath, name_map: dict[int, int]) -> ExportPath:
+    return ExportPath(
+        class_path=remap_top_level_asset_path(path.class_path, name_map),
+        package_name=remap_fname(path.package_name, name_map),
+        object_name=remap_fname(path.object_name, name_map),
+    )
+
+
+def remap_soft_object_path(path: SoftObjectPath, name_map: dict[int, int]) -> SoftObjectPath:
+    return SoftObjectPath(
+        asset_path=remap_top_level_asset_path(path.asset_path, name_map),
+        sub_path=path.sub_path,
+    )
+
+
+def remap_value(val, value_type: ValueTypes, name_map: dict[int, int]):
+    if value_type in (ValueTypes.Name, ValueTypes.NumberlessName):
+        return remap_fname(val, name_map)
+    if value_type in (ValueTypes.ExportPath, ValueTypes.NumberlessExportPath):
+        return remap_export_path(val, name_map)
+    return val
+
+
+def asset_name_indices(asset: AssetData) -> list[int]:
+    """Indices of the FNames an asset references directly, not counting its tags"""
+    indices = [
+        asset.packagePath.name_idx,
+        asset.packageName.name_idx,
+        asset.assetName.name_idx,
+    ]
+    indices.extend(name_indices(asset.assetClass))
+    indices.extend(name_indices(asset.oldObjectPath))
+    indices.extend(name_indices(asset.optionalOuterPath))
+
+    for bundle in asset.bundles:
+        indices.append(bundle.bundle_name.name_idx)
+        for path in bundle.asset_paths:
+            indices.extend(name_indices(path))
+
+    return indices
+
+
+def remap_asset(asset: AssetData, name_map: dict[int, int], tags: TagMapHandle) -> AssetData:
+    if isinstance(asset.assetClass, TopLevelAssetPath):
+        asset_class = remap_top_level_asset_path(asset.assetClass, name_map)
+    else:
+        asset_class = remap_fname(asset.assetClass, name_map)
+
+    return AssetData(
+        packagePath=remap_fname(asset.packagePath, name_map),
+        packageName=remap_fname(asset.packageName, name_map),
+        assetClass=asset_class,
+        assetName=remap_fname(asset.assetName, name_map),
+        tags=tags,
+        bundles=[
+            Bundle(
+                bundle_name=remap_fname(bundle.bundle_name, name_map),
+                asset_paths=[remap_soft_object_path(path, name_map) for path in bundle.asset_paths],
+            )
+            for bundle in asset.bundles
+        ],
+        chunk_ids=list(asset.chunk_ids),
+        package_flags=asset.package_flags,
+        oldObjectPath=remap_fname(asset.oldObjectPath, name_map),
+        optionalOuterPath=remap_fname(asset.optionalOuterPath, name_map),
+    )
+
+
+def dependency_name_indices(dependency: Dependency) -> list[int]:
+    identifier = dependency.identifier
+    return [
+        name.name_idx
+        for name in (identifier.packageName, identifier.typeName, identifier.objectName, identifier.valueName)
+        if name is not None
+    ]
+
+
+def remap_dependency(dependency: Dependency, name_map: dict[int, int]) -> Dependency:
+    identifier = dependency.identifier
+    return replace(
+        dependency,
+        identifier=AssetIdentifier(
+            flags=identifier.flags,
+            packageName=remap_fname(identifier.packageName, name_map),
+            typeName=remap_fname(identifier.typeName, name_map),
+            objectName=remap_fname(identifier.objectName, name_map),
+            valueName=remap_fname(identifier.valueName, name_map),
+        ),
+        package_deps=array("i", dependency.package_deps),
+        name_deps=array("i", dependency.name_deps),
+        manage_deps=array("i", dependency.manage_deps),
+        referencers=array("i", dependency.referencers),
+    )
+
+
+def package_name_indices(package: PackageData) -> list[int]:
+    indices = [package.key.name_idx]
+    indices.extend(name.name_idx for name in package.imported_classes or [])
+    return indices
+
+
+def remap_package(package: PackageData, name_map: dict[int, int]) -> PackageData:
+    return replace(
+        package,
+        key=remap_fname(package.key, name_map),
+        imported_classes=(
+            [remap_fname(name, name_map) for name in package.imported_classes]
+            if package.imported_classes is not None else None
+        ),
+    )
+
+
+def dense_index_map(indices: Iterable[int]) -> dict[int, int]:
+    """Maps the given indices onto 0..n-1 while keeping their relative order"""
+    return {
+        old_idx: new_idx
+        for new_idx, old_idx in enumerate(sorted(set(indices)))
+    }
+
+
+class RegistryRemapper:
+    """
+    Extracts subsets of the assets of a state into new states with dense name and tag value tables,
+    only keeping the names and tag values the subset references.
+    Per-asset and per-value name lookups are cached, so extracting several subsets from the same
+    source only pays for them once.
+    """
+    def __init__(self, state: AssetRegistryState):
+        self.state = state
+        self._asset_names: dict[int, list[int]] = {}
+        self._value_names: dict[tuple[int, int], list[int]] = {}
+
+    def asset_names(self, row: int) -> list[int]:
+        if (indices := self._asset_names.get(row)) is None:
+            indices = self._asset_names[row] = asset_name_indices(self.state.assets[row])
+        return indices
+
+    def value_names(self, val_id: FValueID) -> list[int]:
+        if val_id.value_type not in NAME_VALUE_TYPES:
+            return []
+
+        key = (int(val_id.value_type), val_id.value_index)
+        if (indices := self._value_names.get(key)) is None:
+            indices = self._value_names[key] = name_indices(self.state.tag_store.get_value(val_id))
+        return indices
+
+    def subset(self, rows: Iterable[int], dependencies: list[Dependency] | None = None,
+               packages: list[PackageData] | None = None) -> AssetRegistryState:
+        """The assets at rows, along with the given dependencies and packages of the state"""
+        source = self.state
+        tag_store = source.tag_store
+        rows = list(rows)
+        dependencies = dependencies or []
+        packages = packages or []
+
+        used_names: set[int] = set()
+        for dependency in dependencies:
+            used_names.update(dependency_name_indices(dependency))
+        for package in packages:
+            used_names.update(package_name_indices(package))
+        used_values: dict[ValueTypes, set[int]] = {val_type: set() for val_type in ValueTypes}
+
+        for row in rows:
+            used_names.update(self.asset_names(row))
+
+            for key, val_id in tag_store.get_key_val_pair(source.assets[row].tags):
+                used_names.add(key.name_idx)
+                used_values[val_id.value_type].add(val_id.value_index)
+                used_names.update(self.value_names(val_id))
+
+        name_map = dense_index_map(used_names)
+        names = NameMapper(
+            names=[source.names.names_by_idx[old_idx] for old_idx in name_map]
+        )
+
+        store = DataStore()
+        store.text_first = tag_store.text_first
+
+        value_maps: dict[ValueTypes, dict[int, int]] = {}
+        for val_type, indices in used_values.items():
+            value_maps[val_type] = dense_index_map(indices)
+            source_table = tag_store.get_table_by_type(val_type)
+            store.get_table_by_type(val_type).extend(
+                remap_value(source_table[old_idx], val_type, name_map)
+                for old_idx in value_maps[val_type]
+            )
+            # so values inserted into the subset reuse the copied ones
+            store.index_values(val_type)
+
+        handles: dict[tuple[bool, int, int], TagMapHandle] = {}
+        assets = []
+        for row in rows:
+            asset = source.assets[row]
+            handle_key = (asset.tags.has_numberless_keys, asset.tags.pair_begin, asset.tags.handle_num)
+
+            if (tags := handles.get(handle_key)) is None:
+                pairs = [
+                    (
+                        remap_fname(key, name_map),
+                        FValueID(
+                            value_type=val_id.value_type,
+                            value_index=value_maps[val_id.value_type][val_id.value_index],
+                        ),
+                    )
+                    for key, val_id in tag_store.get_key_val_pair(asset.tags)
+                ]
+                tags = handles[handle_key] = store.register_map_pairs(pairs, asset.tags.has_numberless_keys)
+
+            assets.append(remap_asset(asset, name_map, tags))
+
+        logger.debug(f"Subset of {len(assets)} assets uses {len(name_map)} of {len(source.names.names_by_idx)} names")
+
+        return AssetRegistryState(
+            names=names,
+            assets=assets,
+            dependencies=[remap_dependency(dependency, name_map) for dependency in dependencies],
+            packages=[remap_package(package, name_map) for package in packages],
+            tag_store=store,
+        )
+
+    def compact(self) -> AssetRegistryState:
+        """
+        The whole state with the names and tag values no asset, tag, bundle, dependency or package references
+        dropped, and the tag map pairs repacked
+        """
+        return self.subset(range(len(self.state.assets)), self.state.dependencies, self.state.packages)
+
+
+def compact(state: AssetRegistryState) -> AssetRegistryState:
+    return RegistryRemapper(state).compact()
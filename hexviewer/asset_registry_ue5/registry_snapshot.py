@@ -0,0 +1,267 @@
+import logging
+from array import array
+from itertools import accumulate, pairwise
+
+from hexviewer.asset_registry_ue5.bytes import BITMASK_32, BITMASK_64
+from hexviewer.asset_registry_ue5.data_store_reader import DataStore
+from hexviewer.asset_registry_ue5.name_mapper import NameMapper
+from hexviewer.asset_registry_ue5.types.registry import AssetRegistry, AssetRegistryHeader, AssetRegVersion, \
+    AssetRegistryState, AssetData
+from hexviewer.asset_registry_ue5.unreal_types import FName, SerializedString, TopLevelAssetPath, ExportPath, \
+    FValueID, TagMapHandle, pack_tag_map_handle
+from hexviewer.asset_registry_ue5.utils import paused_gc
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 2
+
+NO_FNAME = BITMASK_64
+
+
+class FNameCache(dict):
+    """
+    Creates each distinct FName once while restoring a snapshot.
+    States restored from a snapshot share FName instances between all places that reference the same name,
+    which is fine as long as FNames are replaced rather than modified in place.
+    """
+    def __missing__(self, key: int) -> FName | None:
+        name = self[key] = None if key == NO_FNAME else FName(key & BITMASK_32, key >> 32)
+        return name
+
+
+class ValueIDCache(dict):
+    def __missing__(self, key: int) -> FValueID:
+        val_id = self[key] = FValueID(
+            value_type=key & ((1 << FValueID.TYPE_BITS) - 1),
+            value_index=key >> FValueID.TYPE_BITS,
+        )
+        return val_id
+
+
+def fname_key(name: FName | None) -> int:
+    if name is None:
+        return NO_FNAME
+    return name.number << 32 | name.name_idx
+
+
+def fname_column(names) -> array:
+    return array("Q", [fname_key(name) for name in names])
+
+
+def value_id_key(val_id: FValueID) -> int:
+    return val_id.value_index << FValueID.TYPE_BITS | int(val_id.value_type)
+
+
+def pack_strings(strings: list[SerializedString]) -> dict:
+    return {
+        "Blob": b"".join(string.string_data for string in strings),
+        "Offsets": array("Q", accumulate((len(string.string_data) for string in strings), initial=0)),
+        # bit 0 is_wide, bit 1 set for strings that are not in serialized form
+        "Wide": bytes(string.is_wide | (not string.is_serialized) << 1 for string in strings),
+    }
+
+
+def unpack_strings(packed: dict) -> list[SerializedString]:
+    blob = packed["Blob"]
+    return [
+        SerializedString(blob[start:end], bool(flags & 1), not flags & 2)
+        for (start, end), flags in zip(pairwise(packed["Offsets"]), packed["Wide"])
+    ]
+
+
+def pack_export_paths(paths: list[ExportPath]) -> list[array]:
+    return [
+        fname_column(path.class_path.package for path in paths),
+        fname_column(path.class_path.asset for path in paths),
+        fname_column(path.package_name for path in paths),
+        fname_column(path.object_name for path in paths),
+    ]
+
+
+def unpack_export_paths(columns: list[array], fnames: FNameCache) -> list[ExportPath]:
+    return [
+        ExportPath(
+            class_path=TopLevelAssetPath(fnames[class_package], fnames[class_asset]),
+            package_name=fnames[package_name],
+            object_name=fnames[object_name],
+        )
+        for class_package, class_asset, package_name, object_name in zip(*columns)
+    ]
+
+
+def pack_pairs(pairs: list[tuple[FName, FValueID]]) -> tuple[array, array]:
+    return (
+        fname_column(key for key, _ in pairs),
+        array("Q", [value_id_key(val_id) for _, val_id in pairs]),
+    )
+
+
+def unpack_pairs(columns: tuple[array, array], fnames: FNameCache, value_ids: ValueIDCache) -> list[tuple[FName, FValueID]]:
+    return [
+        (fnames[key], value_ids[val_id])
+        for key, val_id in zip(*columns)
+    ]
+
+
+def pack_tag_store(tag_store: DataStore) -> dict:
+    return {
+        "TextFirst": tag_store.text_first,
+        "Texts": pack_strings(tag_store.texts),
+        "AnsiStrings": tag_store.ansi_strings,
+        "WideStrings": tag_store.wide_strings,
+        "NumberlessNames": fname_column(tag_store.numberless_names),
+        "Names": fname_column(tag_store.names),
+        "NumberlessExportPaths": pack_export_paths(tag_store.numberless_export_paths),
+        "ExportPaths": pack_export_paths(tag_store.export_paths),
+        "NumberlessPairs": pack_pairs(tag_store.numberless_pairs),
+        "Pairs": pack_pairs(tag_store.numbered_pairs),
+    }
+
+
+def unpack_tag_store(packed: dict, fnames: FNameCache) -> DataStore:
+    value_ids = ValueIDCache()
+
+    tag_store = DataStore()
+    tag_store.text_first = packed["TextFirst"]
+    tag_store.texts = unpack_strings(packed["Texts"])
+    tag_store.ansi_strings = packed["AnsiStrings"]
+    tag_store.wide_strings = packed["WideStrings"]
+    tag_store.numberless_names = [fnames[key] for key in packed["NumberlessNames"]]
+    tag_store.names = [fnames[key] for key in packed["Names"]]
+    tag_store.numberless_export_paths = unpack_export_paths(packed["NumberlessExportPaths"], fnames)
+    tag_store.export_paths = unpack_export_paths(packed["ExportPaths"], fnames)
+    tag_store.numberless_pairs = unpack_pairs(packed["NumberlessPairs"], fnames, value_ids)
+    tag_store.numbered_pairs = unpack_pairs(packed["Pairs"], fnames, value_ids)
+    return tag_store
+
+
+def pack_assets(assets: list[AssetData]) -> dict:
+    class_paths = [asset.assetClass if isinstance(asset.assetClass, TopLevelAssetPath) else None for asset in assets]
+
+    return {
+        "PackagePath": fname_column(asset.packagePath for asset in assets),
+        "PackageName": fname_column(asset.packageName for asset in assets),
+        "AssetName": fname_column(asset.assetName for asset in assets),
+        "ClassPackage": fname_column(path.package if path else None for path in class_paths),
+        "ClassAsset": fname_column(
+            path.asset if path else asset.assetClass
+            for path, asset in zip(class_paths, assets)
+        ),
+        "OldObjectPath": fname_column(asset.oldObjectPath for asset in assets),
+        "OptionalOuterPath": fname_column(asset.optionalOuterPath for asset in assets),
+        "Tags": array("Q", [pack_tag_map_handle(asset.tags) for asset in assets]),
+        "ChunkIdOffsets": array("Q", accumulate((len(asset.chunk_ids) for asset in assets), initial=0)),
+        "ChunkIds": array("i", [chunk_id for asset in assets for chunk_id in asset.chunk_ids]),
+        "PackageFlags": array("Q", [asset.package_flags for asset in assets]),
+        # bundles are rare, they are kept as objects for the assets that have them
+        "Bundles": {
+            row: asset.bundles
+            for row, asset in enumerate(assets)
+            if asset.bundles
+        },
+    }
+
+
+def unpack_assets(packed: dict, fnames: FNameCache) -> list[AssetData]:
+    chunk_ids = packed["ChunkIds"].tolist()
+    bundles = packed["Bundles"]
+
+    assets = []
+    for row, (package_path, package_name, asset_name, class_package, class_asset, old_object_path,
+              optional_outer_path, tags, (chunks_start, chunks_end), package_flags) in enumerate(zip(
+        packed["PackagePath"],
+        packed["PackageName"],
+        packed["AssetName"],
+        packed["ClassPackage"],
+        packed["ClassAsset"],
+        packed["OldObjectPath"],
+        packed["OptionalOuterPath"],
+        packed["Tags"],
+        pairwise(packed["ChunkIdOffsets"]),
+        packed["PackageFlags"],
+    )):
+        if class_package == NO_FNAME:
+            asset_class = fnames[class_asset]
+        else:
+            asset_class = TopLevelAssetPath(fnames[class_package], fnames[class_asset])
+
+        assets.append(AssetData(
+            packagePath=fnames[package_path],
+            packageName=fnames[package_name],
+            assetClass=asset_class,
+            assetName=fnames[asset_name],
+            tags=TagMapHandle(
+                has_numberless_keys=bool(tags >> 63),
+                handle_num=(tags >> 32) & 0xFFFF,
+                pair_begin=tags & BITMASK_32,
+            ),
+            bundles=bundles.get(row, []),
+            chunk_ids=chunk_ids[chunks_start:chunks_end],
+            package_flags=package_flags,
+            oldObjectPath=fnames[old_object_path],
+            optionalOuterPath=fnames[optional_outer_path],
+        ))
+
+    return assets
+
+
+def registry_to_snapshot(registry: AssetRegistry, sections: dict[str, tuple[int, int]] | None = None) -> dict:
+    """Packs a registry into flat columns of integers and byte blobs that pickle and unpickle without per-object overhead"""
+    state = registry.state
+    names = state.names
+
+    return {
+        "FormatVersion": SNAPSHOT_FORMAT_VERSION,
+        "Header": {
+            "VersionGUID": tuple(registry.header.version.guid),
+            "VersionNumber": registry.header.version.version_num,
+            "FilterEditorOnly": registry.header.filter_editor_only,
+        },
+        "Sections": sections or {},
+        "Names": pack_strings(names.names_by_idx),
+        "NameHashes": array("Q", names.names.keys()),
+        "NameHashIndices": array("Q", [idx for idx, _ in names.names.values()]),
+        "TagStore": pack_tag_store(state.tag_store),
+        "Assets": pack_assets(state.assets),
+        "Dependencies": state.dependencies,
+        "Packages": state.packages,
+    }
+
+
+def registry_from_snapshot(snapshot: dict, sections: dict[str, tuple[int, int]] | None = None) -> AssetRegistry:
+    if snapshot.get("FormatVersion") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Snapshot format {snapshot.get('FormatVersion')} does not match {SNAPSHOT_FORMAT_VERSION}")
+
+    if sections is not None:
+        sections.update(snapshot["Sections"])
+
+    header = snapshot["Header"]
+    fnames = FNameCache()
+
+    with paused_gc():
+        names = NameMapper()
+        names.names_by_idx = unpack_strings(snapshot["Names"])
+        names.names = {
+            name_hash: (idx, names.names_by_idx[idx])
+            for name_hash, idx in zip(snapshot["NameHashes"], snapshot["NameHashIndices"])
+        }
+
+        tag_store = unpack_tag_store(snapshot["TagStore"], fnames)
+        assets = unpack_assets(snapshot["Assets"], fnames)
+
+    return AssetRegistry(
+        header=AssetRegistryHeader(
+            version=AssetRegVersion(
+                guid=header["VersionGUID"],
+                version_num=header["VersionNumber"],
+            ),
+            filter_editor_only=header["FilterEditorOnly"],
+        ),
+        state=AssetRegistryState(
+            names=names,
+            tag_store=tag_store,
+            assets=assets,
+            dependencies=snapshot["Dependencies"],
+            packages=snapshot["Packages"],
+        ),
+    )
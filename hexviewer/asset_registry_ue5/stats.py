@@ -0,0 +1,99 @@
+import logging
+from collections import Counter
+
+from hexviewer.asset_registry_ue5.json_conversion.name_resolver import NameResolver
+from hexviewer.asset_registry_ue5.tag_value_types import ValueTypes
+from hexviewer.asset_registry_ue5.types.registry import AssetRegistry
+from hexviewer.asset_registry_ue5.unreal_types import FName, TopLevelAssetPath
+
+logger = logging.getLogger(__name__)
+
+
+def fname_key(name: FName) -> tuple[int, int]:
+    return name.name_idx, name.number
+
+
+def class_key(asset_class: FName | TopLevelAssetPath) -> tuple[int, ...]:
+    if isinstance(asset_class, TopLevelAssetPath):
+        return fname_key(asset_class.package) + fname_key(asset_class.asset)
+    return fname_key(asset_class)
+
+
+def resolve_class_key(key: tuple[int, ...], name_resolver: NameResolver) -> str:
+    names = [FName(key[i], key[i + 1]) for i in range(0, len(key), 2)]
+    return ".".join(name_resolver.resolve_fname(name) for name in names)
+
+
+def registry_stats(registry: AssetRegistry, sections: dict[str, tuple[int, int]] | None = None, top_n: int = 20) -> dict:
+    """
+    Aggregates counts over the parsed registry using name indices as keys;
+    names are only resolved for the top_n entries of each histogram.
+    """
+    logger.info("Computing registry statistics")
+    state = registry.state
+    tag_store = state.tag_store
+    name_resolver = NameResolver(state.names)
+
+    class_counts: Counter = Counter()
+    chunk_sizes: Counter = Counter()
+    tag_key_counts: Counter = Counter()
+    value_type_refs: Counter = Counter()
+
+    for asset in state.assets:
+        class_counts[class_key(asset.assetClass)] += 1
+        chunk_sizes.update(asset.chunk_ids)
+
+        for key, val_id in tag_store.get_key_val_pair(asset.tags):
+            tag_key_counts[fname_key(key)] += 1
+            value_type_refs[val_id.value_type] += 1
+
+    names = state.names.names_by_idx
+
+    return {
+        "Version": registry.header.version.version_num,
+        "FilterEditorOnly": registry.header.filter_editor_only,
+        "SectionBytes": {
+            section_name: end - start
+            for section_name, (start, end) in (sections or {}).items()
+        },
+        "Names": {
+            "Count": len(names),
+            "StringBytes": sum(len(name.string_data) for name in names),
+            "WideCount": sum(1 for name in names if name.is_wide),
+        },
+        "Assets": len(state.assets),
+        "Dependencies": len(state.dependencies),
+        "Packages": len(state.packages),
+        "ValueTables": {
+            val_type.name: {
+                "Size": len(tag_store.get_table_by_type(val_type) or []),
+                "References": value_type_refs[val_type],
+            }
+            for val_type in ValueTypes
+        },
+        "PairTables": {
+            "NumberlessPairs": len(tag_store.numberless_pairs),
+            "Pairs": len(tag_store.numbered_pairs),
+        },
+        "Classes": {
+            "Distinct": len(class_counts),
+            "Top": [
+                {"Class": resolve_class_key(key, name_resolver), "Count": count}
+                for key, count in class_counts.most_common(top_n)
+            ],
+        },
+        "Chunks": {
+            "Distinct": len(chunk_sizes),
+            "Top": [
+                {"ChunkId": chunk_id, "Count": count}
+                for chunk_id, count in chunk_sizes.most_common(top_n)
+            ],
+        },
+        "TagKeys": {
+            "Distinct": len(tag_key_counts),
+            "Top": [
+                {"Tag": name_resolver.resolve_fname(FName(*key)), "Count": count}
+                for key, count in tag_key_counts.most_common(top_n)
+            ],
+        },
+    }
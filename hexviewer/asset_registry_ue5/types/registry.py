@@ -1,3 +1,4 @@
+from array import array
 from dataclasses import dataclass
 
 from hexviewer.asset_registry_ue5.data_store_reader import DataStore
@@ -53,16 +54,17 @@ class AssetData:
 class Dependency:
     identifier: AssetIdentifier
 
-    package_deps: list[int]
+    # node indices into the dependency section, with the flag sets of each node packed into uint32 words
+    package_deps: array
     package_dep_flags: bytes
 
-    name_deps: list[int]
+    name_deps: array
     name_dep_flags: bytes
 
-    manage_deps: list[int]
+    manage_deps: array
     manage_dep_flags: bytes
 
-    referencers: list[int]
+    referencers: array
     referencer_flags: bytes
 
 
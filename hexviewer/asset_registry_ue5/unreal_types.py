@@ -1,7 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import TypeAlias, ClassVar
 
-from hexviewer.asset_registry_ue5.bytes import BITMASK_8
+from hexviewer.asset_registry_ue5.bytes import BITMASK_8, BITMASK_16, BITMASK_32
 from hexviewer.asset_registry_ue5.name_pool import FNAME_POOL_SHARDS
 from hexviewer.asset_registry_ue5.tag_value_types import ValueTypes
 
@@ -10,6 +10,9 @@ from hexviewer.asset_registry_ue5.tag_value_types import ValueTypes
 class SerializedString:
     string_data: bytes
     is_wide: bool
+    # set where string_data holds the bytes as read from a file, which are written back unchanged,
+    # all other strings are re-encoded on write
+    is_serialized: bool = field(default=False, compare=False)
 
     def string_view(self):
         return self.string_data.decode("utf-16" if self.is_wide else "utf-8").rstrip("\x00")
@@ -80,6 +83,15 @@ class TagMapHandle:
     pair_begin: int
 
 
+def pack_tag_map_handle(handle: TagMapHandle) -> int:
+    """The handle as the uint64 it's serialized as"""
+    return (
+        bool(handle.has_numberless_keys) << 63
+        | (handle.handle_num & BITMASK_16) << 32
+        | handle.pair_begin & BITMASK_32
+    )
+
+
 @dataclass
 class FValueID:
     TYPE_BITS: ClassVar[int] = 3
@@ -97,7 +109,7 @@ class AssetIdentifier:
     valueName: FName | None
 
 class FNameHeader:
-    WIDE_FLAG_BIT = 0b1000000
+    WIDE_FLAG_BIT = 0b10000000
     def __init__(self, byte_data: bytes):
         self.is_wide = bool(byte_data[0] & self.WIDE_FLAG_BIT)
         self.bytes = byte_data
@@ -108,7 +120,7 @@ class FNameHeader:
             raise ValueError(f"Max length is 1024, got {length}")
 
         return cls(bytes((
-            (is_wide << 7 | length >> 8),
+            (is_wide * cls.WIDE_FLAG_BIT | length >> 8),
             length & BITMASK_8
         )))
 
@@ -1,3 +1,13 @@
+import gc
+import hashlib
+from contextlib import contextmanager
+from pathlib import Path
+
+from hexviewer.asset_registry_ue5.instrumentation import stage
+
+HASH_CHUNK_SIZE = 1024 ** 2
+
+
 def encode_no_bom(val: str, is_wide: bool):
     string_data = val.encode("utf-16" if is_wide else "utf-8")
     if is_wide:
@@ -7,4 +17,47 @@ def encode_no_bom(val: str, is_wide: bool):
         ]):
             string_data = bytes(string_data[2:])
 
-    return string_data
\ No newline at end of file
+    return string_data
+
+
+@contextmanager
+def paused_gc():
+    """Suspends cyclic garbage collection while building large acyclic structures, which would otherwise trigger repeated full collections"""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def tool_version() -> str:
+    # importlib.metadata is slow to import and only needed once a cache key or manifest entry is built
+    from importlib import metadata
+
+    try:
+        return metadata.version("hexviewer")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def file_content_hash(input_file: Path) -> str:
+    content_hash = hashlib.blake2b(digest_size=20)
+    with input_file.open("rb") as reader:
+        while chunk := reader.read(HASH_CHUNK_SIZE):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def write_if_changed(output_path: Path, data: bytes) -> bool:
+    """Writes data unless the file already holds exactly these bytes, keeping its modification time stable"""
+    try:
+        if output_path.stat().st_size == len(data) and output_path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+
+    with stage("WriteFile"):
+        output_path.write_bytes(data)
+    return True
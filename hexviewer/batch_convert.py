@@ -0,0 +1,175 @@
+import glob
+import logging
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import click
+
+from hexviewer.asset_registry_ue5.instrumentation import checks_enabled, enable_checks
+from hexviewer.asset_registry_ue5.registry_cache import configure_cache, get_cache
+from hexviewer.read_asset_reg import convert_bin_to_json, convert_json_to_bin, filter_registry_file
+from hexviewer.verify_registry import verify_registry_file
+
+logger = logging.getLogger(__name__)
+
+# operation: (input suffix, output suffix, output stem suffix)
+BATCH_OPERATIONS = {
+    "bin_to_json": (".bin", ".json", "_parsed"),
+    "json_to_bin": (".json", ".bin", "_encoded"),
+    "verify": (".bin", None, None),
+    "filter": (None, None, "_filtered"),
+}
+
+
+def collect_inputs(sources: tuple[str, ...], operation: str) -> list[Path]:
+    input_suffix, _, _ = BATCH_OPERATIONS[operation]
+
+    inputs = []
+    for source in sources:
+        source_path = Path(source)
+        if source_path.is_dir():
+            candidates = sorted(source_path.iterdir())
+        else:
+            candidates = sorted(Path(match) for match in glob.glob(source, recursive=True))
+
+        inputs.extend(
+            candidate.resolve()
+            for candidate in candidates
+            if candidate.is_file() and (input_suffix is None or candidate.suffix.lower() == input_suffix)
+        )
+
+    return list(dict.fromkeys(inputs))
+
+
+def batch_output_path(input_file: Path, operation: str, output_dir: Path | None) -> Path | None:
+    _, output_suffix, stem_suffix = BATCH_OPERATIONS[operation]
+    if stem_suffix is None:
+        return None
+
+    output_path = input_file.with_stem(input_file.stem + stem_suffix)
+    if output_suffix is not None:
+        output_path = output_path.with_suffix(output_suffix)
+    if output_dir is not None:
+        output_path = output_dir / output_path.name
+
+    return output_path
+
+
+def run_batch_job(operation: str, input_file: Path, output_path: Path | None, json_filter: Path | None, file_byte_order: str):
+    """Runs one operation, returning the elapsed seconds and the error message if it failed"""
+    start = time.perf_counter()
+    try:
+        if operation == "bin_to_json":
+            convert_bin_to_json(input_file, output_path, json_filter, file_byte_order)
+        elif operation == "json_to_bin":
+            convert_json_to_bin(input_file, output_path, json_filter, file_byte_order)
+        elif operation == "verify":
+            verify_registry_file(input_file, file_byte_order)
+        elif operation == "filter":
+            filter_registry_file(input_file, output_path, json_filter, file_byte_order)
+        else:
+            raise ValueError(f"Unknown operation {operation}")
+    except Exception as e:
+        logger.debug(traceback.format_exc())
+        return time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+    return time.perf_counter() - start, None
+
+
+def init_batch_worker(log_level: int, cache_dir: Path | None, cache_size: int, checks: bool):
+    logging.basicConfig(level=log_level)
+    configure_cache(cache_dir, cache_size)
+    enable_checks(checks)
+
+
+@click.command(
+    "batch",
+    help="Runs an operation over every matching registry in the given directories or glob patterns, in parallel."
+)
+@click.argument(
+    "operation",
+    type=click.Choice(list(BATCH_OPERATIONS)),
+)
+@click.argument(
+    "sources",
+    nargs=-1,
+    required=True,
+)
+@click.option(
+    "output_dir",
+    "--output",
+    "-o",
+    type=click.Path(exists=False, dir_okay=True, file_okay=False, writable=True, resolve_path=True, path_type=Path),
+    default=None,
+    help="Directory for the output files, defaults to next to each input."
+)
+@click.option(
+    "json_filter",
+    "--filter",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+    default=None
+)
+@click.option(
+    "jobs",
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    show_default=True,
+)
+def batch_convert(operation: str, sources: tuple[str, ...], output_dir: Path | None, json_filter: Path | None, jobs: int, file_byte_order=sys.byteorder):
+    if operation == "filter" and json_filter is None:
+        raise click.UsageError("The filter operation requires --filter")
+
+    inputs = collect_inputs(sources, operation)
+    if not inputs:
+        raise click.UsageError("No matching input files")
+
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs_args = [
+        (operation, input_file, batch_output_path(input_file, operation, output_dir), json_filter, file_byte_order)
+        for input_file in inputs
+    ]
+
+    batch_start = time.perf_counter()
+    failures = []
+
+    def report(input_file: Path, elapsed: float, error: str | None):
+        if error is None:
+            click.echo(f"{elapsed:8.2f}s  OK      {input_file}")
+        else:
+            failures.append(input_file)
+            click.echo(f"{elapsed:8.2f}s  FAILED  {input_file}: {error}", err=True)
+
+    if jobs == 1 or len(jobs_args) == 1:
+        for args in jobs_args:
+            report(args[1], *run_batch_job(*args))
+    else:
+        cache = get_cache()
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(jobs_args)),
+            initializer=init_batch_worker,
+            initargs=(
+                logging.getLogger().level,
+                cache.cache_dir if cache else None,
+                cache.max_bytes if cache else 0,
+                checks_enabled(),
+            ),
+        ) as executor:
+            futures = {
+                executor.submit(run_batch_job, *args): args[1]
+                for args in jobs_args
+            }
+            for future in as_completed(futures):
+                report(futures[future], *future.result())
+
+    click.echo(f"{len(inputs) - len(failures)} of {len(inputs)} files done in {time.perf_counter() - batch_start:.2f}s")
+
+    if failures:
+        raise click.ClickException(f"{len(failures)} files failed")
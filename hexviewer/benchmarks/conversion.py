@@ -0,0 +1,242 @@
+import io
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import click
+
+from hexviewer.asset_registry_ue5.binary_conversion.read_binary_file import read_header, deserialize_name_batch, \
+    deserialize_data_store, load_asset_data, get_dependencies, get_package_data
+from hexviewer.asset_registry_ue5.binary_conversion.write_binary_file import asset_registry_to_binary_file
+from hexviewer.asset_registry_ue5.json_conversion.make_editable_json import make_editable_json
+from hexviewer.asset_registry_ue5.json_conversion.read_editable_json import load_registry_from_json
+from hexviewer.asset_registry_ue5.reader_type import ArchiveType
+from hexviewer.asset_registry_ue5.readers.binary_reader import BinaryReader
+from hexviewer.asset_registry_ue5.readers.binary_writer import BinaryWriter
+from hexviewer.asset_registry_ue5.registry_generator import GeneratorConfig, generate_registry
+from hexviewer.asset_registry_ue5.types.registry import AssetRegistry, AssetRegistryState
+from hexviewer.read_asset_reg import registry_to_bytes
+
+# stage: (input of the stage, whose size is used for the MB/s figure)
+STAGES = {
+    "deserialize_name_batch": "binary",
+    "DataStore.load": "binary",
+    "get_cached_asset": "binary",
+    "make_editable_json": "binary",
+    "json.dumps": "json",
+    "load_registry_from_json": "json",
+    "DataStore.write": "binary",
+    "asset_registry_to_binary_file": "binary",
+}
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_THRESHOLD = 0.15
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak RSS of this process, None where the resource module is missing, i.e. on windows"""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macos bytes
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def run_stages(data: bytes, file_byte_order: str) -> tuple[dict[str, float], int, int]:
+    """Runs every stage once in pipeline order, returning the seconds per stage, the asset count and the json size"""
+    timings = {}
+
+    def timed(stage: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    reader = BinaryReader(io.BytesIO(data), file_byte_order)
+    header = read_header(reader)
+    names = timed("deserialize_name_batch", deserialize_name_batch, reader, header)
+    tag_store = timed("DataStore.load", deserialize_data_store, reader)
+    assets = timed("get_cached_asset", load_asset_data, reader, header, ArchiveType.ASSET_REGISTRY)
+    dependencies = get_dependencies(reader, ArchiveType.ASSET_REGISTRY)
+    packages = get_package_data(reader, header, ArchiveType.ASSET_REGISTRY)
+    registry = AssetRegistry(header, AssetRegistryState(
+        names=names,
+        tag_store=tag_store,
+        assets=assets,
+        dependencies=dependencies,
+        packages=packages,
+    ))
+
+    json_registry = timed("make_editable_json", make_editable_json, registry)
+    json_text = timed("json.dumps", json.dumps, json_registry, indent=2)
+    registry = timed("load_registry_from_json", load_registry_from_json, json_registry)
+
+    with io.BytesIO() as buffer:
+        timed("DataStore.write", registry.state.tag_store.write, BinaryWriter(buffer, file_byte_order), ArchiveType.ASSET_REGISTRY)
+    with io.BytesIO() as buffer:
+        timed("asset_registry_to_binary_file", asset_registry_to_binary_file, registry, BinaryWriter(buffer, file_byte_order))
+
+    return timings, len(assets), len(json_text.encode("utf-8"))
+
+
+def benchmark_file(input_file: Path, repeat: int, file_byte_order: str) -> dict:
+    """Runs in a fresh worker process so that the peak RSS belongs to this input alone"""
+    data = input_file.read_bytes()
+
+    best: dict[str, float] = {}
+    num_assets = json_size = 0
+    for _ in range(repeat):
+        timings, num_assets, json_size = run_stages(data, file_byte_order)
+        for stage, seconds in timings.items():
+            best[stage] = min(seconds, best.get(stage, seconds))
+
+    input_sizes = {"binary": len(data), "json": json_size}
+
+    return {
+        "File": str(input_file),
+        "BinaryBytes": len(data),
+        "JsonBytes": json_size,
+        "Assets": num_assets,
+        "PeakRSSBytes": peak_rss_bytes(),
+        "Stages": {
+            stage: {
+                "Seconds": round(best[stage], 6),
+                "MBps": round(input_sizes[STAGES[stage]] / 1024 ** 2 / best[stage], 3) if best[stage] else None,
+                "AssetsPerSecond": round(num_assets / best[stage], 1) if best[stage] else None,
+            }
+            for stage in STAGES
+        },
+    }
+
+
+def generate_inputs(sizes: list[int], seed: int, output_dir: Path) -> dict[str, Path]:
+    inputs = {}
+    for size in sizes:
+        input_file = output_dir / f"generated_{size}.bin"
+        click.echo(f"Generating {size} assets", err=True)
+        input_file.write_bytes(registry_to_bytes(generate_registry(GeneratorConfig(num_assets=size, seed=seed))))
+        inputs[input_file.stem] = input_file
+    return inputs
+
+
+def compare_to_baseline(report: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for case_name, case in report.items():
+        if (baseline_case := baseline.get(case_name)) is None:
+            continue
+        for stage, result in case["Stages"].items():
+            baseline_seconds = baseline_case["Stages"].get(stage, {}).get("Seconds")
+            if not baseline_seconds:
+                continue
+            ratio = result["Seconds"] / baseline_seconds
+            result["BaselineRatio"] = round(ratio, 3)
+            if ratio > 1 + threshold:
+                regressions.append(f"{case_name} {stage}: {result['Seconds']:.4f}s vs {baseline_seconds:.4f}s (x{ratio:.2f})")
+
+        baseline_rss = baseline_case.get("PeakRSSBytes")
+        if baseline_rss and case["PeakRSSBytes"] and case["PeakRSSBytes"] > baseline_rss * (1 + threshold):
+            regressions.append(f"{case_name} peak RSS: {case['PeakRSSBytes']} vs {baseline_rss} bytes")
+
+    return regressions
+
+
+def print_summary(report: dict):
+    click.echo(f"{'case':<24}{'stage':<32}{'seconds':>10}{'MB/s':>10}{'assets/s':>14}{'vs base':>9}", err=True)
+    for case_name, case in report.items():
+        for stage, result in case["Stages"].items():
+            ratio = result.get("BaselineRatio")
+            click.echo(
+                f"{case_name:<24}{stage:<32}{result['Seconds']:>10.4f}{result['MBps'] or 0:>10.2f}"
+                f"{result['AssetsPerSecond'] or 0:>14.0f}{f'x{ratio:.2f}' if ratio else '':>9}",
+                err=True
+            )
+        peak_rss = case["PeakRSSBytes"]
+        peak_rss_mib = f"{peak_rss / 1024 ** 2:.1f}" if peak_rss is not None else "n/a"
+        click.echo(f"{case_name:<24}{'peak RSS (MiB)':<32}{peak_rss_mib:>10}", err=True)
+
+
+@click.command(
+    "conversion",
+    help="Times every conversion stage over generated registries of several sizes, or over the given binary files, "
+         "and compares the results with a stored baseline."
+)
+@click.argument(
+    "input_files",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+    nargs=-1,
+)
+@click.option(
+    "sizes",
+    "--sizes",
+    default=",".join(str(size) for size in DEFAULT_SIZES),
+    show_default=True,
+    help="Comma separated asset counts of the generated registries, used when no files are given."
+)
+@click.option("seed", "--seed", type=int, default=0, show_default=True)
+@click.option("repeat", "--repeat", type=click.IntRange(min=1), default=3, show_default=True,
+              help="Runs per input, the fastest time of each stage is kept.")
+@click.option(
+    "output_path",
+    "--output",
+    "-o",
+    type=click.Path(exists=False, dir_okay=False, file_okay=True, writable=True, resolve_path=True, path_type=Path),
+    default=None,
+    help="Writes the report as json, e.g. to serve as a baseline for later runs."
+)
+@click.option(
+    "baseline_path",
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+    default=None,
+)
+@click.option(
+    "threshold",
+    "--threshold",
+    type=click.FloatRange(min=0),
+    default=DEFAULT_THRESHOLD,
+    show_default=True,
+    help="Allowed slowdown relative to the baseline before a stage counts as a regression."
+)
+def conversion_benchmark(input_files: tuple[Path, ...], sizes: str, seed: int, repeat: int, output_path: Path | None,
+                         baseline_path: Path | None, threshold: float, file_byte_order=sys.byteorder):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if input_files:
+            inputs = {input_file.stem: input_file for input_file in input_files}
+        else:
+            try:
+                size_list = [int(size) for size in sizes.split(",")]
+            except ValueError:
+                raise click.BadParameter(f"Invalid sizes {sizes!r}", param_hint="--sizes")
+            inputs = generate_inputs(size_list, seed, Path(temp_dir))
+
+        report = {}
+        spawn_context = multiprocessing.get_context("spawn")
+        for case_name, input_file in inputs.items():
+            click.echo(f"Benchmarking {case_name}", err=True)
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn_context) as executor:
+                report[case_name] = executor.submit(benchmark_file, input_file, repeat, file_byte_order).result()
+
+    regressions = []
+    if baseline_path is not None:
+        with baseline_path.open("r") as reader:
+            regressions = compare_to_baseline(report, json.load(reader), threshold)
+
+    print_summary(report)
+
+    if output_path is not None:
+        with output_path.open("w") as writer:
+            writer.write(json.dumps(report, indent=2))
+
+    if regressions:
+        raise click.ClickException("Regressions against the baseline:\n" + "\n".join(regressions))
+
+
+if __name__ == "__main__":
+    conversion_benchmark()
@@ -0,0 +1,122 @@
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+import click
+
+IMPORTTIME_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# imported by the cli entry point only when a command actually needs them
+HEAVY_MODULES = (
+    "jmespath",
+    "cityhash",
+    "hexviewer.asset_registry_ue5.data_store_reader",
+    "hexviewer.asset_registry_ue5.registry_snapshot",
+    "hexviewer.read_asset_reg",
+)
+
+# case: (arguments run through the cli in a fresh interpreter, whether HEAVY_MODULES must stay unimported)
+STARTUP_CASES = {
+    "import": (None, True),
+    # listing the commands imports every command module for its help text
+    "help": (["--help"], False),
+    "clear_cache_help": (["clear_cache", "--help"], True),
+    "bin_to_json_help": (["bin_to_json", "--help"], False),
+}
+
+
+def cli_script(args: list[str] | None) -> str:
+    if args is None:
+        return "import hexviewer.main"
+    return f"from hexviewer.main import cli; cli({args!r}, standalone_mode=False)"
+
+
+def import_times(args: list[str] | None) -> dict[str, tuple[int, int, int]]:
+    """Returns the self and cumulative import time in microseconds and the nesting depth of every module imported by the case"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", cli_script(args)],
+        capture_output=True, text=True, check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if match := IMPORTTIME_PATTERN.match(line):
+            times[match.group(4)] = (int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2)
+    return times
+
+
+def wall_time(args: list[str] | None, repeat: int) -> float:
+    """Median wall time in seconds of starting an interpreter and running the case"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", cli_script(args)], capture_output=True, check=True)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def measure_case(args: list[str] | None, check_heavy: bool, repeat: int, top_n: int) -> dict:
+    times = import_times(args)
+    top_level_import_time = sum(cumulative for _, cumulative, depth in times.values() if depth == 0)
+
+    return {
+        "WallMs": round(wall_time(args, repeat) * 1000, 2),
+        "ImportMs": round(top_level_import_time / 1000, 2),
+        "Modules": len(times),
+        "HeavyModules": [name for name in HEAVY_MODULES if name in times] if check_heavy else [],
+        "SlowestImports": {
+            name: round(self_time / 1000, 2)
+            for name, (self_time, _, _) in sorted(times.items(), key=lambda x: x[1][0], reverse=True)[:top_n]
+        },
+    }
+
+
+@click.command(
+    "startup",
+    help="Measures cli startup in fresh interpreters using -X importtime. "
+         "Fails if the entry point imports modules only commands should need, or if a case is slower than --max-ms."
+)
+@click.option(
+    "repeat",
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=5,
+    show_default=True,
+)
+@click.option(
+    "max_ms",
+    "--max-ms",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Upper bound for the total import time of every case."
+)
+@click.option(
+    "top_n",
+    "--top",
+    type=click.IntRange(min=0),
+    default=5,
+    show_default=True,
+)
+def startup_benchmark(repeat: int, max_ms: float | None, top_n: int):
+    report = {
+        case_name: measure_case(args, check_heavy, repeat, top_n)
+        for case_name, (args, check_heavy) in STARTUP_CASES.items()
+    }
+    click.echo(json.dumps(report, indent=2))
+
+    problems = []
+    for case_name, case in report.items():
+        if case["HeavyModules"]:
+            problems.append(f"{case_name} imports {', '.join(case['HeavyModules'])}")
+        if max_ms is not None and case["ImportMs"] > max_ms:
+            problems.append(f"{case_name} spent {case['ImportMs']}ms importing, more than {max_ms}ms")
+
+    if problems:
+        raise click.ClickException("; ".join(problems))
+
+
+if __name__ == "__main__":
+    startup_benchmark()
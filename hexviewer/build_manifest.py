@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+from hexviewer.asset_registry_ue5.utils import tool_version, file_content_hash
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FORMAT_VERSION = 1
+
+
+class BuildManifest:
+    """
+    Records the inputs each output was built from, so unchanged outputs can be skipped on the next build.
+    File hashes are reused while a file's size and modification time are unchanged.
+    """
+    def __init__(self, manifest_path: Path):
+        self.manifest_path = manifest_path
+        self.outputs: dict[str, dict] = {}
+        self.known_hashes: dict[str, dict] = {}
+
+        try:
+            with manifest_path.open("r") as reader:
+                manifest = json.load(reader)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.warning(f"Ignoring unreadable build manifest {manifest_path}")
+            return
+
+        if manifest.get("FormatVersion") == MANIFEST_FORMAT_VERSION:
+            self.outputs = manifest.get("Outputs", {})
+            self.known_hashes = manifest.get("Files", {})
+
+    def file_hash(self, file_path: Path) -> str | None:
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            return None
+
+        key = str(file_path)
+        known = self.known_hashes.get(key)
+        if known is not None and known["Size"] == stat.st_size and known["MTime"] == stat.st_mtime_ns:
+            return known["Hash"]
+
+        content_hash = file_content_hash(file_path)
+        self.known_hashes[key] = {
+            "Size": stat.st_size,
+            "MTime": stat.st_mtime_ns,
+            "Hash": content_hash,
+        }
+        return content_hash
+
+    def build_entry(self, operation: str, input_files: list[Path], json_filter: Path | None) -> dict:
+        return {
+            "Operation": operation,
+            "Inputs": [[str(input_file), self.file_hash(input_file)] for input_file in input_files],
+            "Filter": self.file_hash(json_filter) if json_filter else None,
+            "ToolVersion": tool_version(),
+        }
+
+    def is_up_to_date(self, output_path: Path, entry: dict) -> bool:
+        recorded = self.outputs.get(str(output_path))
+        if recorded is None:
+            return False
+
+        recorded_output_hash = recorded.get("OutputHash")
+        recorded = {key: val for key, val in recorded.items() if key != "OutputHash"}
+
+        return recorded == entry and self.file_hash(output_path) == recorded_output_hash
+
+    def record(self, output_path: Path, entry: dict):
+        self.outputs[str(output_path)] = entry | {"OutputHash": self.file_hash(output_path)}
+
+    def save(self):
+        temp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with temp_path.open("w") as writer:
+            json.dump({
+                "FormatVersion": MANIFEST_FORMAT_VERSION,
+                "Outputs": self.outputs,
+                "Files": self.known_hashes,
+            }, writer, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+
+def build_incrementally(manifest_path: Path | None, operation: str, input_files: list[Path], json_filter: Path | None,
+                        output_path: Path, build: Callable[[], None]):
+    """Runs build unless the manifest shows output_path was already built from identical inputs"""
+    if manifest_path is None:
+        build()
+        return
+
+    manifest = BuildManifest(manifest_path)
+    entry = manifest.build_entry(operation, input_files, json_filter)
+
+    if manifest.is_up_to_date(output_path, entry):
+        logger.info(f"{output_path} is up to date")
+        return
+
+    build()
+
+    manifest.record(output_path, entry)
+    manifest.save()
@@ -0,0 +1,14 @@
+import click
+
+from hexviewer.asset_registry_ue5.registry_cache import get_cache
+
+
+@click.command(
+    "clear_cache",
+    help="Removes all entries from the parsed registry cache."
+)
+def clear_registry_cache():
+    cache = get_cache()
+    if cache is None:
+        raise click.UsageError("No cache directory configured, use --cache-dir or ASSET_REG_CACHE_DIR")
+    cache.clear()
@@ -0,0 +1,46 @@
+import logging
+import sys
+from pathlib import Path
+
+import click
+
+from hexviewer.asset_registry_ue5.registry_remapper import compact
+from hexviewer.asset_registry_ue5.tag_value_types import ValueTypes
+from hexviewer.asset_registry_ue5.types.registry import AssetRegistry, AssetRegistryState
+from hexviewer.asset_registry_ue5.utils import write_if_changed
+from hexviewer.read_asset_reg import load_registry_file, registry_to_bytes
+
+logger = logging.getLogger(__name__)
+
+
+def num_tag_values(state: AssetRegistryState) -> int:
+    return sum(len(state.tag_store.get_table_by_type(val_type) or []) for val_type in ValueTypes)
+
+
+@click.command(
+    "compact",
+    help="Drops the names and tag values no asset, dependency or package references from the specified binary or "
+         "json file, and writes the result as a binary file."
+)
+@click.argument(
+    "input_file",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+)
+@click.option(
+    "output_path",
+    "--output",
+    "-o",
+    type=click.Path(exists=False, dir_okay=False, file_okay=True, writable=True, resolve_path=True, path_type=Path),
+    default=None
+)
+def compact_registry(input_file: Path, output_path: Path | None, file_byte_order=sys.byteorder):
+    if output_path is None:
+        output_path = input_file.with_stem(input_file.stem + "_compact").with_suffix(".bin")
+
+    registry = load_registry_file(input_file, file_byte_order)
+    state = compact(registry.state)
+
+    logger.info(f"Kept {len(state.names.names_by_idx)} of {len(registry.state.names.names_by_idx)} names "
+                f"and {num_tag_values(state)} of {num_tag_values(registry.state)} tag values")
+
+    write_if_changed(output_path, registry_to_bytes(AssetRegistry(header=registry.header, state=state), file_byte_order))
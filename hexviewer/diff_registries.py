@@ -0,0 +1,40 @@
+import json
+import sys
+from pathlib import Path
+
+import click
+
+from hexviewer.asset_registry_ue5.registry_diff import diff_registries, diff_to_json
+from hexviewer.read_asset_reg import load_registry_file
+
+
+@click.command(
+    "diff",
+    help="Compares the assets of two binary or json registries by PackageName.AssetName and prints the added, removed "
+         "and changed assets as json, with the changed fields and tags of every changed asset. The output can be "
+         "applied to the old registry with apply_patch."
+)
+@click.argument(
+    "old_file",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+)
+@click.argument(
+    "new_file",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+)
+@click.option(
+    "output_path",
+    "--output",
+    "-o",
+    type=click.Path(exists=False, dir_okay=False, file_okay=True, writable=True, resolve_path=True, path_type=Path),
+    default=None
+)
+def print_registry_diff(old_file: Path, new_file: Path, output_path: Path | None, file_byte_order=sys.byteorder):
+    diff = diff_registries(load_registry_file(old_file, file_byte_order), load_registry_file(new_file, file_byte_order))
+    report = json.dumps(diff_to_json(diff), indent=2)
+
+    if output_path is None:
+        click.echo(report)
+    else:
+        with output_path.open("w") as writer:
+            writer.write(report)
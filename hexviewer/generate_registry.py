@@ -0,0 +1,93 @@
+import sys
+from pathlib import Path
+
+import click
+
+from hexviewer.asset_registry_ue5.json_conversion.make_editable_json import make_editable_json
+from hexviewer.asset_registry_ue5.registry_generator import GeneratorConfig, generate_registry, DEFAULT_TYPE_MIX, \
+    VALUE_KINDS
+from hexviewer.asset_registry_ue5.utils import write_if_changed
+from hexviewer.read_asset_reg import json_to_bytes, registry_to_bytes
+
+
+def parse_type_mix(ctx, param, value: str | None) -> dict[str, float]:
+    if value is None:
+        return dict(DEFAULT_TYPE_MIX)
+
+    type_mix = {}
+    for entry in value.split(","):
+        kind, _, weight = entry.partition("=")
+        kind = kind.strip().upper()
+        if kind not in VALUE_KINDS:
+            raise click.BadParameter(f"Unknown value kind {kind}, expected one of {', '.join(VALUE_KINDS)}")
+        try:
+            type_mix[kind] = float(weight)
+        except ValueError:
+            raise click.BadParameter(f"Invalid weight for {kind}: {weight!r}")
+
+    return type_mix
+
+
+@click.command(
+    "generate",
+    help="Generates a synthetic version 17 registry for testing, written as json if OUTPUT ends in .json and binary otherwise."
+)
+@click.argument(
+    "output_path",
+    type=click.Path(exists=False, dir_okay=False, file_okay=True, writable=True, resolve_path=True, path_type=Path),
+)
+@click.option("num_assets", "--assets", "-n", type=click.IntRange(min=0), default=1000, show_default=True)
+@click.option("tags_per_asset", "--tags-per-asset", type=click.IntRange(min=0), default=8, show_default=True)
+@click.option(
+    "type_mix",
+    "--type-mix",
+    callback=parse_type_mix,
+    default=None,
+    help="Relative weights of the tag value kinds, e.g. STRING=0.5,NAME=0.2,PATH=0.2,TEXT=0.1 (the default)."
+)
+@click.option(
+    "name_reuse",
+    "--name-reuse",
+    type=click.FloatRange(0, 1),
+    default=0.8,
+    show_default=True,
+    help="Chance that a tag value repeats an earlier value of the same kind."
+)
+@click.option("wide_fraction", "--wide-fraction", type=click.FloatRange(0, 1), default=0.05, show_default=True)
+@click.option(
+    "numbered_fraction",
+    "--numbered-fraction",
+    type=click.FloatRange(0, 1),
+    default=0.1,
+    show_default=True,
+    help="Share of tag keys and name values that carry an instance number."
+)
+@click.option("bundle_fraction", "--bundle-fraction", type=click.FloatRange(0, 1), default=0.05, show_default=True)
+@click.option("num_chunks", "--chunks", type=click.IntRange(min=0), default=16, show_default=True)
+@click.option("chunks_per_asset", "--chunks-per-asset", type=click.IntRange(min=0), default=1, show_default=True)
+@click.option("seed", "--seed", type=int, default=0, show_default=True)
+def generate_synthetic_registry(output_path: Path, num_assets: int, tags_per_asset: int, type_mix: dict[str, float],
+                                name_reuse: float, wide_fraction: float, numbered_fraction: float, bundle_fraction: float,
+                                num_chunks: int, chunks_per_asset: int, seed: int, file_byte_order=sys.byteorder):
+    try:
+        config = GeneratorConfig(
+            num_assets=num_assets,
+            tags_per_asset=tags_per_asset,
+            type_mix=type_mix,
+            name_reuse=name_reuse,
+            wide_fraction=wide_fraction,
+            numbered_fraction=numbered_fraction,
+            bundle_fraction=bundle_fraction,
+            num_chunks=num_chunks,
+            chunks_per_asset=chunks_per_asset,
+            seed=seed,
+        )
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    registry = generate_registry(config)
+
+    if output_path.suffix.lower() == ".json":
+        write_if_changed(output_path, json_to_bytes(make_editable_json(registry)))
+    else:
+        write_if_changed(output_path, registry_to_bytes(registry, file_byte_order))
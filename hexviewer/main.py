@@ -1,15 +1,60 @@
+import importlib
 import logging
+from pathlib import Path
 
 import click
 
-from hexviewer.read_asset_reg import registry_bin_to_json, registry_json_to_bin
-from hexviewer.merge_registries import merge_json_regs
+from hexviewer.asset_registry_ue5.instrumentation import enable_profiling, disable_profiling, enable_checks
+from hexviewer.asset_registry_ue5.registry_cache import configure_cache, DEFAULT_CACHE_SIZE
+from hexviewer.progress_display import configure_progress
+
+# command name: "module:attribute", each module is only imported once its command is used
+LAZY_COMMANDS = {
+    "bin_to_json": "hexviewer.read_asset_reg:registry_bin_to_json",
+    "json_to_bin": "hexviewer.read_asset_reg:registry_json_to_bin",
+    "merge_json_regs": "hexviewer.merge_registries:merge_json_regs",
+    "split_by_chunk": "hexviewer.split_registry:split_by_chunk",
+    "stats": "hexviewer.registry_stats:print_registry_stats",
+    "info": "hexviewer.registry_info:print_registry_info",
+    "verify": "hexviewer.verify_registry:verify_registries",
+    "clear_cache": "hexviewer.clear_cache:clear_registry_cache",
+    "batch": "hexviewer.batch_convert:batch_convert",
+    "serve": "hexviewer.serve_registry:serve_registries",
+    "generate": "hexviewer.generate_registry:generate_synthetic_registry",
+    "deps": "hexviewer.registry_deps:print_dependencies",
+    "compact": "hexviewer.compact_registry:compact_registry",
+    "apply_patch": "hexviewer.patch_registry:apply_patch",
+    "diff": "hexviewer.diff_registries:print_registry_diff",
+}
 
 logger = logging.getLogger(__name__)
 
 
+class LazyGroup(click.Group):
+    def __init__(self, *args, lazy_commands: dict[str, str] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            self.add_command(self.load_command(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def load_command(self, cmd_name: str) -> click.Command:
+        module_name, attribute = self.lazy_commands[cmd_name].split(":")
+        command = getattr(importlib.import_module(module_name), attribute)
+        if not isinstance(command, click.Command):
+            raise ValueError(f"{self.lazy_commands[cmd_name]} is not a click command")
+        return command
+
+
 @click.group(
-    "asset_reg"
+    "asset_reg",
+    cls=LazyGroup,
+    lazy_commands=LAZY_COMMANDS,
 )
 @click.option(
     "verbosity",
@@ -17,7 +62,50 @@ logger = logging.getLogger(__name__)
     "-v",
     count=True
 )
-def cli(verbosity: int):
+@click.option(
+    "cache_dir",
+    "--cache-dir",
+    envvar="ASSET_REG_CACHE_DIR",
+    type=click.Path(exists=False, dir_okay=True, file_okay=False, writable=True, resolve_path=True, path_type=Path),
+    default=None,
+    help="Directory for caching parsed binary registries, caching is disabled if not set."
+)
+@click.option(
+    "cache_size",
+    "--cache-size",
+    envvar="ASSET_REG_CACHE_SIZE",
+    type=click.IntRange(min=0),
+    default=DEFAULT_CACHE_SIZE // 1024 ** 2,
+    help="Size limit of the cache directory in MiB."
+)
+@click.option(
+    "profile",
+    "--profile",
+    is_flag=True,
+    help="Prints wall time, CPU time and peak traced memory of every conversion stage after the command."
+)
+@click.option(
+    "profile_trace",
+    "--profile-trace",
+    type=click.Path(exists=False, dir_okay=False, file_okay=True, writable=True, resolve_path=True, path_type=Path),
+    default=None,
+    help="Also writes the recorded stages as a Chrome trace event file, implies --profile."
+)
+@click.option(
+    "check",
+    "--check",
+    is_flag=True,
+    help="Runs consistency checks on every parsed binary registry, e.g. that all tag handles lie within the tag store. "
+         "Registries are parsed from their file even when the cache has them, the checked result is cached as usual."
+)
+@click.option(
+    "progress",
+    "--progress",
+    is_flag=True,
+    help="Shows the progress of each conversion section with items/s, MB/s and the remaining time on stderr."
+)
+def cli(verbosity: int, cache_dir: Path | None, cache_size: int, profile: bool, profile_trace: Path | None, check: bool,
+        progress: bool):
     debug_levels = [
         logging.WARN,
         logging.INFO,
@@ -25,7 +113,17 @@ def cli(verbosity: int):
     ]
     logging.basicConfig(level=debug_levels[min(verbosity, len(debug_levels)-1)])
 
+    configure_cache(cache_dir, cache_size * 1024 ** 2)
+    enable_checks(check)
+    configure_progress(progress)
+
+    if profile or profile_trace is not None:
+        profiler = enable_profiling()
+
+        def report_profile():
+            disable_profiling()
+            click.echo(profiler.format_summary(), err=True)
+            if profile_trace is not None:
+                profiler.write_chrome_trace(profile_trace)
 
-cli.add_command(registry_bin_to_json)
-cli.add_command(registry_json_to_bin)
-cli.add_command(merge_json_regs)
\ No newline at end of file
+        click.get_current_context().call_on_close(report_profile)
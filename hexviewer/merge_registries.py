@@ -7,6 +7,10 @@ import jmespath.exceptions as jmes_exceptions
 
 import click
 
+from hexviewer.asset_registry_ue5.json_conversion.read_editable_json import parse_node_indices
+from hexviewer.asset_registry_ue5.utils import write_if_changed
+from hexviewer.build_manifest import build_incrementally
+
 class CustomFunctions(functions.Functions):
     @functions.signature({"types": ["array"]}, {"types": ["expref"]})
     def _func_keep_first_occurrence(self, entries: list, expref):
@@ -35,6 +39,39 @@ class CustomFunctions(functions.Functions):
         return keyfunc
 
 
+DEPENDENCY_LIST_KEYS = ("PackageDependencies", "NameDependencies", "ManageDependencies", "Referencers")
+
+
+def identifier_key(identifier: dict) -> tuple:
+    return tuple(identifier.get(key) for key in ("Flags", "Package", "Type", "Object", "Value"))
+
+
+def merge_dependencies(dependency_lists: list[list[dict]]) -> list[dict]:
+    """
+    Merges the dependency nodes of several registries by asset identifier, later lists replacing the nodes of earlier ones.
+    Node indices refer to positions within their own list, so every edge is remapped onto the merged list.
+    """
+    merged: dict[tuple, tuple[dict, list[tuple]]] = {}
+    for dependencies in dependency_lists:
+        node_keys = [identifier_key(dependency["AssetIdentifier"]) for dependency in dependencies]
+        for dependency, key in zip(dependencies, node_keys):
+            merged[key] = dependency, node_keys
+
+    merged_indices = {key: idx for idx, key in enumerate(merged)}
+
+    merged_dependencies = []
+    for dependency, node_keys in merged.values():
+        dependency = dict(dependency)
+        for list_key in DEPENDENCY_LIST_KEYS:
+            dependency[list_key] = [
+                merged_indices[node_keys[node_idx]]
+                for node_idx in parse_node_indices(dependency.get(list_key, []))
+            ]
+        merged_dependencies.append(dependency)
+
+    return merged_dependencies
+
+
 @click.command(
     "merge_json_regs",
     help="Merges several JSON registries into one."
@@ -51,15 +88,30 @@ class CustomFunctions(functions.Functions):
     type=click.Path(exists=False, dir_okay=False, file_okay=True, writable=True, resolve_path=True, path_type=Path),
     default=None
 )
-def merge_json_regs(input_files: tuple[Path, ...], output_path: Path | None):
+@click.option(
+    "manifest_path",
+    "--manifest",
+    type=click.Path(exists=False, dir_okay=False, file_okay=True, writable=True, resolve_path=True, path_type=Path),
+    default=None,
+    help="Build manifest recording the inputs of each output, the merge is skipped if they are unchanged."
+)
+def merge_json_regs(input_files: tuple[Path, ...], output_path: Path | None, manifest_path: Path | None):
     main_input = input_files[0]
-    input_files = reversed(input_files)
-
-    options = jmespath.Options(custom_functions=CustomFunctions())
 
     if output_path is None:
         output_path = main_input.with_stem(main_input.stem + "_merged").with_suffix(".json")
 
+    build_incrementally(
+        manifest_path, "merge_json_regs", list(input_files), None, output_path,
+        lambda: merge_json_files(input_files, output_path)
+    )
+
+
+def merge_json_files(input_files: tuple[Path, ...], output_path: Path):
+    input_files = reversed(input_files)
+
+    options = jmespath.Options(custom_functions=CustomFunctions())
+
     registries = []
     for input_file in input_files:
         with input_file.open("r") as reader:
@@ -71,16 +123,15 @@ def merge_json_regs(input_files: tuple[Path, ...], output_path: Path | None):
         "State": {
             "Assets": keep_first_occurrence( [*].State.Assets[], &join(`,`, [PackageName, AssetName])),
             "Dependencies": `[]`,
-            "Packages": `[]`,
+            "Packages": keep_first_occurrence( [*].State.Packages[], &Key),
             "Options": [-1].State.Options
         }
     }
     """, registries, options=options)
 
-    with output_path.open("w") as writer:
-        writer.write(
-            json.dumps(
-                registry,
-                indent=2
-            )
-        )
\ No newline at end of file
+    registry["State"]["Dependencies"] = merge_dependencies([
+        json_registry["State"].get("Dependencies", [])
+        for json_registry in reversed(registries)
+    ])
+
+    write_if_changed(output_path, json.dumps(registry, indent=2).encode("utf-8"))
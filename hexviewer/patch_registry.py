@@ -0,0 +1,47 @@
+import logging
+import sys
+from pathlib import Path
+
+import click
+
+from hexviewer.asset_registry_ue5.binary_conversion.registry_patcher import apply_registry_patch
+from hexviewer.asset_registry_ue5.instrumentation import stage
+from hexviewer.asset_registry_ue5.utils import write_if_changed
+from hexviewer.read_asset_reg import read_json_file
+
+logger = logging.getLogger(__name__)
+
+
+@click.command(
+    "apply_patch",
+    help="Applies a json patch to a binary registry and writes the result as a binary file. The patch holds "
+         "\"Assets\" in the editable json format, which replace the assets with the same PackageName.AssetName "
+         "or are added, and \"DeletedAssets\", a list of PackageName.AssetName keys to delete."
+)
+@click.argument(
+    "input_file",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+)
+@click.argument(
+    "patch_file",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+)
+@click.option(
+    "output_path",
+    "--output",
+    "-o",
+    type=click.Path(exists=False, dir_okay=False, file_okay=True, writable=True, resolve_path=True, path_type=Path),
+    default=None
+)
+def apply_patch(input_file: Path, patch_file: Path, output_path: Path | None, file_byte_order=sys.byteorder):
+    if output_path is None:
+        output_path = input_file.with_stem(input_file.stem + "_patched").with_suffix(".bin")
+
+    patch = read_json_file(patch_file)
+    with stage("ApplyPatch"):
+        try:
+            patched = apply_registry_patch(input_file.read_bytes(), patch, file_byte_order)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    write_if_changed(output_path, patched)
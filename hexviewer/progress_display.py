@@ -0,0 +1,86 @@
+import sys
+import time
+from dataclasses import dataclass
+
+import click
+
+from hexviewer.asset_registry_ue5.progress import ProgressUpdate
+
+
+@dataclass
+class _SectionStart:
+    time: float
+    bytes_done: int | None
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+
+class ProgressDisplay:
+    """
+    Progress callback printing items/s, MB/s and the remaining time of the current section to stderr.
+    On a terminal the line is redrawn at most every min_interval seconds, otherwise only finished sections are printed.
+    """
+    def __init__(self, min_interval: float = 0.25):
+        self.min_interval = min_interval
+        self.redraw = sys.stderr.isatty()
+        self.sections: dict[tuple[str, str], _SectionStart] = {}
+        self.last_draw = 0.0
+
+    def __call__(self, update: ProgressUpdate):
+        now = time.perf_counter()
+        start = self.sections.setdefault((update.operation, update.section), _SectionStart(now, update.bytes_done))
+
+        if not update.finished and (not self.redraw or now - self.last_draw < self.min_interval):
+            return
+        self.last_draw = now
+
+        line = self.format_line(update, now - start.time, start.bytes_done)
+        if update.finished:
+            del self.sections[(update.operation, update.section)]
+            click.echo(f"\r{line}\033[K" if self.redraw else line, err=True)
+        else:
+            click.echo(f"\r{line}\033[K", nl=False, err=True)
+
+    @staticmethod
+    def format_line(update: ProgressUpdate, elapsed: float, start_bytes: int | None) -> str:
+        unit = update.section.lower()
+        parts = [f"{update.operation} {update.section}:"]
+
+        if update.items_total is not None:
+            parts.append(f"{update.items_done}/{update.items_total} {unit}")
+        elif update.items_done:
+            parts.append(f"{update.items_done} {unit}")
+
+        item_rate = update.items_done / elapsed if elapsed > 0 else None
+        if item_rate and update.items_total is not None:
+            parts.append(f"{item_rate:,.0f} {unit}/s")
+
+        byte_rate = None
+        if update.bytes_done is not None and start_bytes is not None and elapsed > 0:
+            byte_rate = (update.bytes_done - start_bytes) / elapsed
+            parts.append(f"{byte_rate / 1024 ** 2:.1f} MB/s")
+
+        if update.finished:
+            parts.append(f"in {format_duration(elapsed)}")
+        elif update.items_total and item_rate:
+            parts.append(f"ETA {format_duration((update.items_total - update.items_done) / item_rate)}")
+        elif update.bytes_total and byte_rate:
+            parts.append(f"ETA {format_duration((update.bytes_total - update.bytes_done) / byte_rate)}")
+
+        return " ".join(parts)
+
+
+_progress: ProgressDisplay | None = None
+
+
+def configure_progress(enabled: bool):
+    global _progress
+    _progress = ProgressDisplay() if enabled else None
+
+
+def get_progress() -> ProgressDisplay | None:
+    return _progress
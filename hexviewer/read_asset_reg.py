@@ -1,3 +1,4 @@
+import io
 import json
 import sys
 from pathlib import Path
@@ -9,8 +10,68 @@ from hexviewer.asset_registry_ue5.binary_conversion.write_binary_file import ass
 from hexviewer.asset_registry_ue5.json_conversion.make_editable_json import make_editable_json
 from hexviewer.asset_registry_ue5.json_conversion.read_editable_json import load_registry_from_json
 from hexviewer.asset_registry_ue5.json_conversion.json_filter import apply_json_filter
+from hexviewer.asset_registry_ue5.instrumentation import checks_enabled, stage
+from hexviewer.asset_registry_ue5.memory_report import memory_report, format_memory_report
+from hexviewer.asset_registry_ue5.registry_cache import get_cache
+from hexviewer.asset_registry_ue5.utils import file_content_hash, write_if_changed
+from hexviewer.build_manifest import build_incrementally
+from hexviewer.progress_display import get_progress
 from hexviewer.asset_registry_ue5.readers.binary_reader import BinaryReader
 from hexviewer.asset_registry_ue5.readers.binary_writer import BinaryWriter
+from hexviewer.asset_registry_ue5.types.registry import AssetRegistry
+
+
+def load_binary_registry(input_file: Path, file_byte_order=sys.byteorder, sections: dict[str, tuple[int, int]] | None = None):
+    cache = get_cache()
+    if cache is None:
+        with input_file.open("rb") as reader:
+            binaries = BinaryReader(reader, file_byte_order)
+            return asset_registry_from_file(binaries, sections, get_progress())
+
+    cache_key = cache.cache_key(file_content_hash(input_file), file_byte_order)
+    # a cached registry may have been stored by a run without checks, so checked runs parse the file again
+    if not checks_enabled() and (registry := cache.load(cache_key, sections)) is not None:
+        return registry
+
+    if sections is None:
+        sections = {}
+
+    with input_file.open("rb") as reader:
+        binaries = BinaryReader(reader, file_byte_order)
+        registry = asset_registry_from_file(binaries, sections, get_progress())
+
+    cache.store(cache_key, registry, sections)
+    return registry
+
+
+def load_registry_file(input_file: Path, file_byte_order=sys.byteorder) -> AssetRegistry:
+    """Loads a json or binary registry, depending on the file suffix"""
+    if input_file.suffix.lower() == ".json":
+        return load_registry_from_json(read_json_file(input_file), get_progress())
+
+    return load_binary_registry(input_file, file_byte_order)
+
+
+def read_json_file(input_file: Path) -> dict:
+    with stage("DecodeJson"), input_file.open("r") as reader:
+        return json.load(reader)
+
+
+def json_to_bytes(json_registry: dict) -> bytes:
+    with stage("EncodeJson"):
+        return json.dumps(json_registry, indent=2).encode("utf-8")
+
+
+def print_memory_report(registry: AssetRegistry):
+    click.echo(format_memory_report(memory_report(registry.state)), err=True)
+
+
+def registry_to_bytes(registry: AssetRegistry, file_byte_order=sys.byteorder) -> bytes:
+    with io.BytesIO() as buffer:
+        binaries = BinaryWriter(buffer, file_byte_order)
+        asset_registry_to_binary_file(registry, binaries, get_progress())
+        return buffer.getvalue()
+
 
 @click.command(
     "bin_to_json",
@@ -33,22 +94,41 @@ from hexviewer.asset_registry_ue5.readers.binary_writer import BinaryWriter
     type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
     default=None
 )
-def registry_bin_to_json(input_file: Path, output_path: Path | None, json_filter: Path | None, file_byte_order=sys.byteorder):
+@click.option(
+    "manifest_path",
+    "--manifest",
+    type=click.Path(exists=False, dir_okay=False, file_okay=True, writable=True, resolve_path=True, path_type=Path),
+    default=None,
+    help="Build manifest recording the inputs of each output, the conversion is skipped if they are unchanged."
+)
+@click.option(
+    "show_memory_report",
+    "--memory-report",
+    is_flag=True,
+    help="Prints the retained size of each part of the loaded registry, e.g. the name table or the tag store tables."
+)
+def registry_bin_to_json(input_file: Path, output_path: Path | None, json_filter: Path | None, manifest_path: Path | None,
+                         show_memory_report: bool, file_byte_order=sys.byteorder):
     if output_path is None:
         output_path = input_file.with_stem(input_file.stem + "_parsed").with_suffix(".json")
 
-    with input_file.open("rb") as reader:
-        binaries = BinaryReader(reader, file_byte_order)
-        registry = asset_registry_from_file(binaries)
+    build_incrementally(
+        manifest_path, "bin_to_json", [input_file], json_filter, output_path,
+        lambda: convert_bin_to_json(input_file, output_path, json_filter, file_byte_order, show_memory_report)
+    )
+
 
-    json_registry = make_editable_json(registry)
+def convert_bin_to_json(input_file: Path, output_path: Path, json_filter: Path | None = None, file_byte_order=sys.byteorder,
+                        show_memory_report: bool = False):
+    registry = load_binary_registry(input_file, file_byte_order)
+    if show_memory_report:
+        print_memory_report(registry)
+
+    json_registry = make_editable_json(registry, get_progress())
     if json_filter:
         json_registry = apply_json_filter(json_registry, json_filter)
 
-    with output_path.open("w") as writer:
-        writer.write(
-            json.dumps(json_registry, indent=2)
-        )
+    write_if_changed(output_path, json_to_bytes(json_registry))
 
 def load_write_json_test(input_json: Path, output_path: Path):
     with input_json.open("r") as reader:
@@ -80,25 +160,61 @@ def load_write_json_test(input_json: Path, output_path: Path):
     type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
     default=None
 )
-def registry_json_to_bin(input_file: Path, output_path: Path | None, json_filter: Path | None, file_byte_order=sys.byteorder):
+@click.option(
+    "manifest_path",
+    "--manifest",
+    type=click.Path(exists=False, dir_okay=False, file_okay=True, writable=True, resolve_path=True, path_type=Path),
+    default=None,
+    help="Build manifest recording the inputs of each output, the conversion is skipped if they are unchanged."
+)
+@click.option(
+    "show_memory_report",
+    "--memory-report",
+    is_flag=True,
+    help="Prints the retained size of each part of the loaded registry, e.g. the name table or the tag store tables."
+)
+def registry_json_to_bin(input_file: Path, output_path: Path | None, json_filter: Path | None, manifest_path: Path | None,
+                         show_memory_report: bool, file_byte_order=sys.byteorder):
     if output_path is None:
         output_path = input_file.with_stem(input_file.stem + "_encoded").with_suffix(".bin")
 
-    with input_file.open("r") as reader:
-        registry = load_registry_from_json(json.load(reader))
+    build_incrementally(
+        manifest_path, "json_to_bin", [input_file], json_filter, output_path,
+        lambda: convert_json_to_bin(input_file, output_path, json_filter, file_byte_order, show_memory_report)
+    )
+
+
+def convert_json_to_bin(input_file: Path, output_path: Path, json_filter: Path | None = None, file_byte_order=sys.byteorder,
+                        show_memory_report: bool = False):
+    json_registry = read_json_file(input_file)
 
     if json_filter:
-        registry = apply_json_filter(registry, json_filter)
+        json_registry = apply_json_filter(json_registry, json_filter)
 
-    with output_path.open("wb") as writer:
-        binaries = BinaryWriter(writer, file_byte_order)
-        asset_registry_to_binary_file(registry, binaries)
+    registry = load_registry_from_json(json_registry, get_progress())
+    if show_memory_report:
+        print_memory_report(registry)
+
+    write_if_changed(output_path, registry_to_bytes(registry, file_byte_order))
+
+
+def filter_registry_file(input_file: Path, output_path: Path, json_filter: Path, file_byte_order=sys.byteorder):
+    """Applies the filter to a json or binary registry, writing the result in the same format"""
+    if input_file.suffix.lower() == ".json":
+        json_registry = read_json_file(input_file)
+    else:
+        json_registry = make_editable_json(load_binary_registry(input_file, file_byte_order))
+
+    json_registry = apply_json_filter(json_registry, json_filter)
+
+    if output_path.suffix.lower() == ".json":
+        write_if_changed(output_path, json_to_bytes(json_registry))
+    else:
+        write_if_changed(output_path, registry_to_bytes(load_registry_from_json(json_registry), file_byte_order))
 
 
 def load_write_bin_test(input_file: Path, output_path: Path, file_byte_order=sys.byteorder):
-    with input_file.open("rb") as reader:
-        binaries = BinaryReader(reader, file_byte_order)
-        registry = asset_registry_from_file(binaries)
+    registry = load_binary_registry(input_file, file_byte_order)
 
     with output_path.open("wb") as writer:
         binaries = BinaryWriter(writer, file_byte_order)
@@ -0,0 +1,112 @@
+import json
+import sys
+from pathlib import Path
+
+import click
+
+from hexviewer.asset_registry_ue5.chunk_index import ChunkIndex
+from hexviewer.asset_registry_ue5.dependency_graph import DependencyGraph, EDGE_KINDS
+from hexviewer.asset_registry_ue5.json_conversion.name_resolver import NameResolver
+from hexviewer.asset_registry_ue5.types.registry import AssetRegistry
+from hexviewer.read_asset_reg import load_registry_file
+
+
+def nodes_by_package(graph: DependencyGraph, name_resolver: NameResolver) -> dict[str, list[int]]:
+    nodes: dict[str, list[int]] = {}
+    for node, identifier in enumerate(graph.identifiers):
+        if identifier.packageName is not None:
+            nodes.setdefault(name_resolver.resolve_fname(identifier.packageName), []).append(node)
+    return nodes
+
+
+def chunk_packages(registry: AssetRegistry, chunk_ids: list[int], name_resolver: NameResolver) -> set[str]:
+    index = ChunkIndex.from_assets(registry.state.assets)
+    assets = registry.state.assets
+    return {
+        name_resolver.resolve_fname(assets[row].packageName)
+        for chunk_id in chunk_ids
+        for row in index.rows(chunk_id)
+    }
+
+
+@click.command(
+    "deps",
+    help="Lists the transitive dependencies of the given packages and of the packages in the given chunks, "
+         "or with --reverse everything that depends on them, as json."
+)
+@click.argument(
+    "input_file",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+)
+@click.argument("packages", nargs=-1)
+@click.option(
+    "chunk_ids",
+    "--chunk",
+    "-c",
+    type=int,
+    multiple=True,
+    help="Starts from all packages with assets in the chunk, can be used multiple times."
+)
+@click.option(
+    "kind",
+    "--kind",
+    type=click.Choice(list(EDGE_KINDS), case_sensitive=False),
+    default="Package",
+    show_default=True,
+)
+@click.option("reverse", "--reverse", is_flag=True, help="Follows the edges backwards, listing the referencers.")
+@click.option(
+    "max_depth",
+    "--depth",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Stops after this many edges, 1 lists the direct dependencies only."
+)
+@click.option(
+    "flag_mask",
+    "--flags",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Only follows edges whose flag set shares a bit with this mask."
+)
+@click.option(
+    "output_path",
+    "--output",
+    "-o",
+    type=click.Path(exists=False, dir_okay=False, file_okay=True, writable=True, resolve_path=True, path_type=Path),
+    default=None
+)
+def print_dependencies(input_file: Path, packages: tuple[str, ...], chunk_ids: tuple[int, ...], kind: str, reverse: bool,
+                       max_depth: int | None, flag_mask: int | None, output_path: Path | None, file_byte_order=sys.byteorder):
+    if not packages and not chunk_ids:
+        raise click.UsageError("Specify at least one package or --chunk")
+
+    registry = load_registry_file(input_file, file_byte_order)
+    name_resolver = NameResolver(registry.state.names)
+    graph = DependencyGraph.from_dependencies(registry.state.dependencies, file_byte_order)
+    nodes = nodes_by_package(graph, name_resolver)
+
+    start_packages = set(packages) | chunk_packages(registry, list(chunk_ids), name_resolver)
+    if missing := sorted(package for package in packages if package not in nodes):
+        raise click.UsageError(f"No dependency nodes for {', '.join(missing)}")
+
+    start_nodes = [node for package in sorted(start_packages) for node in nodes.get(package, [])]
+
+    try:
+        depths = graph.bfs(start_nodes, kind, reverse, max_depth, flag_mask)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    report = json.dumps([
+        {
+            "AssetIdentifier": name_resolver.resolve_asset_identifier(graph.identifiers[node]),
+            "Depth": depth,
+        }
+        for node, depth in depths.items()
+    ], indent=2)
+
+    if output_path is None:
+        click.echo(report)
+    else:
+        with output_path.open("w") as writer:
+            writer.write(report)
@@ -0,0 +1,49 @@
+import json
+import sys
+from pathlib import Path
+
+import click
+
+from hexviewer.asset_registry_ue5.binary_conversion.registry_scanner import open_registry_scanner, scan_registry_info, \
+    RegistryInfo
+
+
+def registry_info_to_json(info: RegistryInfo):
+    return {
+        "VersionNumber": info.version,
+        "FilterEditorOnly": info.filter_editor_only,
+        "Names": info.num_names,
+        "NameStringBytes": info.num_name_string_bytes,
+        "NameHashVersion": info.name_hash_version,
+        "TextTagsFirst": info.text_tags_first,
+        "TagStoreSizes": info.tag_store_sizes,
+        "Assets": info.num_assets,
+        "Dependencies": info.num_dependencies,
+        "Packages": info.num_packages,
+        "Sections": {
+            section_name: {"Start": start, "End": end}
+            for section_name, (start, end) in info.sections.items()
+        },
+    }
+
+
+@click.command(
+    "info",
+    help="Prints the header and section sizes of the specified binary file as json, without parsing its contents."
+)
+@click.argument(
+    "input_file",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+)
+@click.option(
+    "skip_assets",
+    "--skip-assets",
+    is_flag=True,
+    default=False,
+    help="Stop after the asset count instead of walking the assets to reach the dependency and package counts."
+)
+def print_registry_info(input_file: Path, skip_assets: bool, file_byte_order=sys.byteorder):
+    with open_registry_scanner(input_file, file_byte_order) as scanner:
+        info = scan_registry_info(scanner, skip_assets)
+
+    click.echo(json.dumps(registry_info_to_json(info), indent=2))
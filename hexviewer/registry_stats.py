@@ -0,0 +1,43 @@
+import json
+import sys
+from pathlib import Path
+
+import click
+
+from hexviewer.asset_registry_ue5.stats import registry_stats
+from hexviewer.read_asset_reg import load_binary_registry
+
+
+@click.command(
+    "stats",
+    help="Prints counts and histograms of the specified binary file as json."
+)
+@click.argument(
+    "input_file",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+)
+@click.option(
+    "output_path",
+    "--output",
+    "-o",
+    type=click.Path(exists=False, dir_okay=False, file_okay=True, writable=True, resolve_path=True, path_type=Path),
+    default=None
+)
+@click.option(
+    "top_n",
+    "--top",
+    type=click.IntRange(min=0),
+    default=20,
+    help="Number of entries to list per histogram."
+)
+def print_registry_stats(input_file: Path, output_path: Path | None, top_n: int, file_byte_order=sys.byteorder):
+    sections = {}
+    registry = load_binary_registry(input_file, file_byte_order, sections)
+
+    report = json.dumps(registry_stats(registry, sections, top_n), indent=2)
+
+    if output_path is None:
+        click.echo(report)
+    else:
+        with output_path.open("w") as writer:
+            writer.write(report)
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import logging
+import os
+import stat
+import sys
+import time
+from pathlib import Path
+
+import click
+
+from hexviewer.asset_registry_ue5.registry_index import RegistryIndex
+from hexviewer.asset_registry_ue5.utils import file_content_hash
+from hexviewer.read_asset_reg import load_registry_file
+
+logger = logging.getLogger(__name__)
+
+# requests and responses larger than this are rejected by the stream reader
+MAX_MESSAGE_SIZE = 64 * 1024 ** 2
+
+
+class ServedRegistry:
+    """
+    A registry file kept loaded together with its indexes.
+    The file is checked before every request and reloaded once its modification time or size changed
+    and its content hash differs from the loaded one.
+    """
+    def __init__(self, name: str, input_file: Path, file_byte_order: str):
+        self.name = name
+        self.input_file = input_file
+        self.file_byte_order = file_byte_order
+        self.index: RegistryIndex | None = None
+        self.file_key: tuple[int, int] | None = None
+        self.content_hash: str | None = None
+        self.loaded_at: float | None = None
+        self.lock = asyncio.Lock()
+
+    async def ensure_current(self, force: bool = False) -> RegistryIndex:
+        async with self.lock:
+            file_stat = self.input_file.stat()
+            file_key = (file_stat.st_mtime_ns, file_stat.st_size)
+            if not force and self.index is not None and file_key == self.file_key:
+                return self.index
+
+            content_hash = await asyncio.to_thread(file_content_hash, self.input_file)
+            if not force and self.index is not None and content_hash == self.content_hash:
+                self.file_key = file_key
+                return self.index
+
+            start = time.perf_counter()
+            self.index = await asyncio.to_thread(self.load)
+            self.file_key = file_key
+            self.content_hash = content_hash
+            self.loaded_at = time.time()
+            logger.info(f"Loaded {self.input_file} in {time.perf_counter() - start:.2f}s")
+
+            return self.index
+
+    def load(self) -> RegistryIndex:
+        return RegistryIndex(load_registry_file(self.input_file, self.file_byte_order))
+
+    def describe(self) -> dict:
+        return {
+            "Name": self.name,
+            "Path": str(self.input_file),
+            "ContentHash": self.content_hash,
+            "LoadedAt": self.loaded_at,
+            "Assets": len(self.index.registry.state.assets) if self.index else None,
+        }
+
+
+class RegistryServer:
+    """
+    Answers newline delimited json requests of the form {"Op": ..., "Registry": ..., ...}
+    with {"Ok": true, "Result": ...} or {"Ok": false, "Error": ...}.
+    """
+    def __init__(self, registries: dict[str, ServedRegistry]):
+        self.registries = registries
+        self.operations = {
+            "list": self.op_list,
+            "lookup": self.op_lookup,
+            "tags": self.op_tags,
+            "chunk": self.op_chunk,
+            "reload": self.op_reload,
+        }
+
+    def served_registry(self, request: dict) -> ServedRegistry:
+        name = request.get("Registry")
+        if name is None:
+            if len(self.registries) != 1:
+                raise ValueError(f"Request must name one of the registries {list(self.registries)}")
+            return next(iter(self.registries.values()))
+
+        if (registry := self.registries.get(name)) is None:
+            raise ValueError(f"Unknown registry {name}")
+        return registry
+
+    async def index(self, request: dict) -> RegistryIndex:
+        return await self.served_registry(request).ensure_current()
+
+    async def op_list(self, request: dict):
+        return [registry.describe() for registry in self.registries.values()]
+
+    async def op_lookup(self, request: dict):
+        index = await self.index(request)
+        return index.assets_json(index.find_rows(request["Path"]))
+
+    async def op_tags(self, request: dict):
+        index = await self.index(request)
+        rows = index.find_rows(request["Path"])
+        keys = request.get("Keys")
+
+        result = {}
+        for path, asset in zip(index.object_paths(rows), index.assets_json(rows)):
+            tags = asset["TagsAndValues"]
+            if keys is not None:
+                tags = {key: tags[key] for key in keys if key in tags}
+            result[path] = tags
+        return result
+
+    async def op_chunk(self, request: dict):
+        index = await self.index(request)
+        chunk_id = request.get("ChunkId")
+        if chunk_id is None:
+            return {
+                str(chunk): len(index.chunks.rows(chunk))
+                for chunk in index.chunks.chunk_ids()
+            }
+
+        rows = index.chunks.rows(int(chunk_id))
+        offset = request.get("Offset", 0)
+        limit = request.get("Limit")
+        end = len(rows) if limit is None else offset + limit
+        return {
+            "Count": len(rows),
+            "Assets": index.object_paths(rows[offset:end]),
+        }
+
+    async def op_reload(self, request: dict):
+        registry = self.served_registry(request)
+        await registry.ensure_current(force=True)
+        return registry.describe()
+
+    async def handle_request(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a json object")
+
+            operation = self.operations.get(request.get("Op"))
+            if operation is None:
+                raise ValueError(f"Unknown operation {request.get('Op')}, expected one of {list(self.operations)}")
+
+            return {"Ok": True, "Result": await operation(request)}
+        except KeyError as e:
+            return {"Ok": False, "Error": f"Missing field {e}"}
+        except (ValueError, TypeError, OSError) as e:
+            return {"Ok": False, "Error": str(e)}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                start = time.perf_counter()
+                response = await self.handle_request(line)
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+                logger.debug(f"Answered request in {(time.perf_counter() - start) * 1000:.1f}ms")
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError) as e:
+            logger.warning(f"Dropping connection: {e}")
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: Path):
+        # load everything up front so the first requests are fast too
+        for registry in self.registries.values():
+            await registry.ensure_current()
+
+        server = await asyncio.start_unix_server(self.handle_connection, path=socket_path, limit=MAX_MESSAGE_SIZE)
+        logger.info(f"Serving {len(self.registries)} registries on {socket_path}")
+        click.echo(f"Listening on {socket_path}", err=True)
+
+        async with server:
+            await server.serve_forever()
+
+
+def remove_stale_socket(socket_path: Path):
+    try:
+        if stat.S_ISSOCK(socket_path.stat().st_mode):
+            socket_path.unlink()
+        else:
+            raise click.UsageError(f"{socket_path} exists and is not a socket")
+    except FileNotFoundError:
+        pass
+
+
+@click.command(
+    "serve",
+    help="Keeps registries loaded and answers json queries over a unix socket, one request and response per line."
+)
+@click.argument(
+    "socket_path",
+    type=click.Path(dir_okay=False, file_okay=True, resolve_path=True, path_type=Path),
+)
+@click.argument(
+    "input_files",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+    nargs=-1,
+    required=True,
+)
+def serve_registries(socket_path: Path, input_files: tuple[Path, ...], file_byte_order=sys.byteorder):
+    registries = {}
+    for input_file in input_files:
+        if input_file.stem in registries:
+            raise click.UsageError(f"Two registries are named {input_file.stem}")
+        registries[input_file.stem] = ServedRegistry(input_file.stem, input_file, file_byte_order)
+
+    remove_stale_socket(socket_path)
+    try:
+        asyncio.run(RegistryServer(registries).serve(socket_path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if socket_path.exists():
+            os.unlink(socket_path)
@@ -0,0 +1,73 @@
+import logging
+import sys
+from pathlib import Path
+
+import click
+
+from hexviewer.asset_registry_ue5.binary_conversion.write_binary_file import asset_registry_to_binary_file
+from hexviewer.asset_registry_ue5.chunk_index import ChunkIndex
+from hexviewer.asset_registry_ue5.readers.binary_writer import BinaryWriter
+from hexviewer.asset_registry_ue5.registry_remapper import RegistryRemapper
+from hexviewer.asset_registry_ue5.types.registry import AssetRegistry
+from hexviewer.read_asset_reg import load_binary_registry
+
+logger = logging.getLogger(__name__)
+
+
+def split_registry_by_chunk(registry: AssetRegistry, chunk_ids: list[int] | None = None):
+    index = ChunkIndex.from_assets(registry.state.assets)
+    remapper = RegistryRemapper(registry.state)
+
+    if not chunk_ids:
+        chunk_ids = index.chunk_ids()
+
+    for chunk_id in chunk_ids:
+        if chunk_id not in index:
+            logger.warning(f"No assets in chunk {chunk_id}")
+            continue
+
+        rows = index.rows(chunk_id)
+        logger.info(f"Chunk {chunk_id}: {len(rows)} assets")
+
+        yield chunk_id, AssetRegistry(
+            header=registry.header,
+            state=remapper.subset(rows),
+        )
+
+
+@click.command(
+    "split_by_chunk",
+    help="Splits the specified binary file into one binary registry per chunk id."
+)
+@click.argument(
+    "input_file",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+)
+@click.option(
+    "output_dir",
+    "--output",
+    "-o",
+    type=click.Path(exists=False, dir_okay=True, file_okay=False, writable=True, resolve_path=True, path_type=Path),
+    default=None
+)
+@click.option(
+    "chunk_ids",
+    "--chunk",
+    "-c",
+    type=int,
+    multiple=True,
+    help="Only write the given chunk ids, can be used multiple times."
+)
+def split_by_chunk(input_file: Path, output_dir: Path | None, chunk_ids: tuple[int, ...], file_byte_order=sys.byteorder):
+    if output_dir is None:
+        output_dir = input_file.with_name(input_file.stem + "_chunks")
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    registry = load_binary_registry(input_file, file_byte_order)
+
+    for chunk_id, chunk_registry in split_registry_by_chunk(registry, list(chunk_ids)):
+        output_path = output_dir / f"{input_file.stem}_chunk_{chunk_id}.bin"
+
+        with output_path.open("wb") as writer:
+            binaries = BinaryWriter(writer, file_byte_order)
+            asset_registry_to_binary_file(chunk_registry, binaries)
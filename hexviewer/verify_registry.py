@@ -0,0 +1,39 @@
+import logging
+import sys
+from pathlib import Path
+
+import click
+
+from hexviewer.asset_registry_ue5.binary_conversion.registry_scanner import open_registry_scanner
+from hexviewer.asset_registry_ue5.binary_conversion.registry_verifier import RegistryVerifier, verify_registry
+
+logger = logging.getLogger(__name__)
+
+
+def verify_registry_file(input_file: Path, file_byte_order=sys.byteorder):
+    with open_registry_scanner(input_file, file_byte_order, RegistryVerifier) as verifier:
+        return verify_registry(verifier)
+
+
+@click.command(
+    "verify",
+    help="Checks the structure of the specified binary files without fully parsing them."
+)
+@click.argument(
+    "input_files",
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, readable=True, resolve_path=True, path_type=Path),
+    nargs=-1,
+)
+def verify_registries(input_files: tuple[Path, ...], file_byte_order=sys.byteorder):
+    num_failed = 0
+    for input_file in input_files:
+        try:
+            info = verify_registry_file(input_file, file_byte_order)
+        except ValueError as e:
+            num_failed += 1
+            click.echo(f"{input_file}: {e}", err=True)
+        else:
+            click.echo(f"{input_file}: OK, {info.num_names} names, {info.num_assets} assets")
+
+    if num_failed:
+        raise click.ClickException(f"{num_failed} of {len(input_files)} registries failed verification")